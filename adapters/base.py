@@ -1,5 +1,113 @@
+import asyncio
+import hashlib
+import re
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Dict, Optional
+from core import clock
+
+# Reads everything needed to identify a notification in one round-trip.
+_NOTIFICATION_FIELDS_SCRIPT = """
+(el, sels) => {
+    const pick = (sel) => {
+        const node = sel ? el.querySelector(sel) : null;
+        if (!node) return null;
+        return node.getAttribute('href') || (node.innerText || '').trim() || null;
+    };
+    return {
+        text: el.innerText || '',
+        author: pick(sels.author),
+        post: pick(sels.post),
+    };
+}
+"""
+
+
+# Relative timestamps in activity rows ("2h", "3 days ago", "3 天", "5分前", "2시간 전",
+# "Just now"); they tick over between polls, so they are left out of the identity
+_RELATIVE_TIME = re.compile(
+    r"\b\d+\s?(?:s|m|h|d|w|y|mo|sec|secs|second|seconds|min|mins|minute|minutes|hr|hrs|hour|hours|"
+    r"day|days|wk|wks|week|weeks|month|months|yr|yrs|year|years)\b(?:\s+ago)?"
+    r"|\b(?:just now|yesterday|now)\b"
+    r"|\d+\s?(?:秒|分鐘|分钟|分|小時|小时|時間|天|日|週間|週|周|星期|個月|个月|か月|月|年|초|분|시간|일|주|개월|년)\s?(?:前|전)?"
+    r"|剛剛|刚刚|昨天|たった今|昨日|방금|어제",
+    re.IGNORECASE,
+)
+
+
+def notification_identity(platform: str, author: Optional[str], post_id: Optional[str], text: str) -> str:
+    """
+    Stable notification ID built from author, target post and a text digest.
+    Unlike list-position based IDs it survives the item shifting down the list,
+    its relative timestamp ticking over and process restarts (no salted
+    built-in hash()).
+    """
+    normalized = " ".join(_RELATIVE_TIME.sub(" ", text).split())[:200]
+    key = f"{author or ''}|{post_id or ''}|{normalized}"
+    return f"{platform}_notif_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}"
+
+
+ImageLoader = Callable[[], Awaitable[Optional[str]]]
+
+
+@dataclass(slots=True, eq=False)
+class Post:
+    """
+    A feed post as returned by get_feed().
+
+    Image payloads are lazy: adapters pass one `image_loaders` coroutine
+    function per image and the base64 strings are only produced by
+    `load_images()` (all loaders concurrently) once the loop decides the post
+    is worth a reply. `release()` drops the text, the images and the locator
+    as soon as the item is skipped or done.
+    """
+    id: str
+    content: str
+    platform: str = ""
+    author: str = "unknown"
+    language: str = ""  # Set by the loop (core.language), "" = not detected
+    key: str = ""  # Feed observer key (digest of the rendered text), "" = not observed
+    locator: Any = field(default=None, repr=False)  # Playwright Locator of the post container
+    image_urls: List[str] = field(default_factory=list, repr=False)
+    images: List[str] = field(default_factory=list, repr=False)  # Loaded base64 payloads
+    image_loaders: List[ImageLoader] = field(default_factory=list, repr=False)
+
+    @property
+    def has_image(self) -> bool:
+        return bool(self.images or self.image_loaders)
+
+    async def load_images(self) -> List[str]:
+        """Runs the loaders concurrently (once); images that fail to load are dropped."""
+        if self.image_loaders:
+            loaders, self.image_loaders = self.image_loaders, []
+            results = await asyncio.gather(*(loader() for loader in loaders), return_exceptions=True)
+            self.images = [r for r in results if isinstance(r, str) and r]
+        return self.images
+
+    def release(self):
+        self.content = ""
+        self.locator = None
+        self.image_urls = []
+        self.images = []
+        self.image_loaders = []
+
+
+@dataclass(slots=True, eq=False)
+class Notification:
+    """A notification as returned by get_notifications()."""
+    id: str  # Stable identifier (see notification_identity)
+    type: str  # 'comment', 'reply', 'mention', ...
+    content: str
+    author: str = "unknown"
+    post_id: Optional[str] = None  # Related post (href), if found
+    confidence: float = 0.0  # Type confidence from the notification classifier
+    language: str = ""  # Set by the loop (core.language), "" = not detected
+    locator: Any = field(default=None, repr=False)  # Playwright Locator of the notification item
+
+    def release(self):
+        self.content = ""
+        self.locator = None
+
 
 class BaseAdapter(ABC):
     @abstractmethod
@@ -8,39 +116,118 @@ class BaseAdapter(ABC):
         pass
 
     @abstractmethod
-    async def get_feed(self) -> List[Dict]:
-        """Fetch feed posts and return a list of post dictionaries."""
+    async def get_feed(self) -> List[Post]:
+        """Fetch feed posts."""
         pass
     
     @abstractmethod
-    async def reply(self, post: Dict, comment: str):
-        """Reply to a specific post."""
+    async def reply(self, post: Post, comment: str) -> bool:
+        """Reply to a specific post. True only once the platform confirmed the send."""
         pass
 
     @abstractmethod
-    async def get_notifications(self) -> List[Dict]:
+    async def get_notifications(self, cursor=None) -> List[Notification]:
         """
         Fetch notifications/comments on the official account's posts.
-        Returns a list of notification dictionaries with:
-        - id: Unique identifier
-        - type: 'comment', 'reply', 'mention', etc.
-        - content: Comment/reply text
-        - author: Commenter username
-        - post_id: ID of the related post
-        - element: Playwright locator
+        If a NotificationCursor is given, parsing stops at the first
+        notification already in it (newest-first high-water mark), unless
+        older unresolved items are waiting for a retry (cursor.reached).
         """
         pass
 
     @abstractmethod
-    async def reply_to_comment(self, notification: Dict, comment: str):
+    async def reply_to_comment(self, notification: Notification, comment: str):
         """
         Reply to a specific comment notification.
         Args:
-            notification: Notification dict from get_notifications()
+            notification: Notification from get_notifications()
             comment: Reply text to send
         """
         pass
 
+    async def _read_notification_fields(self, item, author_selector: str, post_selector: str) -> Dict:
+        """Return {'text', 'author', 'post'} for a notification item in a single evaluate()."""
+        return await item.evaluate(
+            _NOTIFICATION_FIELDS_SCRIPT, {'author': author_selector, 'post': post_selector}
+        )
+
+    async def wait_for_notifications(self, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for new notification activity.
+        Returns True when a full get_notifications() fetch is worthwhile.
+        Uses the adapter's NotificationWatcher if it has one, otherwise
+        falls back to a plain sleep followed by an unconditional fetch.
+        """
+        watcher = getattr(self, 'notification_watcher', None)
+        if watcher is None or not (hasattr(self, 'browser') and self.browser.page):
+            await clock.sleep(timeout)
+            return True
+        watcher.attach(self.browser.page)
+        return await watcher.wait(timeout)
+
+    def mark_done(self, post: Post):
+        """The loop is finished with a feed post (replied to or skipped for good)."""
+        observer = getattr(self, 'feed_observer', None)
+        if observer is not None and post.key:
+            observer.done(post.key)
+
+    def retry_later(self, post: Post) -> bool:
+        """
+        Offer a feed post again on the next get_feed(). Observer-based feeds
+        requeue it (False once it has used up its attempts); feeds that are
+        re-scanned from the top offer it again anyway.
+        """
+        observer = getattr(self, 'feed_observer', None)
+        if observer is not None and post.key:
+            return observer.requeue(post.key)
+        return True
+
+    def on_page_recycled(self):
+        """
+        Called after BrowserEngine replaced the page (memory watchdog).
+        Drops cached page handles; feed observers/watchers re-bind lazily.
+        """
+        if getattr(self, 'page', None) is not None:
+            self.page = None
+
+    async def export_state(self) -> Dict:
+        """Loop state worth keeping across restarts (written by core.checkpoint)."""
+        state = {}
+        observer = getattr(self, 'feed_observer', None)
+        if observer is not None:
+            state['feed_seen'] = observer.seen_keys
+        page = self.browser.page if hasattr(self, 'browser') else None
+        if page is not None:
+            try:
+                state['scroll_y'] = await page.evaluate("window.scrollY")
+            except Exception:
+                pass
+        return state
+
+    async def restore_state(self, state: Dict, restore_scroll: bool = True):
+        """
+        Apply a checkpoint after login(). The seen-set is handed to the feed
+        observer when it is created; the scroll position is approached step by
+        step so lazy-loaded feeds have time to grow. Best effort only; returns
+        the scroll position reached (None when not restored).
+        """
+        self._resumed_feed_seen = list(state.get('feed_seen', ()))
+        target = state.get('scroll_y') or 0
+        page = self.browser.page if hasattr(self, 'browser') else None
+        if not restore_scroll or target <= 0 or page is None:
+            return None
+        current = 0
+        for _ in range(10):
+            current = await page.evaluate("(y) => { window.scrollTo(0, y); return window.scrollY; }", target)
+            if current >= target - 50:
+                break
+            await clock.sleep(1.0)
+        return current
+
+    def _take_resumed_feed_seen(self) -> List[str]:
+        seen, self._resumed_feed_seen = getattr(self, '_resumed_feed_seen', []), []
+        return seen
+
     async def refresh_feed(self):
         """
         Global refresh mechanism.
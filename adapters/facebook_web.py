@@ -1,16 +1,39 @@
-from .base import BaseAdapter
+from .base import BaseAdapter, Notification, Post, notification_identity
+import base64
 import logging
-import asyncio
-import random
-from typing import List, Dict
+from functools import partial
+from typing import List, Optional
 from playwright.async_api import TimeoutError
 from . import selectors
+from .notification_classifier import classify_notification
+from .notification_watcher import NotificationWatcher
+from .ui_waits import ReplySteps
+from config import settings
+from core import clock, metrics
 
 logger = logging.getLogger(__name__)
 
+# Post image URLs; anything rendered with a shorter side than minSide (avatars, reaction
+# icons) is skipped. Images not laid out yet are kept and core.vision checks their real size.
+_POST_IMAGES_SCRIPT = """
+(imgs, minSide) => imgs
+    .filter((img) => {
+        const src = img.currentSrc || img.src;
+        if (!src || src.includes('emoji')) return false;
+        const w = img.clientWidth, h = img.clientHeight;
+        return !(w && h) || Math.min(w, h) >= minSide;
+    })
+    .map((img) => img.currentSrc || img.src)
+"""
+
 class FacebookAdapter(BaseAdapter):
     def __init__(self, browser):
         self.browser = browser
+        self.notification_watcher = NotificationWatcher(
+            badge_selector=selectors.FB_NOTIFICATION_BADGE,
+            friendly_name_patterns=("Notification", "Badge", "Jewel"),
+            frame_keywords=("notification", "jewel"),
+        )
 
     async def _dismiss_overlays(self):
         """Attempts to clear standard Facebook/Browser overlays."""
@@ -24,7 +47,7 @@ class FacebookAdapter(BaseAdapter):
             pass
 
     async def _human_delay(self, min_s=1.0, max_s=3.0):
-        await asyncio.sleep(random.uniform(min_s, max_s))
+        await clock.human_delay(min_s, max_s)
 
     async def login(self):
         """
@@ -59,11 +82,23 @@ class FacebookAdapter(BaseAdapter):
             
             if i % 10 == 0:
                 logger.info("   ... still waiting for login ...")
-            await asyncio.sleep(check_interval)
+            await clock.sleep(check_interval)
             
         logger.warning("⚠️ Login timeout or not detected. Proceeding anyway (might fail).")
 
-    async def get_feed(self) -> List[Dict]:
+    async def _fetch_image_base64(self, src: str) -> Optional[str]:
+        """Lazy Post.image_loaders entry: fetched with the page's cookies, only for posts we reply to."""
+        try:
+            with metrics.timer("enrichment"):
+                response = await self.browser.page.request.get(src, timeout=15000)
+                if not response.ok:
+                    return None
+                return base64.b64encode(await response.body()).decode('utf-8')
+        except Exception as e:
+            logger.debug(f"Image fetch failed ({src[:80]}): {e}")
+            return None
+
+    async def get_feed(self) -> List[Post]:
         """
         Scrapes posts. Handles black screen loop by periodically dismissing overlays.
         """
@@ -101,32 +136,27 @@ class FacebookAdapter(BaseAdapter):
                     clean_content = " ".join(lines)
                     
                     # 2. Extract Images (Fix for "Text only" issue)
-                    images = []
-                    # Check standard img tags, but exclude profile pics (usually small)
-                    # This is heuristic.
-                    imgs = await article.locator('img').all()
-                    for img in imgs:
-                        src = await img.get_attribute('src')
-                        # Filter out tiny icons or profile pics by checking URL or generic classes
-                        # For MVP, we simply take non-empty src that's not clearly a badge
-                        if src and 'emoji' not in src:
-                             images.append(src)
+                    # Author avatars, reaction icons and emoji render small; drop them here so an
+                    # avatar alone doesn't make a text post look like an image post
+                    images = await article.locator('img').evaluate_all(
+                        _POST_IMAGES_SCRIPT, settings.vision_min_image_side
+                    )
                     
                     post_id = f"fb_{i}_{abs(hash(clean_content[:20]))}"
                     
                     if len(clean_content) > 30 or len(images) > 0:
-                        post_data = {
-                            'id': post_id,
-                            'content': clean_content,
-                            'platform': 'facebook',
-                            'element': article,
-                            '_locator': article
-                        }
                         if images:
-                            post_data['images'] = images[:2] # Limit to 2 images
                             logger.info(f"   📸 Found {len(images)} images in post {i}")
-                            
-                        posts.append(post_data)
+                        posts.append(Post(
+                            id=post_id,
+                            content=clean_content,
+                            platform='facebook',
+                            locator=article,
+                            image_urls=images[:settings.vision_fetch_images],
+                            # Lazy images not laid out yet are size-checked by core.vision
+                            image_loaders=[partial(self._fetch_image_base64, src)
+                                           for src in images[:settings.vision_fetch_images]],
+                        ))
                         
                 except Exception as e:
                     logger.warning(f"Failed to parse post {i}: {e}")
@@ -137,12 +167,13 @@ class FacebookAdapter(BaseAdapter):
         logger.info(f"Found {len(posts)} posts.")
         return posts
 
-    async def get_notifications(self) -> List[Dict]:
+    async def get_notifications(self, cursor=None) -> List[Notification]:
         """
         獲取 Facebook 官方帳號/粉專的通知
         """
         page = self.browser.page
         logger.info(" [Facebook] Navigating to Notifications...")
+        self.notification_watcher.attach(page)
 
         try:
             # Click on notifications icon or navigate directly
@@ -162,6 +193,7 @@ class FacebookAdapter(BaseAdapter):
                 await page.wait_for_selector(selectors.FB_NOTIFICATION_ITEM, timeout=10000)
             except:
                 logger.warning(" [Facebook] No notifications found or page structure changed.")
+                await self.notification_watcher.mark_synced()
                 return []
 
             items = await page.locator(selectors.FB_NOTIFICATION_ITEM).all()
@@ -172,52 +204,60 @@ class FacebookAdapter(BaseAdapter):
                     if not await item.is_visible():
                         continue
 
-                    full_text = await item.inner_text()
+                    # Identity fields + full text in a single round-trip
+                    fields = await self._read_notification_fields(
+                        item, selectors.FB_NOTIFICATION_AUTHOR, selectors.FB_NOTIFICATION_POST_LINK
+                    )
+                    full_text = fields['text']
+                    author = fields['author'] or None
+                    notif_id = notification_identity('fb', author, fields['post'], full_text)
+
+                    # High-water mark: everything below this item was handled already
+                    if cursor is not None and notif_id in cursor:
+                        if not cursor.reached(notif_id):
+                            continue  # Older unresolved items still need a retry; read past handled ones
+                        logger.info(f" [Facebook] Reached last seen notification after {i} items.")
+                        break
                     
-                    # Determine notification type
-                    notif_type = "unknown"
-                    if "commented" in full_text.lower() or "留言" in full_text or "回應" in full_text:
-                        notif_type = "comment"
-                    elif "mentioned" in full_text.lower() or "提及" in full_text or "標記" in full_text:
-                        notif_type = "mention"
-                    elif "replied" in full_text.lower() or "回覆" in full_text:
-                        notif_type = "reply"
-                    elif "reacted" in full_text.lower() or "心情" in full_text or "對你的" in full_text:
-                        notif_type = "reaction"
+                    # One regex pass over the text; passive items never need another DOM read
+                    kind = classify_notification(full_text)
+                    if kind.passive:
+                        metrics.inc("notifications_filtered", type=kind.type)
+                        if cursor is not None:
+                            cursor.add(notif_id)
                         continue  # Skip reactions
 
-                    notif_id = f"fb_notif_{i}_{hash(full_text[:50])}"
-
-                    notifications.append({
-                        'id': notif_id,
-                        'type': notif_type,
-                        'content': full_text[:200],
-                        'author': 'unknown',
-                        'post_id': None,
-                        'element': item,
-                        '_locator': item
-                    })
+                    notifications.append(Notification(
+                        id=notif_id,
+                        type=kind.type,
+                        confidence=kind.confidence,
+                        content=full_text[:200],
+                        author=author or 'unknown',
+                        post_id=fields['post'],
+                        locator=item,
+                    ))
 
                 except Exception as e:
                     logger.warning(f" [Facebook] Failed to parse notification {i}: {e}")
                     continue
 
             logger.info(f" [Facebook] Parsed {len(notifications)} actionable notifications.")
+            await self.notification_watcher.mark_synced()
             return notifications
 
         except Exception as e:
             logger.error(f" [Facebook] Error fetching notifications: {e}")
             return []
 
-    async def reply_to_comment(self, notification: Dict, comment: str):
+    async def reply_to_comment(self, notification: Notification, comment: str):
         """
         回覆 Facebook 上的特定留言通知
         """
         page = self.browser.page
-        notif_id = notification.get('id')
+        notif_id = notification.id
         logger.info(f" [Facebook] Replying to notification {notif_id}...")
 
-        item = notification.get('_locator') or notification.get('element')
+        item = notification.locator
         
         if not item:
             logger.error(" [Facebook] No locator found. Cannot reply.")
@@ -227,50 +267,58 @@ class FacebookAdapter(BaseAdapter):
             # Click on the notification to open context
             await item.scroll_into_view_if_needed()
             await item.click()
-            await self._human_delay(2, 3)
+            steps = ReplySteps("facebook")
 
-            # Look for comment input box
-            input_box = page.locator(selectors.FB_COMMENT_INPUT).first
+            # Wait for the comment box of the opened post/comment
+            if not await steps.visible("modal_open", page.locator(selectors.FB_COMMENT_INPUT).locator("visible=true").first):
+                logger.error(" [Facebook] Comment input not found.")
+                return False
 
-            if await input_box.count() == 0:
-                # Alternative selectors
-                input_box = page.locator('div[role="textbox"][contenteditable="true"]').first
+            # Look for comment input box
+            input_box = await selectors.registry.locate(page, selectors.FB_COMMENT_INPUT, visible=True)
 
-            if await input_box.count() == 0:
+            if input_box is None:
                 logger.error(" [Facebook] Comment input not found.")
                 return False
+            input_box = input_box.first
 
             await input_box.click()
-            await self._human_delay(0.5, 1)
+            await steps.focused("textbox_focused", input_box)
 
             # Type comment
-            await input_box.fill(comment)
-            await self._human_delay(1, 2)
-
-            # Try Enter key first
-            await input_box.press("Enter")
-            await self._human_delay(1, 2)
+            with metrics.timer("type"):
+                await input_box.fill(comment)
 
-            # Check if we need to click submit button
-            submit_btn = page.locator(selectors.FB_COMMENT_SUBMIT).first
-            if await submit_btn.count() > 0 and await submit_btn.is_visible():
-                await submit_btn.click()
+            with metrics.timer("submit"):
+                # Try Enter key first
+                await input_box.press("Enter")
 
+                # Enter normally submits and clears the box; otherwise click the submit button
+                sent = await steps.cleared("reply_sent", input_box, timeout=3)
+                if not sent:
+                    submit_btn = await selectors.registry.locate(page, selectors.FB_COMMENT_SUBMIT, fallbacks=False)
+                    if submit_btn is not None and await submit_btn.first.is_visible():
+                        await submit_btn.first.click()
+                        sent = await steps.cleared("submit_sent", input_box)
+
+            steps.log()
+            if not sent:
+                logger.warning(" [Facebook] Reply not confirmed (comment box still filled).")
+                return False
             logger.info(" [Facebook] Reply sent successfully!")
-            await self._human_delay(2, 3)
             return True
 
         except Exception as e:
             logger.error(f" [Facebook] Error replying to notification: {e}")
             return False
 
-    async def reply(self, post: Dict, comment: str):
+    async def reply(self, post: Post, comment: str) -> bool:
         """
         Replies to a Facebook post.
         """
-        logger.info(f"Replying to {post['id']}...")
+        logger.info(f"Replying to {post.id}...")
         try:
-            article = post.get('element') or post.get('_locator')
+            article = post.locator
             
             # Method 1: Click "Comment" button
             # Expanded selectors for Chinese/English
@@ -281,9 +329,9 @@ class FacebookAdapter(BaseAdapter):
             found_trigger = False
             
             # Priority: Use selectors.REPLY_BUTTON first
-            reply_btn = article.locator(selectors.REPLY_BUTTON).first
-            if await reply_btn.count() > 0 and await reply_btn.is_visible():
-                await reply_btn.click()
+            reply_btn = await selectors.registry.locate(article, selectors.REPLY_BUTTON)
+            if reply_btn is not None and await reply_btn.first.is_visible():
+                await reply_btn.first.click()
                 found_trigger = True
             
             if not found_trigger:
@@ -302,7 +350,7 @@ class FacebookAdapter(BaseAdapter):
                          break
             
             if found_trigger:
-                await asyncio.sleep(1.5) # Wait for animation
+                await clock.sleep(1.5) # Wait for animation
 
             # Method 2: Find the textbox
             # Generic textbox query is often best
@@ -313,25 +361,34 @@ class FacebookAdapter(BaseAdapter):
                 # But risky. Try simple locator.
                 input_box = article.locator('div[aria-label*="留言"], div[aria-label*="Comment"], div[aria-label*="Write"]').first
 
-            if await input_box.is_visible():
-                logger.info("   🎯 Found reply textarea, clicking to focus...")
-                await input_box.click()
-                await asyncio.sleep(0.5)
-                await input_box.fill(comment)
-                await asyncio.sleep(0.8)
-                await input_box.press("Enter")
-                
-                # Check if we need to click a "Send" icon (mobile view or specific UIs)
-                # usually Enter works on Desktop, but sometimes need to click the airplane icon
-                send_icon = article.locator('div[aria-label="Post"], div[aria-label="發佈"], div[aria-label="留言"]').last
-                if await send_icon.is_visible():
-                     logger.info("   🔍 Searching Post button...")
-                     # If the textbox is cleared, it might have sent.
-                     pass 
-
-                logger.info("🚀 Reply posted!")
-            else:
+            if not await input_box.is_visible():
                 logger.error("   ❌ Reply bubble not found even after clicking Comment.")
-                
+                return False
+
+            logger.info("   🎯 Found reply textarea, clicking to focus...")
+            steps = ReplySteps("facebook")
+            await input_box.click()
+            await clock.sleep(0.5)
+            await input_box.fill(comment)
+            await clock.sleep(0.8)
+            with metrics.timer("submit"):
+                await input_box.press("Enter")
+
+                # Enter usually sends on desktop; some UIs need the airplane icon instead
+                sent = await steps.cleared("reply_sent", input_box, timeout=3)
+                if not sent:
+                    send_icon = article.locator('div[aria-label="Post"], div[aria-label="發佈"], div[aria-label="留言"]').last
+                    if await send_icon.is_visible():
+                        logger.info("   🔍 Clicking Post button...")
+                        await send_icon.click()
+                        sent = await steps.cleared("submit_sent", input_box)
+            steps.log()
+            if not sent:
+                logger.warning("   ⚠️ Reply not confirmed (comment box still filled).")
+                return False
+            logger.info("🚀 Reply posted!")
+            return True
+
         except Exception as e:
             logger.error(f"Failed to reply to FB post: {e}")
+            return False
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+from core import metrics
+from core.checkpoint import content_digest
+
+logger = logging.getLogger(__name__)
+
+# In-page MutationObserver. Every matching post container that is rendered (or
+# recycled with new content by a virtualized list) is tagged with a unique
+# data-sb-post attribute and reported to Python in small batches.
+_OBSERVER_SCRIPT = """
+(args) => {
+    const [selector, binding] = args;
+    if (window.__socialBotFeedObserver) return;
+    const install = () => {
+        if (window.__socialBotFeedObserver || !document.body) return;
+        const prefix = Math.random().toString(36).slice(2, 8);
+        let nextId = 0;
+        let pending = new Set();
+        let timer = null;
+
+        const flush = () => {
+            timer = null;
+            const batch = [];
+            for (const el of pending) {
+                if (!el.isConnected) continue;
+                const text = (el.innerText || '').trim();
+                if (text.length < 5) continue;
+                const key = text.slice(0, 200);
+                if (el.__sbKey === key) continue;
+                el.__sbKey = key;
+                const domId = prefix + '-' + (++nextId);
+                el.setAttribute('data-sb-post', domId);
+                batch.push({dom_id: domId, text: text});
+            }
+            pending = new Set();
+            if (batch.length && window[binding]) window[binding](batch);
+        };
+
+        const collect = (node) => {
+            if (!node || node.nodeType !== 1) node = node && node.parentElement;
+            if (!node) return;
+            const owner = node.closest(selector);
+            if (owner) pending.add(owner);
+            if (node.querySelectorAll) node.querySelectorAll(selector).forEach((el) => pending.add(el));
+        };
+
+        const observer = new MutationObserver((mutations) => {
+            for (const m of mutations) {
+                collect(m.target);
+                m.addedNodes.forEach(collect);
+            }
+            if (pending.size && !timer) timer = setTimeout(flush, 250);
+        });
+        observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+        window.__socialBotFeedObserver = observer;
+
+        // Report whatever is already on screen
+        document.querySelectorAll(selector).forEach((el) => pending.add(el));
+        timer = setTimeout(flush, 0);
+    };
+    if (document.body) install();
+    else document.addEventListener('DOMContentLoaded', install, {once: true});
+}
+"""
+
+
+@dataclass
+class RenderedPost:
+    """A post container newly rendered in the page."""
+    dom_id: str
+    text: str
+    key: str = ""  # content digest (FeedObserver.fingerprint), stable across restarts
+
+    @property
+    def selector(self) -> str:
+        return f"[data-sb-post='{self.dom_id}']"
+
+
+class FeedObserver:
+    """
+    Streams newly rendered feed posts from the page into Python.
+
+    The MutationObserver is installed once per page (and re-installed on every
+    new document through an init script), so reloads and navigation keep the
+    stream alive, and each scan processes only new content.
+
+    A reported post stays *pending* until the loop settles it: `done()` moves
+    it into the per-session seen-set (never reported again), `requeue()` hands
+    the same post out again on the next drain (up to `max_attempts`, then it
+    counts as done) and `forget()` drops it so a later re-render is reported
+    again (e.g. the node was recycled before it could be read). Only settled
+    posts are in `seen_keys`, so a checkpoint never hides unprocessed ones.
+    A pending post rendered again (e.g. after page.reload()) is not reported
+    twice; it just follows the new node's dom id.
+    `seen` pre-loads the seen-set from a session checkpoint; `restored_hits`
+    counts posts skipped thanks to that.
+    """
+    BINDING = "__socialBotReportPosts"
+
+    def __init__(self, page, selector: str, max_seen: int = 5000, seen: Iterable[str] = (),
+                 max_attempts: int = 3):
+        self.page = page
+        self.selector = selector
+        self.max_seen = max_seen
+        self.max_attempts = max_attempts
+        self._seen: Dict[str, None] = dict.fromkeys(seen)  # insertion-ordered set
+        self._pending: Dict[str, RenderedPost] = {}  # reported, not settled yet
+        self._attempts: Dict[str, int] = {}
+        self._restored = set(self._seen)
+        self.restored_hits = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._installed = False
+
+    @staticmethod
+    def fingerprint(text: str) -> str:
+        return content_digest(text)
+
+    def _on_posts(self, source, batch: List[Dict]):
+        for entry in batch or []:
+            key = self.fingerprint(entry.get("text", ""))
+            if key in self._seen:
+                if key in self._restored:
+                    self._restored.discard(key)
+                    self.restored_hits += 1
+                    metrics.inc("checkpoint_skipped_posts")
+                continue
+            if key in self._pending:
+                # Same post re-rendered (page.reload() keeps the Page, so rebind() is a no-op)
+                # Later lookups and requeues must use the node that exists now
+                self._pending[key].dom_id = entry["dom_id"]
+                continue
+            post = RenderedPost(dom_id=entry["dom_id"], text=entry["text"], key=key)
+            self._pending[key] = post
+            if len(self._pending) > self.max_seen:  # drained but never settled
+                self.forget(next(iter(self._pending)))
+            self._queue.put_nowait(post)
+
+    def done(self, key: str):
+        """The loop is finished with this post (replied or skipped for good)."""
+        self._pending.pop(key, None)
+        self._attempts.pop(key, None)
+        self._seen.pop(key, None)
+        self._seen[key] = None
+        if len(self._seen) > self.max_seen:
+            self._seen.pop(next(iter(self._seen)))
+
+    def requeue(self, key: str) -> bool:
+        """Offer a pending post again on the next drain; False once it's given up (counted as done)."""
+        post = self._pending.get(key)
+        if post is None:
+            return False
+        self._attempts[key] = self._attempts.get(key, 0) + 1
+        if self._attempts[key] >= self.max_attempts:
+            self.done(key)
+            return False
+        self._queue.put_nowait(post)
+        return True
+
+    def forget(self, key: str):
+        """Drop a pending post; the next time it renders it is reported as new."""
+        self._pending.pop(key, None)
+        self._attempts.pop(key, None)
+
+    async def install(self):
+        if self._installed:
+            return
+        await self.page.expose_binding(self.BINDING, self._on_posts)
+        args = [self.selector, self.BINDING]
+        await self.page.add_init_script(script=f"({_OBSERVER_SCRIPT})({json.dumps(args)})")
+        await self.page.evaluate(_OBSERVER_SCRIPT, args)
+        self._installed = True
+        logger.info(f" [FeedObserver] Installed for selector: {self.selector}")
+
+    def rebind(self, page):
+        """
+        Follow a recycled page: the observer is re-installed on next install(),
+        the seen-set is kept so already handled posts are not reported again.
+        """
+        if page is self.page:
+            return
+        self.page = page
+        self._installed = False
+        # Pending dom ids belong to the old page; those posts are reported again once re-rendered
+        self.drain()
+        self._pending.clear()
+        self._attempts.clear()
+
+    def drain(self) -> List[RenderedPost]:
+        """Return every post reported since the last call."""
+        metrics.set_gauge("feed_queue_depth", self._queue.qsize())
+        metrics.set_gauge("feed_seen_posts", len(self._seen))
+        metrics.set_gauge("feed_pending_posts", len(self._pending))
+        posts = []
+        while not self._queue.empty():
+            posts.append(self._queue.get_nowait())
+        return posts
+
+    async def wait_for_posts(self, timeout: float = 5.0) -> List[RenderedPost]:
+        """Wait up to `timeout` seconds for at least one new post, then drain."""
+        if self._queue.empty():
+            try:
+                first = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return []
+            return [first] + self.drain()
+        return self.drain()
+
+    @property
+    def seen_count(self) -> int:
+        return len(self._seen)
+
+    @property
+    def seen_keys(self) -> List[str]:
+        """Settled posts only (what a checkpoint should skip after a restart)."""
+        return list(self._seen)
@@ -1,11 +1,15 @@
-from .base import BaseAdapter
+from .base import BaseAdapter, Notification, Post, notification_identity
 from config import settings
 from . import selectors
+from .feed_observer import FeedObserver
+from .notification_classifier import classify_notification
+from .notification_watcher import NotificationWatcher
+from .ui_waits import ReplySteps
+from core import clock, metrics
 import logging
-import asyncio
-import random
 import base64
-from typing import List, Dict
+from functools import partial
+from typing import List
 
 logger = logging.getLogger(__name__)
 
@@ -13,10 +17,16 @@ class InstagramAdapter(BaseAdapter):
     def __init__(self, browser_engine):
         self.browser = browser_engine
         self.base_url = "https://www.instagram.com"
+        self.feed_observer = None
+        self.notification_watcher = NotificationWatcher(
+            badge_selector=selectors.IG_ACTIVITY_BADGE,
+            url_patterns=("/api/v1/news/inbox", "/api/v1/notifications/badge"),
+            friendly_name_patterns=("Activity", "Notification", "Badge"),
+            frame_keywords=("activity", "notification"),
+        )
 
     async def _human_delay(self, min_s=1, max_s=3):
-        delay = random.uniform(min_s, max_s)
-        await asyncio.sleep(delay)
+        await clock.human_delay(min_s, max_s)
 
     async def login(self):
         page = self.browser.page
@@ -47,63 +57,82 @@ class InstagramAdapter(BaseAdapter):
                 logger.error("Login timeout.")
                 raise e
 
-    async def get_feed(self) -> List[Dict]:
+    async def _ensure_feed_observer(self):
+        if not self.feed_observer:
+            self.feed_observer = FeedObserver(self.browser.page, selectors.IG_POST_ARTICLE,
+                                              seen=self._take_resumed_feed_seen())
+        self.feed_observer.rebind(self.browser.page)
+        await self.feed_observer.install()
+
+    async def get_feed(self) -> List[Post]:
         page = self.browser.page
         posts_data = []
 
         logger.info("👀 Scanning Instagram feed...")
+        await self._ensure_feed_observer()
         # Scroll
         for _ in range(3):
             await page.mouse.wheel(0, 800)
             await self._human_delay(1, 2)
         
-        # Select articles
-        articles = page.locator(selectors.IG_POST_ARTICLE)
-        count = await articles.count()
-        logger.info(f"Found {count} posts in view.")
+        # Only posts rendered since the last scan
+        rendered = self.feed_observer.drain()
+        logger.info(f"Found {len(rendered)} new posts ({self.feed_observer.seen_count} seen this session).")
         
         # Debug: If 0 posts, try to dump what's on the page
-        if count == 0:
+        if not rendered and await page.locator(selectors.IG_POST_ARTICLE).count() == 0:
             logger.warning("   DEBUG: Checking alternative selectors...")
             for alt_sel in ["article", "div[role='article']", "div[class*='Post']", "div[class*='Feed']"]:
                 alt_count = await page.locator(alt_sel).count()
                 logger.info(f"   - {alt_sel}: {alt_count} matches")
         
-        for i in range(count):
-            article = articles.nth(i)
+        for i, item in enumerate(rendered):
+            article = page.locator(item.selector)
             # IG posts structure is complex. We try to get caption text.
             # Usually inside a span or an h1/div depending on layout?
             # Keeping it simple for MVP: grab all text in article
             try:
-                text_content = await article.inner_text()
-                content = text_content[:200].replace('\n', ' ') 
+                # The virtualized list may have recycled the node already
+                if await article.count() == 0:
+                    self.feed_observer.forget(item.key)
+                    continue
+
+                content = item.text[:200].replace('\n', ' ') 
                 
                 post_id = f"ig_{hash(content)}"
 
-                # Capture Screenshot for Vision Analysis
-                # We use low quality jpeg to save bandwidth/tokens
-                screenshot_bytes = await article.screenshot(type='jpeg', quality=70)
-                image_b64 = base64.b64encode(screenshot_bytes).decode('utf-8')
-                
-                posts_data.append({
-                    "id": post_id,
-                    "content": content,
-                    "image": image_b64,
-                    "author": "unknown",
-                    "element": article,
-                    "_locator": article
-                })
+                # Screenshot for vision analysis is taken lazily (only for posts we reply to)
+                posts_data.append(Post(
+                    id=post_id,
+                    content=content,
+                    platform='instagram',
+                    key=item.key,
+                    locator=article,
+                    image_loaders=[partial(self._screenshot_base64, article)],
+                ))
             except Exception as e:
                 logger.warning(f"Failed to parse post {i}: {e}")
+                self.feed_observer.forget(item.key)
                 
         return posts_data
 
-    async def get_notifications(self) -> List[Dict]:
+    async def _screenshot_base64(self, article):
+        """Lazy Post.image_loaders entry: low quality JPEG of the post to save bandwidth/tokens."""
+        try:
+            with metrics.timer("enrichment"):
+                screenshot_bytes = await article.screenshot(type='jpeg', quality=70)
+            return base64.b64encode(screenshot_bytes).decode('utf-8')
+        except Exception as e:
+            logger.warning(f"Post screenshot failed: {e}")
+            return None
+
+    async def get_notifications(self, cursor=None) -> List[Notification]:
         """
         獲取 Instagram 官方帳號的通知/留言
         """
         page = self.browser.page
         logger.info(" [Instagram] Navigating to Notifications...")
+        self.notification_watcher.attach(page)
 
         try:
             # Click on notifications icon or navigate directly
@@ -123,6 +152,7 @@ class InstagramAdapter(BaseAdapter):
                 await page.wait_for_selector(selectors.IG_NOTIFICATION_ITEM, timeout=10000)
             except:
                 logger.warning(" [Instagram] No notifications found or page structure changed.")
+                await self.notification_watcher.mark_synced()
                 return []
 
             items = await page.locator(selectors.IG_NOTIFICATION_ITEM).all()
@@ -133,56 +163,64 @@ class InstagramAdapter(BaseAdapter):
                     if not await item.is_visible():
                         continue
 
-                    full_text = await item.inner_text()
+                    # Identity fields + full text in a single round-trip
+                    fields = await self._read_notification_fields(
+                        item, selectors.IG_NOTIFICATION_AUTHOR, selectors.IG_NOTIFICATION_POST_LINK
+                    )
+                    full_text = fields['text']
+                    author = (fields['author'] or '').strip('/') or None
+                    notif_id = notification_identity('ig', author, fields['post'], full_text)
+
+                    # High-water mark: everything below this item was handled already
+                    if cursor is not None and notif_id in cursor:
+                        if not cursor.reached(notif_id):
+                            continue  # Older unresolved items still need a retry; read past handled ones
+                        logger.info(f" [Instagram] Reached last seen notification after {i} items.")
+                        break
                     
-                    # Determine notification type
-                    notif_type = "unknown"
-                    if "commented" in full_text.lower() or "留言" in full_text:
-                        notif_type = "comment"
-                    elif "mentioned" in full_text.lower() or "提及" in full_text:
-                        notif_type = "mention"
-                    elif "replied" in full_text.lower() or "回覆" in full_text:
-                        notif_type = "reply"
-                    elif "liked" in full_text.lower() or "喜歡" in full_text:
-                        notif_type = "like"
+                    # One regex pass over the text; passive items never need another DOM read
+                    kind = classify_notification(full_text)
+                    if kind.passive:
+                        metrics.inc("notifications_filtered", type=kind.type)
+                        if cursor is not None:
+                            cursor.add(notif_id)
                         continue  # Skip likes
 
-                    notif_id = f"ig_notif_{i}_{hash(full_text[:50])}"
-
-                    notifications.append({
-                        'id': notif_id,
-                        'type': notif_type,
-                        'content': full_text[:200],
-                        'author': 'unknown',
-                        'post_id': None,
-                        'element': item,
-                        '_locator': item
-                    })
+                    notifications.append(Notification(
+                        id=notif_id,
+                        type=kind.type,
+                        confidence=kind.confidence,
+                        content=full_text[:200],
+                        author=author or 'unknown',
+                        post_id=fields['post'],
+                        locator=item,
+                    ))
 
                 except Exception as e:
                     logger.warning(f" [Instagram] Failed to parse notification {i}: {e}")
                     continue
 
             logger.info(f" [Instagram] Parsed {len(notifications)} actionable notifications.")
+            await self.notification_watcher.mark_synced()
             return notifications
 
         except Exception as e:
             logger.error(f" [Instagram] Error fetching notifications: {e}")
             return []
 
-    async def reply_to_comment(self, notification: Dict, comment: str):
+    async def reply_to_comment(self, notification: Notification, comment: str):
         """
         回覆 Instagram 上的特定留言通知
         """
         page = self.browser.page
-        notif_id = notification.get('id')
+        notif_id = notification.id
         logger.info(f" [Instagram] Replying to notification {notif_id}...")
 
         if settings.dry_run:
             logger.info(f" [Instagram] [DRY_RUN] Would reply with: '{comment}'")
             return True
 
-        item = notification.get('_locator') or notification.get('element')
+        item = notification.locator
         
         if not item:
             logger.error(" [Instagram] No locator found. Cannot reply.")
@@ -195,32 +233,34 @@ class InstagramAdapter(BaseAdapter):
             await self._human_delay(1.5, 2.5)
 
             # Look for reply input
-            textarea = page.locator(selectors.IG_REPLY_TEXTAREA).first
+            textarea = await selectors.registry.locate(page, selectors.IG_REPLY_TEXTAREA)
 
-            if await textarea.count() == 0:
+            if textarea is None:
                 # Try clicking reply button first
-                reply_btn = page.locator(selectors.IG_NOTIFICATION_REPLY_BTN).first
-                if await reply_btn.count() > 0:
-                    await reply_btn.click()
+                reply_btn = await selectors.registry.locate(page, selectors.IG_NOTIFICATION_REPLY_BTN)
+                if reply_btn is not None:
+                    await reply_btn.first.click()
                     await self._human_delay(1, 2)
-                    textarea = page.locator(selectors.IG_REPLY_TEXTAREA).first
+                    textarea = await selectors.registry.locate(page, selectors.IG_REPLY_TEXTAREA)
 
-            if await textarea.count() == 0:
+            if textarea is None:
                 logger.error(" [Instagram] Reply textarea not found.")
                 return False
 
-            await textarea.click()
+            await textarea.first.click()
             await self._human_delay(0.5, 1)
 
             # Type comment
-            await page.keyboard.type(comment, delay=random.randint(50, 150))
+            with metrics.timer("type"):
+                await page.keyboard.type(comment, delay=clock.keystroke_delay_ms())
             await self._human_delay(1, 2)
 
             # Click post button
-            post_btn = page.locator(selectors.IG_REPLY_POST_BTN).last
+            post_btn = await selectors.registry.locate(page, selectors.IG_REPLY_POST_BTN, fallbacks=False)
 
-            if await post_btn.count() > 0 and await post_btn.is_visible():
-                await post_btn.click()
+            if post_btn is not None and await post_btn.last.is_visible():
+                with metrics.timer("submit"):
+                    await post_btn.last.click()
                 logger.info(" [Instagram] Reply sent successfully!")
                 await self._human_delay(2, 3)
                 return True
@@ -232,74 +272,81 @@ class InstagramAdapter(BaseAdapter):
             logger.error(f" [Instagram] Error replying to notification: {e}")
             return False
 
-    async def reply(self, post: Dict, comment: str):
-        logger.info(f"Preparing to reply to {post['id']}...")
+    async def reply(self, post: Post, comment: str) -> bool:
+        logger.info(f"Preparing to reply to {post.id}...")
         if settings.dry_run:
             logger.info(f"[DRY_RUN] Would click Reply on post and type: '{comment}'")
-            return
+            return True
 
-        article = post.get('element') or post.get('_locator')
+        article = post.locator
         page = self.browser.page
-        
-        # 1. Scroll into view
-        await article.scroll_into_view_if_needed()
-        await self._human_delay(1, 2)
-        
-        # 2. Click Reply Bubble (Go to post view often safer, but feed reply exists)
-        # On IG Feed, clicking 'comment' usually focuses the text area or goes to single post page
-        reply_btn = article.locator(selectors.IG_REPLY_BUTTON).first
-        
-        # Check if textarea is already visible (sometimes it is at bottom of card)
-        # For now, assume we click the bubble
-        if await reply_btn.count() > 0:
-            await reply_btn.click()
-            await self._human_delay(1, 2)
-        else:
-             # Fallback: maybe we are already on a post page or it's different?
-             logger.info("   Reply bubble not found, checking for textarea directly...")
-        
-        # 3. Type Comment - 2024-12-13: 改進邏輯，先定位正確的輸入欄位
         try:
+            # 1. Scroll into view
+            await article.scroll_into_view_if_needed()
+            await self._human_delay(1, 2)
+
+            # 2. Click Reply Bubble (Go to post view often safer, but feed reply exists)
+            # On IG Feed, clicking 'comment' usually focuses the text area or goes to single post page
+            reply_btn = await selectors.registry.locate(article, selectors.IG_REPLY_BUTTON)
+
+            # Check if textarea is already visible (sometimes it is at bottom of card)
+            # For now, assume we click the bubble
+            if reply_btn is not None:
+                await reply_btn.first.click()
+                await self._human_delay(1, 2)
+            else:
+                # Fallback: maybe we are already on a post page or it's different?
+                logger.info("   Reply bubble not found, checking for textarea directly...")
+
+            # 3. Type Comment - 2024-12-13: 改進邏輯，先定位正確的輸入欄位
             # 優先在 article 範圍內尋找 textarea
-            textarea = article.locator(selectors.IG_REPLY_TEXTAREA).first
-            
-            if await textarea.count() == 0:
+            textarea = await selectors.registry.locate(article, selectors.IG_REPLY_TEXTAREA)
+
+            if textarea is None:
                 # 備選：全域搜尋但限定為可見元素
-                textarea = page.locator(selectors.IG_REPLY_TEXTAREA).locator("visible=true").first
-            
-            if await textarea.count() > 0:
-                logger.info("   🎯 Found reply textarea, clicking to focus...")
-                await textarea.click()
-                await self._human_delay(0.5, 1)
-                
-                # 輸入評論
-                await page.keyboard.type(comment, delay=random.randint(50, 150))
-                await self._human_delay(1, 2)
-                
-                # 4. Click Post - Enhanced Robustness
-                # Strategy: 
-                # A. Try Article Scoped (Preferred)
-                # B. Try Global Visible (Fallback)
-                
-                logger.info("   🔍 Searching Post button...")
-                post_btn = article.locator(selectors.IG_REPLY_POST_BTN).last
-                
-                if await post_btn.count() == 0:
-                     logger.warning("   ⚠️ Post button not found in particle scope. Trying global visible...")
-                     # Fallback to any visible Post button on page (risky but needed if DOM is weird)
-                     post_btn = page.locator(selectors.IG_REPLY_POST_BTN).locator("visible=true").last
-                
-                if await post_btn.count() > 0 and await post_btn.is_visible():
-                    await post_btn.click()
-                    logger.info("🚀 Reply posted!")
-                else:
-                    logger.warning("   ⚠️ Post button not found anywhere. Reply NOT sent.")
-                    return
+                textarea = await selectors.registry.locate(page, selectors.IG_REPLY_TEXTAREA, visible=True)
 
-            else:
+            if textarea is None:
                 logger.warning("   ⚠️ Reply textarea not found. Skipping.")
-                return
-                
+                return False
+            textarea = textarea.first
+
+            logger.info("   🎯 Found reply textarea, clicking to focus...")
+            await textarea.click()
+            await self._human_delay(0.5, 1)
+
+            # 輸入評論
+            with metrics.timer("type"):
+                await page.keyboard.type(comment, delay=clock.keystroke_delay_ms())
+            await self._human_delay(1, 2)
+
+            # 4. Click Post - Enhanced Robustness
+            # Strategy:
+            # A. Try Article Scoped (Preferred)
+            # B. Try Global Visible (Fallback)
+            logger.info("   🔍 Searching Post button...")
+            post_btn = await selectors.registry.locate(article, selectors.IG_REPLY_POST_BTN)
+
+            if post_btn is None:
+                logger.warning("   ⚠️ Post button not found in particle scope. Trying global visible...")
+                # Fallback to any visible Post button on page (risky but needed if DOM is weird)
+                post_btn = await selectors.registry.locate(page, selectors.IG_REPLY_POST_BTN, visible=True, fallbacks=False)
+
+            if post_btn is None or not await post_btn.last.is_visible():
+                logger.warning("   ⚠️ Post button not found anywhere. Reply NOT sent.")
+                return False
+
+            steps = ReplySteps("instagram")
+            with metrics.timer("submit"):
+                await post_btn.last.click()
+                sent = await steps.cleared("reply_sent", textarea)
+            steps.log()
+            if not sent:
+                logger.warning("   ⚠️ Reply not confirmed (textarea still filled).")
+                return False
+            logger.info("🚀 Reply posted!")
             await self._human_delay(3, 5)
+            return True
         except Exception as e:
             logger.error(f"Failed to reply: {e}")
+            return False
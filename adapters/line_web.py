@@ -18,4 +18,4 @@ class LineAdapter(BaseAdapter):
 
     async def reply(self, post, comment):
         logger.info(f"Line Reply to {post} - Not implemented yet (Placeholder)")
-        pass
+        return False
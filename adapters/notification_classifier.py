@@ -0,0 +1,180 @@
+"""
+Notification type classifier shared by all adapters.
+
+Locale keyword packs are compiled into one regex with a named group per
+phrase, so classifying a notification is a single scan of its text no matter
+how many locales are enabled. Every type keeps its strongest hit; the type
+with the highest weight wins (ties go to the earliest hit, i.e. the verb of
+"A replied to your comment" rather than the quoted comment text). Confidence
+is the winner's share of all evidence, so "A commented: I liked it" comes out
+as a 0.5-confidence comment.
+
+Passive types (likes, reactions, follows, reposts) never need a reply, so
+adapters drop them right after reading the text, before any further DOM reads.
+
+Throughput is not the point: covering five locales, it runs at ~0.35M
+items/s on the benchmark corpus against ~2.4M/s for the old two-locale
+substring chain (python -m benchmarks.classifier_bench); either is noise next
+to a single DOM read per notification.
+"""
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import settings
+
+# Reply-worthy types (what the notification loop answers)
+ACTIONABLE_TYPES = frozenset({"comment", "reply", "mention"})
+# Types filtered inside get_notifications()
+PASSIVE_TYPES = frozenset({"like", "reaction", "follow", "repost"})
+
+STRONG, WEAK, HINT = 1.0, 0.5, 0.25
+_WORD_BOUNDARY = r"\b"
+
+# locale -> type -> phrases; a phrase is a regex fragment starting with a
+# literal character, or (fragment, weight). Matching is case-insensitive.
+# Nouns that also appear as the object of other verbs ("your comment") are WEAK.
+KEYWORD_PACKS: Dict[str, Dict[str, Tuple]] = {
+    "en": {
+        "reply": ("replied", "responded to your comment"),
+        "comment": ("commented", "left a comment"),
+        "mention": ("mentioned you", "mentioned", "tagged you"),
+        "like": ("liked", "likes your", "loved your"),
+        "reaction": ("reacted",),
+        "follow": ("started following", "followed you", "requested to follow"),
+        "repost": ("reposted", "shared your"),
+    },
+    "zh-TW": {
+        "reply": ("回覆",),
+        "comment": (("留言", WEAK), "回應了"),
+        "mention": ("提及", "標註", "標記", "提到你"),
+        "like": ("說讚", "按讚", r"說你的.{0,12}讚", "喜歡"),
+        "reaction": ("心情", ("對你的", HINT)),
+        "follow": ("開始追蹤", "追蹤了你", "要求追蹤"),
+        "repost": ("轉發", "分享了你的"),
+    },
+    "zh-CN": {
+        "reply": ("回复",),
+        "comment": ("评论了", ("评论", WEAK)),
+        "mention": ("提到了你", "@了你"),
+        "like": ("赞了", "点赞", "喜欢"),
+        "reaction": ("表情回应",),
+        "follow": ("关注了你", "开始关注"),
+        "repost": ("转发", "分享了你的"),
+    },
+    "ja": {
+        "reply": ("返信しました", ("返信", WEAK)),
+        "comment": ("コメントしました", ("コメント", WEAK)),
+        "mention": ("メンションしました", "タグ付けしました"),
+        "like": (r"いいね[！!」]*しました", ("いいね", WEAK)),
+        "reaction": ("リアクションしました",),
+        "follow": ("フォローしました", "フォローを開始"),
+        "repost": ("再投稿しました", "シェアしました"),
+    },
+    "ko": {
+        "reply": ("답글을 남겼습니다", ("답글", WEAK)),
+        "comment": ("댓글을 남겼습니다", ("댓글", WEAK)),
+        "mention": ("언급했습니다", "태그했습니다"),
+        "like": ("좋아합니다", "좋아요를 눌렀습니다"),
+        "reaction": ("공감했습니다",),
+        "follow": ("팔로우하기 시작했습니다", "팔로우했습니다"),
+        "repost": ("리포스트했습니다", "공유했습니다"),
+    },
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Classification:
+    type: str
+    confidence: float
+
+    @property
+    def actionable(self) -> bool:
+        return self.type in ACTIONABLE_TYPES
+
+    @property
+    def passive(self) -> bool:
+        return self.type in PASSIVE_TYPES
+
+
+UNKNOWN = Classification("unknown", 0.0)
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalpha()
+
+
+class NotificationClassifier:
+    def __init__(self, locales: Optional[Iterable[str]] = None, packs: Dict[str, Dict[str, Tuple]] = None):
+        packs = packs or KEYWORD_PACKS
+        self.locales = [l for l in (locales or packs) if l in packs]
+        # Group name gN -> (type, weight)
+        self._groups: Dict[str, Tuple[str, float]] = {}
+        by_first: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        seen = set()
+        for locale in self.locales:
+            for kind, entries in packs[locale].items():
+                for entry in entries:
+                    fragment, weight = entry if isinstance(entry, tuple) else (entry, STRONG)
+                    fragment = fragment.lower()
+                    if (fragment, kind) in seen:  # shared by several locales
+                        continue
+                    seen.add((fragment, kind))
+                    name = f"g{len(self._groups)}"
+                    self._groups[name] = (kind, weight)
+                    by_first[fragment[0]].append((fragment, name))
+        # A flat alternation retries every phrase at every position. Dispatching
+        # on the (literal) first character behind a lookahead lets the engine
+        # skip most positions outright (~2 µs instead of ~60 µs per corpus item).
+        branches = []
+        for first, items in by_first.items():
+            items.sort(key=lambda item: len(item[0]), reverse=True)  # "回覆了" before "回覆"
+            tails = "|".join(
+                f"(?P<{name}>{fragment[1:]}{_WORD_BOUNDARY if _is_word_char(fragment[-1]) else ''})"
+                for fragment, name in items
+            )
+            # Latin phrases only match whole words ('liked', not 'disliked')
+            branches.append(f"{_WORD_BOUNDARY if _is_word_char(first) else ''}{re.escape(first)}(?:{tails})")
+        firsts = "".join(re.escape(first) for first in by_first)
+        self.pattern = re.compile(f"(?=[{firsts}])(?:{'|'.join(branches)})" if branches else r"(?!)")
+        # Group index -> (type, weight), and the result when that phrase is the only hit
+        # (most notifications), so the common case skips the scoring below
+        self._hits: List[Optional[Tuple[str, float]]] = [None] * (self.pattern.groups + 1)
+        self._single: List[Optional[Classification]] = [None] * (self.pattern.groups + 1)
+        for name, index in self.pattern.groupindex.items():
+            kind, weight = self._groups[name]
+            self._hits[index] = (kind, weight)
+            self._single[index] = Classification(kind, round(min(1.0, weight / STRONG), 3))
+
+    def classify(self, text: str) -> Classification:
+        matches = list(self.pattern.finditer((text or "").lower()))
+        if len(matches) == 1:
+            return self._single[matches[0].lastindex]
+        best: Dict[str, Tuple[float, int]] = {}  # type -> (weight, -position)
+        for match in matches:
+            kind, weight = self._hits[match.lastindex]
+            score = (weight, -match.start())
+            if kind not in best or score > best[kind]:
+                best[kind] = score
+        if not best:
+            return UNKNOWN
+        kind, (weight, _) = max(best.items(), key=lambda item: item[1])
+        total = sum(w for w, _ in best.values())
+        return Classification(kind, round(weight / total * min(1.0, weight / STRONG), 3))
+
+
+_default: Optional[NotificationClassifier] = None
+
+
+def get_classifier() -> NotificationClassifier:
+    """The shared classifier for settings.notification_locales (compiled on first use)."""
+    global _default
+    if _default is None:
+        locales = [l.strip() for l in settings.notification_locales.split(",") if l.strip()]
+        _default = NotificationClassifier(locales or None)
+    return _default
+
+
+def classify_notification(text: str) -> Classification:
+    return get_classifier().classify(text)
@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import logging
+from typing import Optional, Sequence, Tuple
+
+from core import clock
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationWatcher:
+    """
+    Cheap "did anything change?" detector for notification mode.
+
+    Two signals are combined so that the expensive activity-page fetch only
+    runs when something actually changed:
+    - The page's own traffic: responses whose URL or GraphQL friendly name
+      looks like an activity/badge query (body digest must change), and
+      realtime websocket frames mentioning notifications.
+    - The unread badge on the navigation bar, re-read every few seconds.
+
+    A full sync is still forced after `max_staleness` seconds as a safety net.
+    """
+
+    def __init__(
+        self,
+        badge_selector: str,
+        url_patterns: Sequence[str] = (),
+        friendly_name_patterns: Sequence[str] = (),
+        frame_keywords: Sequence[str] = (),
+        badge_interval: float = 5.0,
+        max_staleness: float = 600.0,
+    ):
+        self.badge_selector = badge_selector
+        self.url_patterns = tuple(url_patterns)
+        self.friendly_name_patterns = tuple(friendly_name_patterns)
+        self.frame_keywords = tuple(frame_keywords)
+        self.badge_interval = badge_interval
+        self.max_staleness = max_staleness
+
+        self.page = None
+        self._changed = asyncio.Event()
+        self._body_digests = {}
+        self._synced_badge: Optional[Tuple[int, str]] = None
+        self._last_sync = 0.0
+        # The very first poll must always fetch
+        self._changed.set()
+
+    def attach(self, page):
+        """Subscribe to the page's network events (idempotent per page)."""
+        if self.page is page:
+            return
+        self.page = page
+        page.on("response", self._on_response)
+        page.on("websocket", self._on_websocket)
+
+    def _matches_request(self, request) -> bool:
+        url = request.url
+        if any(p in url for p in self.url_patterns):
+            return True
+        if self.friendly_name_patterns:
+            friendly = request.headers.get("x-fb-friendly-name", "")
+            return any(p in friendly for p in self.friendly_name_patterns)
+        return False
+
+    def _on_response(self, response):
+        try:
+            if response.status != 200 or not self._matches_request(response.request):
+                return
+        except Exception:
+            return
+        asyncio.ensure_future(self._check_body(response))
+
+    async def _check_body(self, response):
+        try:
+            body = await response.body()
+        except Exception:
+            return
+        key = response.request.headers.get("x-fb-friendly-name") or response.url.split("?")[0]
+        digest = hashlib.sha1(body).hexdigest()
+        previous = self._body_digests.get(key)
+        self._body_digests[key] = digest
+        if previous is not None and previous != digest:
+            logger.info(f" [NotificationWatcher] Activity traffic changed ({key}).")
+            self._changed.set()
+
+    def _on_websocket(self, ws):
+        if not self.frame_keywords:
+            return
+
+        def on_frame(payload):
+            if isinstance(payload, bytes):
+                payload = payload.decode("utf-8", errors="ignore")
+            if any(k in payload for k in self.frame_keywords):
+                self._changed.set()
+
+        ws.on("framereceived", on_frame)
+
+    async def _read_badge(self) -> Tuple[int, str]:
+        if not self.page:
+            return (0, "")
+        try:
+            badge = self.page.locator(self.badge_selector)
+            count = await badge.count()
+            text = (await badge.first.inner_text(timeout=1000)).strip() if count else ""
+            return (count, text)
+        except Exception:
+            return (0, "")
+
+    async def _badge_changed(self) -> bool:
+        state = await self._read_badge()
+        return state[0] > 0 and state != self._synced_badge
+
+    def has_changes(self) -> bool:
+        if self._changed.is_set():
+            return True
+        return clock.monotonic() - self._last_sync >= self.max_staleness
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for new activity.
+        Returns True as soon as a change is detected, False on timeout.
+        """
+        deadline = clock.monotonic() + timeout
+        while True:
+            if self.has_changes() or await self._badge_changed():
+                return True
+            remaining = deadline - clock.monotonic()
+            if remaining <= 0:
+                return False
+            await clock.wait_event(self._changed, min(remaining, self.badge_interval))
+
+    async def mark_synced(self):
+        """Call after a full activity fetch so only later changes wake us up."""
+        self._changed.clear()
+        self._synced_badge = await self._read_badge()
+        self._last_sync = clock.monotonic()
@@ -0,0 +1,142 @@
+import logging
+import time
+from typing import Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SelectorStats:
+    """Hit/timing bookkeeping for one selector alternative."""
+    __slots__ = ("attempts", "hits", "total_seconds", "last_hit")
+
+    def __init__(self):
+        self.attempts = 0
+        self.hits = 0
+        self.total_seconds = 0.0
+        self.last_hit = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.attempts if self.attempts else 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_seconds * 1000 / self.attempts if self.attempts else 0.0
+
+
+class SelectorEntry(str):
+    """
+    A logical selector target (e.g. Threads' reply send button) with ordered
+    alternatives.
+
+    It is a str subclass whose value is the comma-joined union of all
+    alternatives, so existing `page.locator(selectors.X)` call sites keep
+    working unchanged. Hot paths should use `SelectorRegistry.locate()` instead,
+    which evaluates the alternatives one by one, most recently successful first.
+
+    `fallbacks` are over-broad last resorts (e.g. `div:has-text('Post')`).
+    They are always tried after every regular alternative and never promoted,
+    so one lucky hit can't make an expensive catch-all the default.
+    """
+
+    def __new__(cls, platform: str, name: str, alternatives: Sequence[str], fallbacks: Sequence[str] = ()):
+        obj = super().__new__(cls, ", ".join(tuple(alternatives) + tuple(fallbacks)))
+        obj.platform = platform
+        obj.name = name
+        obj.alternatives = tuple(alternatives)
+        obj.fallbacks = tuple(fallbacks)
+        obj.stats = {alt: SelectorStats() for alt in obj.alternatives + obj.fallbacks}
+        obj.cached = None  # alternative that matched most recently
+        return obj
+
+    def ranked(self, fallbacks: bool = True) -> List[str]:
+        """Try-order: cached winner, then recent success, then declared order; fallbacks last."""
+        order = {alt: i for i, alt in enumerate(self.alternatives)}
+
+        def key(alt):
+            s = self.stats[alt]
+            return (alt != self.cached, -s.last_hit, -s.hit_rate, order[alt])
+
+        return sorted(self.alternatives, key=key) + (list(self.fallbacks) if fallbacks else [])
+
+
+class SelectorRegistry:
+    """Registry of SelectorEntry objects, keyed by (platform, name)."""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], SelectorEntry] = {}
+        self.locates = 0
+        self.first_try_hits = 0
+
+    def register(self, platform: str, name: str, alternatives: Sequence[str], fallbacks: Sequence[str] = ()) -> SelectorEntry:
+        entry = SelectorEntry(platform, name, alternatives, fallbacks)
+        self._entries[(platform, name)] = entry
+        return entry
+
+    def get(self, platform: str, name: str) -> SelectorEntry:
+        return self._entries[(platform, name)]
+
+    def entries(self) -> List[SelectorEntry]:
+        return list(self._entries.values())
+
+    async def locate(self, scope, entry: SelectorEntry, visible: bool = False, fallbacks: bool = True):
+        """
+        Return `scope.locator(<first matching alternative>)`, or None.
+        Every attempt is timed and counted so the ranking adapts over time.
+
+        Unlike the union string, `.first` / `.last` on the result pick among
+        the matches of the winning alternative only, not among all of them in
+        DOM order. Page-wide lookups should pass `fallbacks=False`: a
+        catch-all like `div:has-text('Post')` matches unrelated elements once
+        the search is not scoped to the post or dialog.
+        """
+        self.locates += 1
+        for attempt, alt in enumerate(entry.ranked(fallbacks)):
+            locator = scope.locator(alt)
+            if visible:
+                locator = locator.locator("visible=true")
+            stats = entry.stats[alt]
+            start = time.perf_counter()
+            try:
+                count = await locator.count()
+            except Exception:
+                count = 0
+            stats.total_seconds += time.perf_counter() - start
+            stats.attempts += 1
+            if count > 0:
+                stats.hits += 1
+                stats.last_hit = time.monotonic()
+                entry.cached = alt
+                if attempt == 0:
+                    self.first_try_hits += 1
+                return locator
+        entry.cached = None
+        return None
+
+    def hit_rate(self) -> float:
+        """Share of locate() probes that matched on the first alternative tried."""
+        return self.first_try_hits / self.locates if self.locates else 0.0
+
+    def stats(self) -> List[Dict]:
+        rows = []
+        for entry in self._entries.values():
+            for alt, s in entry.stats.items():
+                if not s.attempts:
+                    continue
+                rows.append({
+                    "platform": entry.platform,
+                    "name": entry.name,
+                    "selector": alt,
+                    "attempts": s.attempts,
+                    "hits": s.hits,
+                    "hit_rate": s.hit_rate,
+                    "avg_ms": s.avg_ms,
+                })
+        return rows
+
+    def log_stats(self):
+        for row in sorted(self.stats(), key=lambda r: -r["avg_ms"] * r["attempts"]):
+            logger.info(
+                f"   [Selectors] {row['platform']}.{row['name']} | {row['hit_rate']:.0%} hits "
+                f"of {row['attempts']} | {row['avg_ms']:.1f} ms avg | {row['selector']}"
+            )
@@ -1,53 +1,206 @@
-LOGIN_CHECK = "text='Log in'"
-LOGIN_BTN_LANDING = "a[href='/login']"
-USERNAME_INPUT = "input[name='username']"
-PASSWORD_INPUT = "input[name='password']"
-LOGIN_SUBMIT = "div[role='button']:has-text('Log in'), div[role='button']:has-text('登入')"
+"""
+Selector registry for all platform adapters.
 
+Each constant is a SelectorEntry: a str (the comma-joined union, so plain
+`page.locator(selectors.X)` still works) carrying its ordered alternatives.
+Hot paths go through `registry.locate(scope, selectors.X)`, which tries the
+alternatives one at a time, most recently successful first, and records
+per-selector timing and hit rates. Fallbacks are only meant for lookups scoped
+to a post or dialog; page-wide lookups pass `fallbacks=False`.
+"""
+from .selector_registry import SelectorRegistry
 
-FEED_ROOT = "div[role='main']"
-POST_ARTICLE = "div[data-pressable-container='true'], div[role='article']" 
-POST_ARTICLE = "div[data-pressable-container='true'], div[role='article']" 
-POST_CONTENT_TEXT = "div[data-ad-preview='message'] span[dir='auto'], div[dir='auto'], span[dir='auto']"
+registry = SelectorRegistry()
 
+LOGIN_CHECK = registry.register("threads", "LOGIN_CHECK", ["text='Log in'"])
+LOGIN_BTN_LANDING = registry.register("threads", "LOGIN_BTN_LANDING", ["a[href='/login']"])
+USERNAME_INPUT = registry.register("threads", "USERNAME_INPUT", ["input[name='username']"])
+PASSWORD_INPUT = registry.register("threads", "PASSWORD_INPUT", ["input[name='password']"])
+LOGIN_SUBMIT = registry.register("threads", "LOGIN_SUBMIT", [
+    "div[role='button']:has-text('Log in')",
+    "div[role='button']:has-text('登入')",
+])
 
-REPLY_BUTTON = "div[role='button']:has(svg[aria-label='Reply']), div[role='button']:has(svg[aria-label='回覆']), div[role='button']:has(svg[aria-label='留言']), div[role='button']:text-is('Comment'), div[role='button']:text-is('留言')"
+FEED_ROOT = registry.register("threads", "FEED_ROOT", ["div[role='main']"])
+POST_ARTICLE = registry.register("threads", "POST_ARTICLE", [
+    "div[data-pressable-container='true']",
+    "div[role='article']",
+])
+POST_CONTENT_TEXT = registry.register("threads", "POST_CONTENT_TEXT", [
+    "div[data-ad-preview='message'] span[dir='auto']",
+    "div[dir='auto']",
+    "span[dir='auto']",
+])
 
-REPLY_MODAL = "div[role='dialog']"
-NEW_THREAD_MODAL_TITLE = "div[role='dialog'] h1:has-text('新串文'), div[role='dialog'] h1:has-text('New thread'), div[role='dialog'] span:has-text('新串文')"
-REPLY_MODAL_INDICATOR = "div[role='dialog'] div[role='textbox'][aria-placeholder*='Reply'], div[role='dialog'] div[role='textbox'][aria-placeholder*='回覆']"
+REPLY_BUTTON = registry.register("threads", "REPLY_BUTTON", [
+    "div[role='button']:has(svg[aria-label='Reply'])",
+    "div[role='button']:has(svg[aria-label='回覆'])",
+    "div[role='button']:has(svg[aria-label='留言'])",
+    "div[role='button']:text-is('Comment')",
+    "div[role='button']:text-is('留言')",
+])
 
-REPLY_INPUT = "div[role='textbox'][aria-placeholder*='Reply'], div[role='textbox'][aria-placeholder*='回覆'], div[role='textbox'][aria-placeholder*='留言']"
-REPLY_SEND_BTN = "div[role='button'][aria-label='Post'], div[role='button'][aria-label='Send'], div[role='button'][aria-label='發佈'], div[role='button'][aria-label='發布'], div[role='button'][aria-label='發送'], div[role='button']:has(svg)"
+REPLY_MODAL = registry.register("threads", "REPLY_MODAL", ["div[role='dialog']"])
+NEW_THREAD_MODAL_TITLE = registry.register("threads", "NEW_THREAD_MODAL_TITLE", [
+    "div[role='dialog'] h1:has-text('新串文')",
+    "div[role='dialog'] h1:has-text('New thread')",
+    "div[role='dialog'] span:has-text('新串文')",
+])
+REPLY_MODAL_INDICATOR = registry.register("threads", "REPLY_MODAL_INDICATOR", [
+    "div[role='dialog'] div[role='textbox'][aria-placeholder*='Reply']",
+    "div[role='dialog'] div[role='textbox'][aria-placeholder*='回覆']",
+])
 
+REPLY_INPUT = registry.register("threads", "REPLY_INPUT", [
+    "div[role='textbox'][aria-placeholder*='Reply']",
+    "div[role='textbox'][aria-placeholder*='回覆']",
+    "div[role='textbox'][aria-placeholder*='留言']",
+])
+REPLY_SEND_BTN = registry.register("threads", "REPLY_SEND_BTN", [
+    "div[role='button'][aria-label='Post']",
+    "div[role='button'][aria-label='Send']",
+    "div[role='button'][aria-label='發佈']",
+    "div[role='button'][aria-label='發布']",
+    "div[role='button'][aria-label='發送']",
+], fallbacks=[
+    "div[role='button']:has(svg)",
+])
 
-CLOSE_MODAL_BTN = "div[role='dialog'] div[role='button']:has(svg[aria-label='Close']), div[role='dialog'] div[role='button']:has(svg[aria-label='關閉'])"
-DISCARD_MENU_BTN = "div[role='button']:has-text('Discard'), div[role='button']:has-text('捨棄')" # 有時候關閉會問是否捨棄
+CLOSE_MODAL_BTN = registry.register("threads", "CLOSE_MODAL_BTN", [
+    "div[role='dialog'] div[role='button']:has(svg[aria-label='Close'])",
+    "div[role='dialog'] div[role='button']:has(svg[aria-label='關閉'])",
+])
+# 有時候關閉會問是否捨棄
+DISCARD_MENU_BTN = registry.register("threads", "DISCARD_MENU_BTN", [
+    "div[role='button']:has-text('Discard')",
+    "div[role='button']:has-text('捨棄')",
+])
 
 # --- Instagram Selectors ---
-IG_NAV_HOME = "svg[aria-label='Home'], svg[aria-label='首頁']"
-IG_POST_ARTICLE = "article, div[role='article']" 
-IG_REPLY_BUTTON = "svg[aria-label*='Comment'], svg[aria-label*='留言'], svg[aria-label*='Reply'], button svg[aria-label*='Comment']"
-IG_REPLY_TEXTAREA = "textarea, div[contenteditable='true'][role='textbox']"
-# Broadened Post button selector to catch links/spans/divs without role='button'
-IG_REPLY_POST_BTN = "div[role='button']:has-text('Post'), div[role='button']:has-text('發佈'), div[role='button']:has-text('發布'), button:has-text('Post'), button:has-text('發佈'), button:has-text('發布'), div:has-text('Post'), div:has-text('發佈'), div:has-text('發布'), span:has-text('Post'), span:has-text('發佈'), span:has-text('發布')"
+IG_NAV_HOME = registry.register("instagram", "IG_NAV_HOME", [
+    "svg[aria-label='Home']",
+    "svg[aria-label='首頁']",
+])
+IG_POST_ARTICLE = registry.register("instagram", "IG_POST_ARTICLE", [
+    "article",
+    "div[role='article']",
+])
+IG_REPLY_BUTTON = registry.register("instagram", "IG_REPLY_BUTTON", [
+    "svg[aria-label*='Comment']",
+    "svg[aria-label*='留言']",
+    "svg[aria-label*='Reply']",
+    "button svg[aria-label*='Comment']",
+])
+IG_REPLY_TEXTAREA = registry.register("instagram", "IG_REPLY_TEXTAREA", [
+    "textarea",
+    "div[contenteditable='true'][role='textbox']",
+])
+# Broadened Post button selector to catch links/spans/divs without role='button' (as fallbacks)
+IG_REPLY_POST_BTN = registry.register("instagram", "IG_REPLY_POST_BTN", [
+    "div[role='button']:has-text('Post')",
+    "div[role='button']:has-text('發佈')",
+    "div[role='button']:has-text('發布')",
+    "button:has-text('Post')",
+    "button:has-text('發佈')",
+    "button:has-text('發布')",
+], fallbacks=[
+    "div:has-text('Post')",
+    "div:has-text('發佈')",
+    "div:has-text('發布')",
+    "span:has-text('Post')",
+    "span:has-text('發佈')",
+    "span:has-text('發布')",
+])
 
 # --- Threads Notification Selectors ---
-THREADS_ACTIVITY_NAV = "a[href='/activity'], svg[aria-label='Activity'], svg[aria-label='動態']"
-THREADS_NOTIFICATION_ITEM = "div[role='listitem'], div[data-pressable-container='true']"
-THREADS_NOTIFICATION_CONTENT = "span[dir='auto'], div[dir='auto']"
-THREADS_NOTIFICATION_REPLY_BTN = "div[role='button']:has-text('Reply'), div[role='button']:has-text('回覆')"
+THREADS_ACTIVITY_NAV = registry.register("threads", "THREADS_ACTIVITY_NAV", [
+    "a[href='/activity']",
+    "svg[aria-label='Activity']",
+    "svg[aria-label='動態']",
+])
+THREADS_NOTIFICATION_ITEM = registry.register("threads", "THREADS_NOTIFICATION_ITEM", [
+    "div[role='listitem']",
+    "div[data-pressable-container='true']",
+])
+THREADS_NOTIFICATION_CONTENT = registry.register("threads", "THREADS_NOTIFICATION_CONTENT", [
+    "span[dir='auto']",
+    "div[dir='auto']",
+])
+THREADS_NOTIFICATION_REPLY_BTN = registry.register("threads", "THREADS_NOTIFICATION_REPLY_BTN", [
+    "div[role='button']:has-text('Reply')",
+    "div[role='button']:has-text('回覆')",
+])
+THREADS_NOTIFICATION_AUTHOR = registry.register("threads", "THREADS_NOTIFICATION_AUTHOR", ["a[href^='/@']"])
+THREADS_NOTIFICATION_POST_LINK = registry.register("threads", "THREADS_NOTIFICATION_POST_LINK", ["a[href*='/post/']"])
+THREADS_ACTIVITY_BADGE = registry.register("threads", "THREADS_ACTIVITY_BADGE", [
+    "a[href='/activity'] div[aria-label*='unread']",
+    "a[href='/activity'] div[aria-label*='未讀']",
+    "a[href='/activity'] span[aria-label*='notification']",
+])
 
 # --- Instagram Notification Selectors ---
-IG_ACTIVITY_NAV = "svg[aria-label='Notifications'], svg[aria-label='通知'], a[href='/notifications/']"
-IG_NOTIFICATION_ITEM = "div[role='listitem'], article"
-IG_NOTIFICATION_CONTENT = "span, div[dir='auto']"
-IG_NOTIFICATION_REPLY_BTN = "button:has-text('Reply'), div[role='button']:has-text('Reply'), div[role='button']:has-text('回覆')"
+IG_ACTIVITY_NAV = registry.register("instagram", "IG_ACTIVITY_NAV", [
+    "svg[aria-label='Notifications']",
+    "svg[aria-label='通知']",
+    "a[href='/notifications/']",
+])
+IG_NOTIFICATION_ITEM = registry.register("instagram", "IG_NOTIFICATION_ITEM", [
+    "div[role='listitem']",
+    "article",
+])
+IG_NOTIFICATION_CONTENT = registry.register("instagram", "IG_NOTIFICATION_CONTENT", [
+    "span",
+    "div[dir='auto']",
+])
+IG_NOTIFICATION_REPLY_BTN = registry.register("instagram", "IG_NOTIFICATION_REPLY_BTN", [
+    "button:has-text('Reply')",
+    "div[role='button']:has-text('Reply')",
+    "div[role='button']:has-text('回覆')",
+])
+IG_NOTIFICATION_AUTHOR = registry.register("instagram", "IG_NOTIFICATION_AUTHOR", ["a[role='link'][href^='/']"])
+IG_NOTIFICATION_POST_LINK = registry.register("instagram", "IG_NOTIFICATION_POST_LINK", [
+    "a[href*='/p/']",
+    "a[href*='/reel/']",
+])
+IG_ACTIVITY_BADGE = registry.register("instagram", "IG_ACTIVITY_BADGE", [
+    "a[href='/notifications/'] div[aria-label*='unread']",
+    "a[href='/notifications/'] div[aria-label*='未讀']",
+    "a[href*='/notifications'] span[aria-label*='notification']",
+])
 
 # --- Facebook Notification Selectors ---
-FB_NOTIFICATION_NAV = "a[href*='/notifications'], div[aria-label='Notifications'], div[aria-label='通知']"
-FB_NOTIFICATION_ITEM = "div[role='article'], div[data-visualcompletion='ignore-dynamic']"
-FB_NOTIFICATION_CONTENT = "span[dir='auto'], div[dir='auto']"
-FB_COMMENT_INPUT = "div[role='textbox'][contenteditable='true'], div[contenteditable='true'][aria-label*='comment'], div[contenteditable='true'][aria-label*='留言']"
-FB_COMMENT_SUBMIT = "div[role='button'][aria-label='Submit'], div[role='button'][aria-label='Post'], div[role='button'][aria-label='發布'], form div[role='button']"
-
+FB_NOTIFICATION_NAV = registry.register("facebook", "FB_NOTIFICATION_NAV", [
+    "a[href*='/notifications']",
+    "div[aria-label='Notifications']",
+    "div[aria-label='通知']",
+])
+FB_NOTIFICATION_ITEM = registry.register("facebook", "FB_NOTIFICATION_ITEM", [
+    "div[role='article']",
+    "div[data-visualcompletion='ignore-dynamic']",
+])
+FB_NOTIFICATION_CONTENT = registry.register("facebook", "FB_NOTIFICATION_CONTENT", [
+    "span[dir='auto']",
+    "div[dir='auto']",
+])
+FB_NOTIFICATION_AUTHOR = registry.register("facebook", "FB_NOTIFICATION_AUTHOR", ["strong"])
+FB_NOTIFICATION_POST_LINK = registry.register("facebook", "FB_NOTIFICATION_POST_LINK", [
+    "a[href*='comment_id']",
+    "a[href*='/posts/']",
+])
+FB_NOTIFICATION_BADGE = registry.register("facebook", "FB_NOTIFICATION_BADGE", [
+    "a[href*='/notifications'] span[data-visualcompletion='ignore']",
+    "div[aria-label*='Notifications'] span[data-visualcompletion='ignore']",
+    "div[aria-label*='通知'] span[data-visualcompletion='ignore']",
+])
+FB_COMMENT_INPUT = registry.register("facebook", "FB_COMMENT_INPUT", [
+    "div[role='textbox'][contenteditable='true']",
+    "div[contenteditable='true'][aria-label*='comment']",
+    "div[contenteditable='true'][aria-label*='留言']",
+])
+FB_COMMENT_SUBMIT = registry.register("facebook", "FB_COMMENT_SUBMIT", [
+    "div[role='button'][aria-label='Submit']",
+    "div[role='button'][aria-label='Post']",
+    "div[role='button'][aria-label='發布']",
+], fallbacks=[
+    "form div[role='button']",
+])
@@ -1,10 +1,14 @@
 import logging
-import asyncio
-import random
-from typing import List, Dict
+from functools import partial
+from typing import List
+from core import clock, metrics
 from core.browser import BrowserEngine
-from adapters.base import BaseAdapter
+from adapters.base import BaseAdapter, Notification, Post, notification_identity
 from adapters import selectors
+from adapters.feed_observer import FeedObserver
+from adapters.notification_classifier import classify_notification
+from adapters.notification_watcher import NotificationWatcher
+from adapters.ui_waits import ReplySteps
 
 logger = logging.getLogger(__name__)
 
@@ -15,13 +19,20 @@ class ThreadsAdapter(BaseAdapter):
     def __init__(self, browser: BrowserEngine):
         self.browser = browser
         self.page = None 
+        self.feed_observer = None
+        self.notification_watcher = NotificationWatcher(
+            badge_selector=selectors.THREADS_ACTIVITY_BADGE,
+            url_patterns=("/api/v1/news/inbox", "/api/v1/notifications/badge"),
+            friendly_name_patterns=("Activity", "Notification", "Badge"),
+            frame_keywords=("activity", "notification"),
+        )
 
     async def _ensure_page(self):
         if not self.page:
             self.page = self.browser.page
 
     async def _human_delay(self, min_s=1.0, max_s=3.0):
-        await asyncio.sleep(random.uniform(min_s, max_s))
+        await clock.human_delay(min_s, max_s)
 
     async def login(self):
         await self._ensure_page()
@@ -37,13 +48,18 @@ class ThreadsAdapter(BaseAdapter):
                 logger.warning(" ⏳  Waiting 45 seconds for manual login...")
                 for i in range(45):
                     if i % 5 == 0: logger.info(f"    ... waiting ({45-i}s left)")
-                    await asyncio.sleep(1)
+                    await clock.sleep(1)
             else:
                 logger.info(" [Threads] Login check passed.")
 
         except Exception as e:
             logger.error(f" [Threads] Login navigation error: {e}")
 
+    async def _load_image(self, img_locator):
+        """Lazy Post.image_loaders entry: only runs for posts the loop actually replies to."""
+        with metrics.timer("enrichment"):
+            return await self._get_image_base64(img_locator)
+
     async def _get_image_base64(self, img_locator):
         try:
             src = await img_locator.get_attribute("src")
@@ -66,64 +82,78 @@ class ThreadsAdapter(BaseAdapter):
         except Exception:
             return None
 
-    async def get_feed(self) -> List[Dict]:
+    async def _ensure_feed_observer(self):
+        if not self.feed_observer:
+            self.feed_observer = FeedObserver(self.page, selectors.POST_ARTICLE, seen=self._take_resumed_feed_seen())
+        self.feed_observer.rebind(self.page)
+        await self.feed_observer.install()
+
+    async def get_feed(self) -> List[Post]:
         """
-        抓取貼文並保存元素定位器 (_locator)
+        只處理新渲染的貼文 (MutationObserver 串流)，並保存元素定位器 (Post.locator)
         """
         await self._ensure_page()
         logger.info(" [Threads] Scanning feed...")
 
         try:
-            await self.page.evaluate(f"window.scrollBy(0, {random.randint(300, 600)})")
+            await self._ensure_feed_observer()
+            await self.page.evaluate(f"window.scrollBy(0, {clock.randint(300, 600)})")
             await self._human_delay(2.0, 3.0)
 
             posts_data = []
-            # 獲取所有貼文容器的定位器
-            articles_locators = await self.page.locator(selectors.POST_ARTICLE).all()
-            
-            for article in articles_locators[:3]: 
-                try:
-                    if not await article.is_visible(): continue
-
-                    # Check for Reply Button to confirm it's a post and not a header
-                    if await article.locator(selectors.REPLY_BUTTON).count() == 0:
-                        continue
-
-                    raw_text = await article.inner_text()
-                    if not raw_text or len(raw_text) < 5: continue
+            # 只取得上次掃描之後新出現的貼文
+            rendered = self.feed_observer.drain()
 
-                    lines = [l.strip() for l in raw_text.split('\n') if l.strip()]
-                    content_body = " ".join(lines)
-                    post_id = str(hash(content_body))
+            for item in rendered:
+                try:
+                    with metrics.timer("extract"):
+                        article = self.page.locator(item.selector)
+                        # The virtualized list may have recycled the node already
+                        if await article.count() == 0:
+                            self.feed_observer.forget(item.key)
+                            continue
+
+                        # Check for Reply Button to confirm it's a post and not a header
+                        if await selectors.registry.locate(article, selectors.REPLY_BUTTON) is None:
+                            self.feed_observer.done(item.key)
+                            continue
+
+                        lines = [l.strip() for l in item.text.split('\n') if l.strip()]
+                        content_body = " ".join(lines)
+                        post_id = str(hash(content_body))
                     
-                    image_data = None
-                    images = article.locator('img')
-                    if await images.count() > 1:
-                        target_img = images.nth(1)
-                        if (await target_img.bounding_box())['width'] > 100:
-                            image_data = await self._get_image_base64(target_img)
+                        image_loaders = []
+                        images = article.locator('img')
+                        if await images.count() > 1:
+                            target_img = images.nth(1)
+                            if (await target_img.bounding_box())['width'] > 100:
+                                image_loaders.append(partial(self._load_image, target_img))
                     
-                    posts_data.append({
-                        'id': post_id,
-                        'content': content_body,
-                        'image': image_data,
-                        '_locator': article 
-                    })
+                        posts_data.append(Post(
+                            id=post_id,
+                            content=content_body,
+                            platform='threads',
+                            key=item.key,
+                            locator=article,
+                            image_loaders=image_loaders,
+                        ))
                 except Exception:
+                    self.feed_observer.forget(item.key)
                     continue
 
-            logger.info(f" [Threads] Found {len(posts_data)} posts.")
+            logger.info(f" [Threads] Found {len(posts_data)} new posts ({self.feed_observer.seen_count} seen this session).")
             return posts_data
 
         except Exception as e:
             logger.error(f" [Threads] Error scanning feed: {e}")
             return []
 
-    async def get_notifications(self) -> List[Dict]:
+    async def get_notifications(self, cursor=None) -> List[Notification]:
         """
         獲取官方帳號的通知/留言
         """
         await self._ensure_page()
+        self.notification_watcher.attach(self.page)
         logger.info(" [Threads] Navigating to Activity page...")
 
         try:
@@ -144,58 +174,65 @@ class ThreadsAdapter(BaseAdapter):
                     if not await item.is_visible():
                         continue
 
+                    # Identity fields + full text in a single round-trip
+                    fields = await self._read_notification_fields(
+                        item, selectors.THREADS_NOTIFICATION_AUTHOR, selectors.THREADS_NOTIFICATION_POST_LINK
+                    )
+                    full_text = fields['text']
+                    author = (fields['author'] or '').lstrip('/@') or None
+                    notif_id = notification_identity('threads', author, fields['post'], full_text)
+
+                    # High-water mark: everything below this item was handled already
+                    if cursor is not None and notif_id in cursor:
+                        if not cursor.reached(notif_id):
+                            continue  # Older unresolved items still need a retry; read past handled ones
+                        logger.info(f" [Threads] Reached last seen notification after {i} items.")
+                        break
+                    
+                    # One regex pass over the text; passive items never need another DOM read
+                    kind = classify_notification(full_text)
+                    if kind.passive:
+                        metrics.inc("notifications_filtered", type=kind.type)
+                        if cursor is not None:
+                            cursor.add(notif_id)
+                        continue  # Skip likes etc., we only care about actionable items
+
                     # Extract notification content
                     content_el = item.locator(selectors.THREADS_NOTIFICATION_CONTENT).first
                     content = ""
                     if await content_el.count() > 0:
                         content = await content_el.inner_text()
 
-                    # Get all text for context
-                    full_text = await item.inner_text()
-                    
-                    # Determine notification type based on content
-                    notif_type = "unknown"
-                    if "replied" in full_text.lower() or "回覆" in full_text:
-                        notif_type = "reply"
-                    elif "commented" in full_text.lower() or "留言" in full_text:
-                        notif_type = "comment"
-                    elif "mentioned" in full_text.lower() or "提及" in full_text:
-                        notif_type = "mention"
-                    elif "liked" in full_text.lower() or "喜歡" in full_text:
-                        notif_type = "like"
-                        continue  # Skip likes, we only care about actionable items
-
-                    notif_id = f"threads_notif_{i}_{hash(content[:50] if content else full_text[:50])}"
-
-                    notifications.append({
-                        'id': notif_id,
-                        'type': notif_type,
-                        'content': content[:200] if content else full_text[:200],
-                        'author': 'unknown',
-                        'post_id': None,
-                        'element': item,
-                        '_locator': item
-                    })
+                    notifications.append(Notification(
+                        id=notif_id,
+                        type=kind.type,
+                        confidence=kind.confidence,
+                        content=content[:200] if content else full_text[:200],
+                        author=author or 'unknown',
+                        post_id=fields['post'],
+                        locator=item,
+                    ))
 
                 except Exception as e:
                     logger.warning(f" [Threads] Failed to parse notification {i}: {e}")
                     continue
 
             logger.info(f" [Threads] Parsed {len(notifications)} actionable notifications.")
+            await self.notification_watcher.mark_synced()
             return notifications
 
         except Exception as e:
             logger.error(f" [Threads] Error fetching notifications: {e}")
             return []
 
-    async def reply_to_comment(self, notification: Dict, comment: str):
+    async def reply_to_comment(self, notification: Notification, comment: str):
         """
         回覆特定通知/留言
         """
-        notif_id = notification.get('id')
+        notif_id = notification.id
         logger.info(f" [Threads] Replying to notification {notif_id}...")
 
-        item = notification.get('_locator') or notification.get('element')
+        item = notification.locator
         
         if not item:
             logger.error(" [Threads] No locator found in notification. Cannot reply.")
@@ -208,44 +245,56 @@ class ThreadsAdapter(BaseAdapter):
 
             # Click on the notification to open the context
             await item.click()
-            await self._human_delay(1.5, 2.5)
+            steps = ReplySteps("threads")
+
+            # Either a Reply button or the textbox itself shows up
+            opened = self.page.locator(f"{selectors.THREADS_NOTIFICATION_REPLY_BTN}, {selectors.REPLY_INPUT}")
+            if not await steps.visible("context_open", opened.locator("visible=true").first):
+                logger.error(" [Threads] Notification context did not open.")
+                return False
 
             # Look for reply button or input
-            reply_btn = self.page.locator(selectors.THREADS_NOTIFICATION_REPLY_BTN).first
+            reply_btn = await selectors.registry.locate(self.page, selectors.THREADS_NOTIFICATION_REPLY_BTN)
             
-            if await reply_btn.count() > 0:
-                await reply_btn.click()
-                await self._human_delay(1, 2)
+            if reply_btn is not None:
+                await reply_btn.first.click()
+                await steps.visible("modal_open", self.page.locator(selectors.REPLY_INPUT).locator("visible=true").first)
 
             # Find the textbox
-            textbox = self.page.locator(selectors.REPLY_INPUT).first
+            textbox = await selectors.registry.locate(self.page, selectors.REPLY_INPUT)
 
-            if await textbox.count() == 0:
+            if textbox is None:
                 logger.error(" [Threads] Reply textbox not found.")
                 return False
+            textbox = textbox.first
 
             await textbox.click()
-            await self._human_delay(0.5, 1)
+            await steps.focused("textbox_focused", textbox)
 
             # Type the comment
-            await textbox.press_sequentially(comment, delay=random.randint(50, 150))
-            await self._human_delay(1.5, 2)
+            with metrics.timer("type"):
+                await textbox.press_sequentially(comment, delay=clock.keystroke_delay_ms())
 
             # Click send/post button
-            send_btn = self.page.locator(selectors.REPLY_SEND_BTN).last
+            send_btn = await selectors.registry.locate(self.page, selectors.REPLY_SEND_BTN, fallbacks=False)
 
-            if await send_btn.count() == 0:
+            if send_btn is None:
                 logger.error(" [Threads] Send button not found.")
                 return False
+            send_btn = send_btn.last
 
-            if await send_btn.is_disabled():
+            if not await steps.enabled("send_enabled", send_btn):
                 logger.error(" [Threads] Send button is disabled.")
                 return False
 
-            await send_btn.click()
+            with metrics.timer("submit"):
+                await send_btn.click()
+                sent = await steps.cleared("reply_sent", textbox)
+            steps.log()
+            if not sent:
+                logger.warning(" [Threads] Reply not confirmed (textbox still filled).")
+                return False
             logger.info(" [Threads] Reply sent successfully!")
-
-            await self._human_delay(2, 3)
             return True
 
         except Exception as e:
@@ -269,35 +318,38 @@ class ThreadsAdapter(BaseAdapter):
             logger.info(" [Threads] Detected Inline Reply context.")
             return post_locator, "INLINE"
 
-    async def reply(self, post: Dict, comment: str):
+    async def reply(self, post: Post, comment: str) -> bool:
         """
         使用保存的 Locator 直接回覆，不再重新搜尋
         """
-        post_id = post.get('id')
+        post_id = post.id
         logger.info(f" [Threads] Replying to post ID {post_id}...")
 
-        post_locator = post.get('_locator')
+        post_locator = post.locator
         
         if not post_locator:
             logger.error(" [Threads] No locator found in post object. Cannot reply.")
-            return
+            return False
 
         try:
             await post_locator.scroll_into_view_if_needed()
             # 3. 在該貼文容器內尋找回覆按鈕
             # 使用 selectors.py 中的通用定位器
-            reply_btn = post_locator.locator(selectors.REPLY_BUTTON)
-            
-
+            reply_btn = await selectors.registry.locate(post_locator, selectors.REPLY_BUTTON)
             
-            if await reply_btn.count() == 0:
+            if reply_btn is None:
                 logger.error(" [Threads] Reply button not found in this post.")
-                return
+                return False
 
-            await reply_btn.click()
+            await reply_btn.first.click()
             logger.info(" [Threads] Clicked reply button.")
-            
-            await self._human_delay(1.5, 2.5)
+            steps = ReplySteps("threads")
+
+            # Wait for the composer (modal or inline) - or the wrong "New Thread" modal
+            opened = self.page.locator(f"{selectors.REPLY_INPUT}, {selectors.NEW_THREAD_MODAL_TITLE}")
+            if not await steps.visible("modal_open", opened.locator("visible=true").first):
+                logger.error(" [Threads] Reply composer did not open.")
+                return False
             
             # --- Safety Net: Check if "New Thread" modal opened incorrectly ---
             # 這是為了防止機器人誤點擊到 "發布串文" 的標頭，或者因 Context 誤判而開啟了新串文視窗
@@ -312,9 +364,8 @@ class ThreadsAdapter(BaseAdapter):
                     logger.info(" [Threads] Closed 'New Thread' modal.")
                     
                     # 處理可能的 "Discard" 確認選單
-                    await self._human_delay(0.5, 1.0)
                     discard_btn = self.page.locator(selectors.DISCARD_MENU_BTN).last
-                    if await discard_btn.count() > 0 and await discard_btn.is_visible():
+                    if await steps.visible("discard_menu", discard_btn, timeout=2):
                         await discard_btn.click()
                         logger.info(" [Threads] Confirmed discard.")
                 
@@ -325,40 +376,47 @@ class ThreadsAdapter(BaseAdapter):
             target_container, context_type = await self._get_reply_context(post_locator)
 
             # 在鎖定的容器內尋找輸入框
-            textbox = target_container.locator(selectors.REPLY_INPUT).first
+            textbox = await selectors.registry.locate(target_container, selectors.REPLY_INPUT)
             
-            if await textbox.count() == 0:
+            if textbox is None:
                  logger.error(f" [Threads] Textbox not found in {context_type} context.")
-                 return
-            
-            if await textbox.count() == 0:
-                 logger.error(" [Threads] Textbox not found after clicking reply.")
-                 return
+                 return False
+            textbox = textbox.first
 
             await textbox.click()
+            await steps.focused("textbox_focused", textbox)
             logger.info(f" [Threads] Typing comment ({len(comment)} chars)...")
             
-            await textbox.press_sequentially(comment, delay=random.randint(50, 150))
-            await self._human_delay(1.5, 2.0)
+            with metrics.timer("type"):
+                await textbox.press_sequentially(comment, delay=clock.keystroke_delay_ms())
 
             # 5. 點擊發送
             # 5. 點擊發送
             # 無論是 Modal 還是 Inline，我們都嘗試在 Target Container 內尋找按鈕
             # 這是因為我們現在有了更廣泛的選擇器 (REPLY_SEND_BTN 包含 SVG)，因此 Scoped 是安全的
-            post_btn = target_container.locator(selectors.REPLY_SEND_BTN).last
+            post_btn = await selectors.registry.locate(target_container, selectors.REPLY_SEND_BTN)
             
-            if await post_btn.count() == 0:
+            if post_btn is None:
                  logger.error(" [Threads] Post/Reply button not found. (Count is 0)")
-                 return
+                 return False
+            post_btn = post_btn.last
             
-            if await post_btn.is_disabled():
+            if not await steps.enabled("send_enabled", post_btn):
                  logger.error(" [Threads] Post button is disabled. Text input might have failed.")
-                 return
+                 return False
 
-            await post_btn.click()
-            logger.info(" [Threads] Clicked Post button!")
+            with metrics.timer("submit"):
+                await post_btn.click()
+                logger.info(" [Threads] Clicked Post button!")
             
-            await self._human_delay(3.0, 4.0)
+                if context_type == "MODAL":
+                    sent = await steps.hidden("modal_closed", target_container)
+                else:
+                    sent = await steps.cleared("reply_sent", textbox)
+            steps.log()
+            if not sent:
+                logger.warning(" [Threads] Reply not confirmed (composer still open).")
+                return False
             logger.info(" [Threads] Reply sequence completed.")
             return True
 
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from typing import Dict
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError, expect
+
+from config import settings
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Poll period for conditions Playwright can't wait on natively
+_POLL_SECONDS = 0.1
+
+
+class StepStats:
+    """Aggregated timing for one reply step across the session."""
+    __slots__ = ("count", "timeouts", "total_seconds", "max_seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.timeouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    @property
+    def avg_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+
+# (platform, step) -> StepStats
+step_stats: Dict[tuple, StepStats] = {}
+
+
+def _default_timeout(step: str) -> float:
+    if step.endswith("focused"):
+        return settings.reply_focus_timeout_seconds
+    if step.endswith("enabled"):
+        return settings.reply_send_enabled_timeout_seconds
+    if step.endswith("closed") or step.endswith("sent"):
+        return settings.reply_close_timeout_seconds
+    return settings.reply_open_timeout_seconds
+
+
+class ReplySteps:
+    """
+    The functional waits of one reply cycle ("modal open", "textbox focused",
+    "send enabled", "modal closed"), each awaited as a state condition with its
+    own timeout instead of a fixed sleep followed by a count() probe.
+
+    Every wait returns True/False (never raises on timeout) and its duration is
+    recorded per cycle and in the session-wide `step_stats`. Human pacing
+    between replies is not handled here.
+    """
+
+    def __init__(self, platform: str):
+        self.platform = platform
+        self.durations: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    async def _run(self, step: str, condition, timeout: float = None) -> bool:
+        timeout = _default_timeout(step) if timeout is None else timeout
+        start = time.perf_counter()
+        try:
+            await condition(timeout)
+            ok = True
+        except (PlaywrightTimeoutError, AssertionError, asyncio.TimeoutError):
+            ok = False
+        elapsed = time.perf_counter() - start
+
+        self.durations[step] = elapsed
+        metrics.observe("reply_step", elapsed, platform=self.platform, step=step)
+        stats = step_stats.setdefault((self.platform, step), StepStats())
+        stats.count += 1
+        stats.total_seconds += elapsed
+        stats.max_seconds = max(stats.max_seconds, elapsed)
+        if not ok:
+            stats.timeouts += 1
+            logger.warning(f" [{self.platform}] Step '{step}' not reached within {timeout:.1f}s.")
+        return ok
+
+    async def visible(self, step: str, locator, timeout: float = None) -> bool:
+        return await self._run(step, lambda t: locator.wait_for(state="visible", timeout=t * 1000), timeout)
+
+    async def hidden(self, step: str, locator, timeout: float = None) -> bool:
+        return await self._run(step, lambda t: locator.wait_for(state="hidden", timeout=t * 1000), timeout)
+
+    async def focused(self, step: str, locator, timeout: float = None) -> bool:
+        return await self._run(step, lambda t: expect(locator).to_be_focused(timeout=t * 1000), timeout)
+
+    async def enabled(self, step: str, locator, timeout: float = None) -> bool:
+        return await self._run(step, lambda t: expect(locator).to_be_enabled(timeout=t * 1000), timeout)
+
+    async def cleared(self, step: str, locator, timeout: float = None) -> bool:
+        """Textbox is empty, hidden or detached - i.e. the platform accepted the text."""
+        async def condition(t):
+            deadline = time.perf_counter() + t
+            while True:
+                try:
+                    if await locator.count() == 0 or not await locator.is_visible():
+                        return
+                    value = await locator.evaluate("el => el.value !== undefined ? el.value : el.innerText")
+                    if not (value or "").strip():
+                        return
+                except Exception:
+                    return  # detached mid-check
+                if time.perf_counter() >= deadline:
+                    raise asyncio.TimeoutError()
+                await asyncio.sleep(_POLL_SECONDS)
+
+        return await self._run(step, condition, timeout)
+
+    def log(self):
+        total = time.perf_counter() - self._started
+        steps = " | ".join(f"{name} {seconds:.2f}s" for name, seconds in self.durations.items())
+        logger.info(f" [{self.platform}] Reply steps ({total:.2f}s total): {steps}")
+
+
+def log_step_stats():
+    for (platform, step), s in sorted(step_stats.items()):
+        logger.info(
+            f"   [ReplySteps] {platform}.{step} | {s.count} waits | {s.avg_seconds:.2f}s avg | "
+            f"{s.max_seconds:.2f}s max | {s.timeouts} timeouts"
+        )
@@ -18,4 +18,4 @@ class WhatsAppAdapter(BaseAdapter):
 
     async def reply(self, post, comment):
         logger.info(f"WhatsApp Reply to {post} - Not implemented yet (Placeholder)")
-        pass
+        return False
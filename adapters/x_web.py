@@ -7,10 +7,12 @@ class XAdapter(BaseAdapter):
     def __init__(self, browser):
         self.browser = browser
 
-from .base import BaseAdapter
+from .base import BaseAdapter, Post
 import logging
-import asyncio
 from playwright.async_api import TimeoutError
+from typing import List
+from core import clock, metrics
+from .ui_waits import ReplySteps
 
 logger = logging.getLogger(__name__)
 
@@ -48,11 +50,11 @@ class XAdapter(BaseAdapter):
             
             if i % 5 == 0:
                 logger.info("   ... still waiting for login ...")
-            await asyncio.sleep(check_interval)
+            await clock.sleep(check_interval)
             
         logger.warning("⚠️ Login timeout. Continuing (may fail)...")
 
-    async def get_feed(self):
+    async def get_feed(self) -> List[Post]:
         """
         Scrapes tweets from the home timeline.
         """
@@ -83,12 +85,12 @@ class XAdapter(BaseAdapter):
                         post_id = f"x_{i}_{abs(hash(clean_content[:20]))}"
                         
                         if len(clean_content) > 10:
-                            posts.append({
-                                'id': post_id,
-                                'content': clean_content,
-                                'platform': 'x',
-                                'element': article
-                            })
+                            posts.append(Post(
+                                id=post_id,
+                                content=clean_content,
+                                platform='x',
+                                locator=article,
+                            ))
                 except Exception as e:
                     logger.warning(f"Failed to parse tweet {i}: {e}")
                     
@@ -100,44 +102,50 @@ class XAdapter(BaseAdapter):
         logger.info(f"Found {len(posts)} tweets.")
         return posts
 
-    async def reply(self, post, comment):
+    async def reply(self, post: Post, comment: str) -> bool:
         """
         Replies to a tweet.
         """
-        logger.info(f"Replying to {post['id']}...")
+        logger.info(f"Replying to {post.id}...")
         try:
-            article = post['element']
+            article = post.locator
             
             # 1. Click Reply Button
             reply_btn = article.locator('[data-testid="reply"]')
-            if await reply_btn.count() > 0:
-                await reply_btn.first.click()
-                await asyncio.sleep(1.0)
-                
-                # 2. Editor should appear in a modal
-                # Look for the editor text area
-                editor = self.browser.page.locator('[data-testid="tweetTextarea_0"]')
-                
-                if await editor.is_visible():
-                    await editor.click()
-                    await editor.fill(comment)
-                    await asyncio.sleep(0.5)
-                    
-                    # 3. Click Send
-                    send_btn = self.browser.page.locator('[data-testid="tweetButton"]')
-                    if await send_btn.is_visible():
-                        await send_btn.click()
-                        logger.info("✅ Reply sent!")
-                        
-                        # Wait for modal to close
-                        await asyncio.sleep(1.5)
-                    else:
-                        logger.error("Send button not found.")
-                else:
-                    logger.error("Reply text area not found.")
-            else:
+            if await reply_btn.count() == 0:
                 logger.error("Reply button not found on tweet.")
-                
+                return False
+            await reply_btn.first.click()
+            steps = ReplySteps("x")
+
+            # 2. Editor should appear in a modal
+            # Look for the editor text area
+            editor = self.browser.page.locator('[data-testid="tweetTextarea_0"]').first
+            if not await steps.visible("modal_open", editor):
+                logger.error("Reply text area not found.")
+                return False
+            await editor.click()
+            await steps.focused("textbox_focused", editor)
+            with metrics.timer("type"):
+                await editor.fill(comment)
+
+            # 3. Click Send
+            send_btn = self.browser.page.locator('[data-testid="tweetButton"]').first
+            if not await steps.enabled("send_enabled", send_btn):
+                logger.error("Send button not found.")
+                return False
+            with metrics.timer("submit"):
+                await send_btn.click()
+                # The modal closes once the reply is accepted
+                sent = await steps.hidden("modal_closed", editor)
+            steps.log()
+            if not sent:
+                logger.warning("Reply not confirmed (editor still open).")
+                return False
+            logger.info("✅ Reply sent!")
+            return True
+
         except Exception as e:
             logger.error(f"Failed to reply to tweet: {e}")
+            return False
 
@@ -0,0 +1,120 @@
+"""
+Offline benchmark for the shared notification classifier.
+
+Runs the labelled corpus in benchmarks/fixtures/notification_corpus.jsonl
+through adapters.notification_classifier and reports per-locale accuracy, the
+misclassified lines, how many items are filtered before any further DOM read,
+and classification throughput, side by side with the per-adapter keyword
+chains it replaced.
+
+Usage (from the project root):
+    python -m benchmarks.classifier_bench
+    python -m benchmarks.classifier_bench --locales en,zh-TW --repeat 2000 --strict
+"""
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from adapters.notification_classifier import NotificationClassifier
+
+CORPUS_FILE = Path(__file__).parent / "fixtures" / "notification_corpus.jsonl"
+
+# Below this overall accuracy --strict fails
+MIN_ACCURACY = 0.95
+
+
+def legacy_classify(text: str) -> str:
+    """The Threads adapter's if/elif chain before the shared classifier (baseline)."""
+    if "replied" in text.lower() or "回覆" in text:
+        return "reply"
+    elif "commented" in text.lower() or "留言" in text:
+        return "comment"
+    elif "mentioned" in text.lower() or "提及" in text:
+        return "mention"
+    elif "liked" in text.lower() or "喜歡" in text:
+        return "like"
+    return "unknown"
+
+
+def load_corpus(path: Path = CORPUS_FILE) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def throughput(classify, texts: list, repeat: int) -> float:
+    """Classifications per second over `repeat` passes of the corpus."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            classify(text)
+    return repeat * len(texts) / (time.perf_counter() - start)
+
+
+def run(locales: list = None, repeat: int = 1000) -> dict:
+    corpus = load_corpus()
+    if locales:
+        corpus = [row for row in corpus if row["locale"] in locales]
+    classifier = NotificationClassifier(locales)
+    texts = [row["text"] for row in corpus]
+
+    per_locale = defaultdict(lambda: {"total": 0, "correct": 0, "legacy_correct": 0})
+    misses, filtered = [], 0
+    for row in corpus:
+        result = classifier.classify(row["text"])
+        stats = per_locale[row["locale"]]
+        stats["total"] += 1
+        stats["correct"] += result.type == row["type"]
+        stats["legacy_correct"] += legacy_classify(row["text"]) == row["type"]
+        filtered += result.passive
+        if result.type != row["type"]:
+            misses.append({**row, "got": result.type, "confidence": result.confidence})
+
+    total = len(corpus)
+    return {
+        "benchmark": "notification_classifier",
+        "items": total,
+        "locales": classifier.locales,
+        "accuracy": sum(s["correct"] for s in per_locale.values()) / max(total, 1),
+        "legacy_accuracy": sum(s["legacy_correct"] for s in per_locale.values()) / max(total, 1),
+        "filtered_before_dom_read": filtered,
+        "per_locale": dict(per_locale),
+        "misses": misses,
+        "per_second": throughput(classifier.classify, texts, repeat),
+        "legacy_per_second": throughput(legacy_classify, texts, repeat),
+    }
+
+
+def print_report(s: dict):
+    print(f"\n🏷️  Notification classifier over {s['items']} labelled items ({', '.join(s['locales'])})")
+    print(f"   Accuracy:   {s['accuracy']:.1%} (legacy chain {s['legacy_accuracy']:.1%})")
+    for locale, stats in sorted(s["per_locale"].items()):
+        print(f"     {locale:<6} {stats['correct']:>3}/{stats['total']:<3} (legacy {stats['legacy_correct']}/{stats['total']})")
+    print(f"   Filtered:   {s['filtered_before_dom_read']} passive items dropped before any further DOM read")
+    print(f"   Throughput: {s['per_second']:,.0f}/s (legacy chain {s['legacy_per_second']:,.0f}/s)")
+    for miss in s["misses"]:
+        print(f"   MISS [{miss['locale']}] expected {miss['type']}, got {miss['got']} ({miss['confidence']:.2f}): {miss['text'][:60]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the notification classifier on the labelled corpus.")
+    parser.add_argument("--locales", help="Comma-separated locale packs (default: all)")
+    parser.add_argument("--repeat", type=int, default=1000, help="Corpus passes for the throughput measurement")
+    parser.add_argument("--json", help="Also write the summary to this JSON file")
+    parser.add_argument("--strict", action="store_true", help=f"Exit non-zero below {MIN_ACCURACY:.0%} accuracy")
+    args = parser.parse_args()
+
+    locales = [l.strip() for l in args.locales.split(",") if l.strip()] if args.locales else None
+    summary = run(locales, args.repeat)
+    print_report(summary)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.strict and summary["accuracy"] < MIN_ACCURACY:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+"""
+Local fake-platform server imitating the Threads / Instagram / X markup our
+adapters target (feeds, activity lists, reply buttons, modals, textboxes).
+
+Posts are generated deterministically from a seed, so thousands of them cost
+nothing until they're requested. Feeds lazy-load further pages on scroll and
+can optionally recycle old nodes like a virtualized list. Replies are accepted
+into an in-memory sink that benchmarks can inspect through /_replies.
+
+Every platform lives under its own path prefix (/threads/, /instagram/, /x/);
+benchmarks route the real hostnames onto those prefixes (see route_to_fake).
+
+Usage (from the project root):
+    python -m benchmarks.fake_platform --port 8765 --posts 5000 --image-ratio 0.3
+"""
+import argparse
+import html
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import parse_qs, urlsplit
+
+# Real hostname -> fake server path prefix
+PLATFORM_HOSTS = {
+    "www.threads.net": "threads",
+    "threads.net": "threads",
+    "www.instagram.com": "instagram",
+    "instagram.com": "instagram",
+    "www.x.com": "x",
+    "x.com": "x",
+}
+
+TEXT_POOLS = {
+    "en": [
+        "Just tried the new coffee place downtown and honestly it was worth the wait",
+        "Does anyone else think Mondays should start at noon",
+        "Finished my first half marathon today, legs are gone",
+        "Hot take: pineapple on pizza is fine",
+        "New blog post about keeping houseplants alive in winter",
+    ],
+    "zh-TW": [
+        "今天終於去吃了那間排隊很久的拉麵，真的好好吃",
+        "週末要不要一起去爬山？天氣看起來很不錯",
+        "剛看完一部超好看的電影，推薦給大家",
+        "辦公室的冷氣也太冷了吧，大家都穿外套上班",
+        "新買的咖啡豆味道很特別，有點水果香",
+    ],
+    "zh-CN": [
+        "今天终于去吃了那家排队很久的拉面，真的很好吃",
+        "周末要不要一起去爬山？天气看起来很不错",
+        "刚看完一部超好看的电影，推荐给大家",
+        "办公室的空调也太冷了吧，大家都穿外套上班",
+    ],
+    "ja": [
+        "今日は新しいカフェに行ってきました。とても雰囲気が良かったです",
+        "週末は家でゆっくり映画を見る予定です",
+        "桜がそろそろ咲きそうですね",
+    ],
+    "es": [
+        "Hoy probé la nueva cafetería del centro y valió la pena",
+        "Alguien más piensa que los lunes deberían empezar al mediodía",
+        "Terminé mi primera media maratón, no siento las piernas",
+    ],
+    "ko": [
+        "오늘 새로 생긴 카페에 다녀왔어요 분위기가 정말 좋았어요",
+        "주말에는 집에서 영화를 볼 예정이에요",
+    ],
+}
+
+NOTIFICATION_KINDS = {
+    "reply": ("{a} replied to your thread", "{a} 回覆了你的串文"),
+    "comment": ("{a} commented: {t}", "{a} 在你的貼文留言：{t}"),
+    "mention": ("{a} mentioned you in a thread", "{a} 在串文中提及你"),
+    "like": ("{a} liked your thread", "{a} 說你的串文讚"),
+}
+
+
+@dataclass
+class FakePlatformConfig:
+    posts: int = 2000                 # total posts available per platform feed
+    page_size: int = 10               # posts per lazy-loaded page
+    lazy_delay_ms: int = 300          # artificial latency of lazy-loaded pages
+    recycle_after: int = 0            # >0: keep at most this many posts in the DOM
+    image_ratio: float = 0.4          # fraction of posts carrying an image
+    languages: List[str] = field(default_factory=lambda: ["en", "zh-TW"])
+    notifications_per_minute: float = 2.0
+    initial_notifications: int = 15
+    reply_delay_ms: int = 200         # time the "Post" request takes
+    seed: int = 42
+
+
+class FakePlatformState:
+    """Deterministic content + the in-memory reply sink."""
+
+    def __init__(self, config: FakePlatformConfig):
+        self.config = config
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.replies = []
+        self.posts_served = 0
+        self.requests = 0
+        self.activity_seen_count = {}
+
+    def post(self, i: int) -> dict:
+        rng = random.Random(self.config.seed * 1_000_003 + i)
+        lang = rng.choice(self.config.languages)
+        text = rng.choice(TEXT_POOLS.get(lang, TEXT_POOLS["en"]))
+        return {
+            "id": f"p{i}",
+            "index": i,
+            "author": f"user_{rng.randint(1, 5000)}",
+            "lang": lang,
+            "text": f"{text} #{i}",
+            "image": rng.random() < self.config.image_ratio,
+        }
+
+    def notification_count(self) -> int:
+        minutes = (time.monotonic() - self.started) / 60
+        return self.config.initial_notifications + int(minutes * self.config.notifications_per_minute)
+
+    def notification(self, i: int) -> dict:
+        rng = random.Random(self.config.seed * 7_000_003 + i)
+        kind = rng.choice(list(NOTIFICATION_KINDS))
+        author = f"fan_{rng.randint(1, 5000)}"
+        text = rng.choice(TEXT_POOLS["en"])
+        en, zh = NOTIFICATION_KINDS[kind]
+        template = zh if rng.random() < 0.3 else en
+        return {"id": f"n{i}", "kind": kind, "author": author, "post": f"p{rng.randint(0, 50)}",
+                "text": template.format(a=author, t=text)}
+
+    def add_reply(self, payload: dict):
+        with self.lock:
+            self.replies.append({**payload, "received_at": time.time()})
+
+    def stats(self) -> dict:
+        return {
+            "uptime_seconds": time.monotonic() - self.started,
+            "posts_served": self.posts_served,
+            "requests": self.requests,
+            "replies": len(self.replies),
+            "notifications": self.notification_count(),
+        }
+
+
+# --- Markup ---------------------------------------------------------------
+
+def _e(text) -> str:
+    return html.escape(str(text), quote=True)
+
+
+def _image(platform: str, post: dict, width: int, height: int) -> str:
+    if not post["image"]:
+        return ""
+    return f'<div><img src="/{platform}/img/{post["index"]}.svg" width="{width}" height="{height}" alt="post image"></div>'
+
+
+def _avatar(platform: str, post: dict) -> str:
+    return f'<img src="/{platform}/img/avatar.svg" width="36" height="36" alt="avatar">'
+
+
+def render_post(platform: str, post: dict) -> str:
+    pid, author, text = _e(post["id"]), _e(post["author"]), _e(post["text"])
+    if platform == "threads":
+        return f"""
+<div data-pressable-container="true" data-post-id="{pid}" lang="{_e(post['lang'])}">
+  <div><a href="/@{author}" role="link">{_avatar(platform, post)}</a>
+       <a href="/@{author}" role="link"><span dir="auto">{author}</span></a>
+       <div role="button"><svg aria-label="More"></svg></div></div>
+  <div dir="auto"><span dir="auto">{text}</span></div>
+  {_image(platform, post, 480, 320)}
+  <div>
+    <div role="button"><svg aria-label="Like"></svg></div>
+    <div role="button" data-open-reply="{pid}"><svg aria-label="Reply"></svg></div>
+    <div role="button"><svg aria-label="Repost"></svg></div>
+  </div>
+</div>"""
+    if platform == "instagram":
+        return f"""
+<article data-post-id="{pid}" lang="{_e(post['lang'])}">
+  <header><a href="/{author}/" role="link">{_avatar(platform, post)}</a><span>{author}</span></header>
+  {_image(platform, post, 468, 468)}
+  <section>
+    <div role="button"><svg aria-label="Like"></svg></div>
+    <div role="button" data-focus-comment="{pid}"><svg aria-label="Comment"></svg></div>
+  </section>
+  <div><span>{author}</span> <span>{text}</span></div>
+  <form data-inline-reply="{pid}" onsubmit="return false">
+    <textarea aria-label="Add a comment…" placeholder="Add a comment…"></textarea>
+    <div role="button" data-submit-reply="{pid}">Post</div>
+  </form>
+</article>"""
+    if platform == "x":
+        return f"""
+<article role="article" data-testid="tweet" data-post-id="{pid}" lang="{_e(post['lang'])}">
+  <div><a href="/{author}" role="link"><span>@{author}</span></a></div>
+  <div data-testid="tweetText" lang="{_e(post['lang'])}">{text}</div>
+  {_image(platform, post, 500, 280)}
+  <div role="group">
+    <div role="button" data-testid="reply" data-open-reply="{pid}"></div>
+    <div role="button" data-testid="retweet"></div>
+    <div role="button" data-testid="like"></div>
+  </div>
+</article>"""
+    raise ValueError(platform)
+
+
+def render_nav(platform: str, unread: int) -> str:
+    if platform == "threads":
+        badge = f'<div aria-label="{unread} unread notifications">{unread}</div>' if unread else ""
+        return f"""<nav><a href="/" role="link"><svg aria-label="Home"></svg></a>
+<a href="/activity" role="link"><svg aria-label="Activity"></svg>{badge}</a></nav>"""
+    if platform == "instagram":
+        badge = f'<div aria-label="{unread} unread notifications"></div>' if unread else ""
+        return f"""<nav><a href="/" role="link"><svg aria-label="Home"></svg></a>
+<a href="/notifications/" role="link"><svg aria-label="Notifications"></svg>{badge}</a></nav>"""
+    return """<nav><a href="/home" data-testid="AppTabBar_Home_Link" aria-label="Home">Home</a>
+<a href="/notifications" data-testid="AppTabBar_Notifications_Link">Notifications</a></nav>"""
+
+
+def render_notification(platform: str, n: dict) -> str:
+    nid, author, text, post = _e(n["id"]), _e(n["author"]), _e(n["text"]), _e(n["post"])
+    if platform == "threads":
+        return f"""
+<div role="listitem" data-open-reply="{nid}">
+  <a href="/@{author}" role="link"><img src="/threads/img/avatar.svg" width="36" height="36" alt=""></a>
+  <span dir="auto">{text}</span>
+  <a href="/@sample_brand/post/{post}" role="link"><span dir="auto">{post}</span></a>
+</div>"""
+    if platform == "instagram":
+        return f"""
+<div role="listitem" data-open-reply="{nid}">
+  <a href="/{author}/" role="link"><img src="/instagram/img/avatar.svg" width="44" height="44" alt=""></a>
+  <span>{text}</span>
+  <a href="/p/{post}/" role="link"><img src="/instagram/img/avatar.svg" width="44" height="44" alt=""></a>
+</div>"""
+    return f"""<article role="article" data-testid="notification"><span>{text}</span></article>"""
+
+
+# Generic page behaviour: lazy loading, optional recycling, reply modal and sink.
+_PAGE_SCRIPT = """
+const CFG = __CFG__;
+const root = document.getElementById('feed');
+// Served directly (/threads/...) or routed from the real hostname (/...)
+const BASE = location.pathname.startsWith(`/${CFG.platform}/`) ? `/${CFG.platform}` : '';
+let offset = CFG.initial, loading = false;
+
+async function loadMore() {
+  if (!root || loading || offset >= CFG.total) return;
+  loading = true;
+  await new Promise((r) => setTimeout(r, CFG.lazyDelay));
+  const resp = await fetch(`${BASE}/api/feed?offset=${offset}&limit=${CFG.pageSize}`);
+  root.insertAdjacentHTML('beforeend', await resp.text());
+  offset += CFG.pageSize;
+  if (CFG.recycleAfter > 0) {
+    while (root.children.length > CFG.recycleAfter) root.removeChild(root.firstElementChild);
+  }
+  loading = false;
+}
+window.addEventListener('scroll', () => {
+  if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 1500) loadMore();
+}, {passive: true});
+window.addEventListener('wheel', () => setTimeout(() => {
+  if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 1500) loadMore();
+}, 50), {passive: true});
+
+async function sendReply(target, text) {
+  await fetch(`${BASE}/api/reply`, {method: 'POST', headers: {'Content-Type': 'application/json'},
+                             body: JSON.stringify({target: target, text: text, platform: CFG.platform})});
+}
+
+function closeModal() {
+  const dlg = document.querySelector('div[role="dialog"]');
+  if (dlg) dlg.remove();
+}
+
+function openModal(target) {
+  closeModal();
+  document.body.insertAdjacentHTML('beforeend', CFG.modal.replaceAll('__TARGET__', target));
+  const dlg = document.querySelector('div[role="dialog"]');
+  const box = dlg.querySelector('[role="textbox"], textarea');
+  const btn = dlg.querySelector('[data-submit-reply]');
+  const sync = () => btn.setAttribute('aria-disabled', (box.value || box.innerText || '').trim() ? 'false' : 'true');
+  box.addEventListener('input', sync);
+  sync();
+}
+
+document.addEventListener('click', async (ev) => {
+  const opener = ev.target.closest('[data-open-reply]');
+  if (opener) { openModal(opener.getAttribute('data-open-reply')); return; }
+  const focus = ev.target.closest('[data-focus-comment]');
+  if (focus) { focus.closest('article').querySelector('textarea').focus(); return; }
+  const submit = ev.target.closest('[data-submit-reply]');
+  if (submit) {
+    const scope = submit.closest('div[role="dialog"], form');
+    const box = scope.querySelector('[role="textbox"], textarea');
+    const text = (box.value || box.innerText || '').trim();
+    if (!text) return;
+    await sendReply(submit.getAttribute('data-submit-reply'), text);
+    await new Promise((r) => setTimeout(r, CFG.replyDelay));
+    if (box.value !== undefined) box.value = ''; else box.innerText = '';
+    if (scope.matches('div[role="dialog"]')) closeModal();
+  }
+});
+"""
+
+_MODALS = {
+    "threads": """<div role="dialog" aria-modal="true">
+  <div><div role="button"><svg aria-label="Close"></svg></div><h1>Reply</h1></div>
+  <div role="button">Reply</div>
+  <div role="textbox" contenteditable="true" aria-placeholder="Reply to thread..."></div>
+  <div><div role="button"><svg aria-label="Attach media"></svg></div>
+       <div role="button" aria-label="Post" data-submit-reply="__TARGET__">Post</div></div>
+</div>""",
+    "instagram": """<div role="dialog" aria-modal="true">
+  <form onsubmit="return false">
+    <button type="button">Reply</button>
+    <textarea aria-label="Add a comment…"></textarea>
+    <div role="button" data-submit-reply="__TARGET__">Post</div>
+  </form>
+</div>""",
+    "x": """<div role="dialog" aria-modal="true">
+  <div data-testid="tweetTextarea_0" role="textbox" contenteditable="true"></div>
+  <div role="button" data-testid="tweetButton" data-submit-reply="__TARGET__">Reply</div>
+</div>""",
+}
+
+
+def render_page(state: FakePlatformState, platform: str, body: str, unread: int, with_feed: bool) -> str:
+    cfg = state.config
+    script_cfg = {
+        "platform": platform,
+        "initial": cfg.page_size if with_feed else 0,
+        "total": cfg.posts if with_feed else 0,
+        "pageSize": cfg.page_size,
+        "lazyDelay": cfg.lazy_delay_ms,
+        "recycleAfter": cfg.recycle_after,
+        "replyDelay": cfg.reply_delay_ms,
+        "modal": _MODALS[platform],
+    }
+    script = _PAGE_SCRIPT.replace("__CFG__", json.dumps(script_cfg))
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{platform} (fake)</title></head>
+<body>
+{render_nav(platform, unread)}
+<div role="main">{body}</div>
+<script>{script}</script>
+</body></html>"""
+
+
+def render_svg(index: int, width: int = 480, height: int = 320) -> str:
+    hue = (index * 47) % 360
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}">'
+            f'<rect width="100%" height="100%" fill="hsl({hue},60%,60%)"/>'
+            f'<text x="20" y="40" font-size="28">#{index}</text></svg>')
+
+
+# --- HTTP -----------------------------------------------------------------
+
+class FakePlatformHandler(BaseHTTPRequestHandler):
+    state: FakePlatformState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body: str, content_type: str = "text/html; charset=utf-8", status: int = 200):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _feed_fragment(self, platform: str, offset: int, limit: int) -> str:
+        state = self.state
+        end = min(state.config.posts, offset + limit)
+        with state.lock:
+            state.posts_served += max(0, end - offset)
+        return "".join(render_post(platform, state.post(i)) for i in range(offset, end))
+
+    def _activity(self, platform: str) -> str:
+        state = self.state
+        count = state.notification_count()
+        with state.lock:
+            state.activity_seen_count[platform] = count
+        items = "".join(render_notification(platform, state.notification(i)) for i in range(count - 1, -1, -1))
+        return render_page(state, platform, f'<div role="list">{items}</div>', 0, with_feed=False)
+
+    def _unread(self, platform: str) -> int:
+        return max(0, self.state.notification_count() - self.state.activity_seen_count.get(platform, 0))
+
+    def do_GET(self):
+        self.state.requests += 1
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        parts = url.path.strip("/").split("/", 1)
+        platform, rest = parts[0], (parts[1] if len(parts) > 1 else "")
+
+        if platform == "_stats":
+            return self._send(json.dumps(self.state.stats()), "application/json")
+        if platform == "_replies":
+            return self._send(json.dumps(self.state.replies), "application/json")
+        if platform not in _MODALS:
+            return self._send("not found", "text/plain", 404)
+
+        if rest.startswith("img/"):
+            match = re.match(r"img/(\d+)\.svg", rest)
+            svg = render_svg(int(match.group(1))) if match else render_svg(0, 36, 36)
+            return self._send(svg, "image/svg+xml")
+        if rest == "api/feed":
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", [str(self.state.config.page_size)])[0])
+            return self._send(self._feed_fragment(platform, offset, limit))
+        if rest.rstrip("/") in ("activity", "notifications"):
+            return self._send(self._activity(platform))
+        if rest in ("", "home") or rest.startswith("?"):
+            feed = self._feed_fragment(platform, 0, self.state.config.page_size)
+            body = f'<div id="feed">{feed}</div>'
+            return self._send(render_page(self.state, platform, body, self._unread(platform), with_feed=True))
+        return self._send("not found", "text/plain", 404)
+
+    def do_POST(self):
+        self.state.requests += 1
+        parts = urlsplit(self.path).path.strip("/").split("/", 1)
+        if len(parts) == 2 and parts[1] == "api/reply":
+            length = int(self.headers.get("Content-Length", "0"))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            self.state.add_reply(payload)
+            return self._send(json.dumps({"ok": True}), "application/json")
+        return self._send("not found", "text/plain", 404)
+
+
+class FakePlatformServer:
+    def __init__(self, config: FakePlatformConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.state = FakePlatformState(config or FakePlatformConfig())
+        handler = type("BoundFakePlatformHandler", (FakePlatformHandler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakePlatformServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+async def route_to_fake(context, base_url: str):
+    """
+    Route the real platform hostnames of a Playwright context onto the fake
+    server. Every other request is aborted, so nothing leaves the machine.
+    """
+    async def abort(route):
+        await route.abort()
+
+    async def forward(route):
+        url = urlsplit(route.request.url)
+        prefix = PLATFORM_HOSTS[url.hostname]
+        target = f"{base_url}/{prefix}{url.path}" + (f"?{url.query}" if url.query else "")
+        response = await route.fetch(url=target)
+        await route.fulfill(response=response)
+
+    # Later routes take precedence over earlier ones
+    await context.route("**/*", abort)
+    host_pattern = "|".join(re.escape(h) for h in PLATFORM_HOSTS)
+    await context.route(re.compile(rf"^https?://({host_pattern})/.*"), forward)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake Threads/Instagram/X pages for scale testing.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--lazy-delay-ms", type=int, default=300)
+    parser.add_argument("--recycle-after", type=int, default=0)
+    parser.add_argument("--image-ratio", type=float, default=0.4)
+    parser.add_argument("--languages", default="en,zh-TW")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    config = FakePlatformConfig(
+        posts=args.posts, page_size=args.page_size, lazy_delay_ms=args.lazy_delay_ms,
+        recycle_after=args.recycle_after, image_ratio=args.image_ratio,
+        languages=[l.strip() for l in args.languages.split(",") if l.strip()], seed=args.seed,
+    )
+    server = FakePlatformServer(config, port=args.port)
+    print(f"Fake platform at {server.base_url}/threads/ | /instagram/ | /x/  (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
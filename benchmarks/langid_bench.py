@@ -0,0 +1,103 @@
+"""
+Accuracy / speed benchmark for the offline language identifier (core.language).
+
+Scores the "test" lines of benchmarks/fixtures/langid_corpus.jsonl and reports
+per-language accuracy, the misidentified lines and microseconds per call.
+With --train, first rebuilds core/langid_model.json from the "train" lines.
+
+Usage (from the project root):
+    python -m benchmarks.langid_bench
+    python -m benchmarks.langid_bench --train
+    python -m benchmarks.langid_bench --repeat 2000 --json data/langid_bench.json --strict
+"""
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from core import language
+
+CORPUS_FILE = Path(__file__).parent / "fixtures" / "langid_corpus.jsonl"
+
+# Below this test accuracy --strict fails
+MIN_ACCURACY = 0.9
+
+
+def load_corpus(split: str, path: Path = CORPUS_FILE) -> list:
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [row for row in rows if row["split"] == split]
+
+
+def train(path: Path = language.MODEL_FILE) -> dict:
+    model = language.train_model((row["lang"], row["text"]) for row in load_corpus("train"))
+    path.write_text(json.dumps(model, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    language._model, language._model_failed = None, False  # reload on next use
+    print(f"Wrote {path} ({len(model['languages'])} languages, {len(model['ngrams'])} n-grams, "
+          f"{path.stat().st_size / 1024:.0f} KB)")
+    return model
+
+
+def run(repeat: int = 1000) -> dict:
+    corpus = load_corpus("test")
+    per_language = defaultdict(lambda: {"total": 0, "correct": 0})
+    misses = []
+    for row in corpus:
+        guess = language.detect_language(row["text"])
+        stats = per_language[row["lang"]]
+        stats["total"] += 1
+        stats["correct"] += guess.code == row["lang"]
+        if guess.code != row["lang"]:
+            misses.append({**row, "got": guess.code, "confidence": round(guess.confidence, 3)})
+
+    texts = [row["text"] for row in corpus]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            language.detect_language(text)
+    seconds = time.perf_counter() - start
+
+    total = len(corpus)
+    return {
+        "benchmark": "langid",
+        "items": total,
+        "accuracy": sum(s["correct"] for s in per_language.values()) / max(total, 1),
+        "per_language": dict(per_language),
+        "misses": misses,
+        "microseconds_per_call": seconds / max(repeat * total, 1) * 1e6,
+    }
+
+
+def print_report(s: dict):
+    print(f"\n🌐 Language identifier over {s['items']} test items")
+    print(f"   Accuracy: {s['accuracy']:.1%}")
+    for lang, stats in sorted(s["per_language"].items()):
+        print(f"     {lang:<6} {stats['correct']:>3}/{stats['total']}")
+    print(f"   Speed:    {s['microseconds_per_call']:.1f} µs per call (warm word cache)")
+    for miss in s["misses"]:
+        print(f"   MISS expected {miss['lang']}, got {miss['got']} ({miss['confidence']:.2f}): {miss['text'][:60]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the offline language identifier.")
+    parser.add_argument("--train", action="store_true", help="Rebuild core/langid_model.json from the train split first")
+    parser.add_argument("--repeat", type=int, default=1000, help="Passes over the test split for the speed measurement")
+    parser.add_argument("--json", help="Also write the summary to this JSON file")
+    parser.add_argument("--strict", action="store_true", help=f"Exit non-zero below {MIN_ACCURACY:.0%} accuracy")
+    args = parser.parse_args()
+
+    if args.train:
+        train()
+    summary = run(args.repeat)
+    print_report(summary)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.strict and summary["accuracy"] < MIN_ACCURACY:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Offline check of the relevance pre-filter (core.relevance).
+
+Scores the labelled posts in benchmarks/fixtures/relevance_corpus.jsonl and
+reports how many LLM calls the filter avoids, how many relevant posts it
+wrongly skips, the skip reasons and the scoring speed. With --train, first fits
+the optional logistic model on the corpus and writes it to --model (point
+RELEVANCE_MODEL_FILE at it to use it in the loops).
+
+Usage (from the project root):
+    python -m benchmarks.relevance_bench
+    python -m benchmarks.relevance_bench --train --model data/relevance_model.json
+    python -m benchmarks.relevance_bench --threshold 0.4 --strict
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from core.language import detect_language
+from core.relevance import RelevanceFilter, extract_features, train_logistic
+
+CORPUS_FILE = Path(__file__).parent / "fixtures" / "relevance_corpus.jsonl"
+
+
+def load_corpus(path: Path = CORPUS_FILE) -> list:
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    for row in rows:
+        row["language"] = detect_language(row["text"]).code
+    return rows
+
+
+def train(rows: list, path: str) -> dict:
+    model = train_logistic((extract_features(r["text"], r["has_image"], r["language"]), r["relevant"]) for r in rows)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(model, indent=2), encoding="utf-8")
+    print(f"Wrote {path}: {model}")
+    return model
+
+
+def run(rows: list, threshold: float = None, model_path: str = "", repeat: int = 200) -> dict:
+    relevance = RelevanceFilter(threshold=threshold, model_path=model_path)
+    reasons = Counter()
+    avoided = wrongly_skipped = missed = 0
+    false_skips = []
+    for row in rows:
+        result = relevance.score(row["text"], row["has_image"], row["language"])
+        skipped = result.score < relevance.threshold
+        if skipped:
+            reasons[result.reason] += 1
+            if row["relevant"]:
+                wrongly_skipped += 1
+                false_skips.append({**row, "score": result.score, "reasons": list(result.reasons)})
+            else:
+                avoided += 1
+        elif not row["relevant"]:
+            missed += 1
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for row in rows:
+            relevance.score(row["text"], row["has_image"], row["language"])
+    seconds = time.perf_counter() - start
+
+    irrelevant = sum(not r["relevant"] for r in rows)
+    return {
+        "benchmark": "relevance",
+        "items": len(rows),
+        "threshold": relevance.threshold,
+        "model": bool(relevance.model),
+        "llm_calls_avoided": avoided,
+        "irrelevant_items": irrelevant,
+        "irrelevant_let_through": missed,
+        "relevant_skipped": wrongly_skipped,
+        "skip_reasons": dict(reasons),
+        "false_skips": false_skips,
+        "microseconds_per_item": seconds / max(repeat * len(rows), 1) * 1e6,
+    }
+
+
+def print_report(s: dict):
+    print(f"\n🪶 Relevance filter over {s['items']} labelled posts (threshold {s['threshold']}, "
+          f"{'rules + model' if s['model'] else 'rules only'})")
+    print(f"   Avoided:  {s['llm_calls_avoided']}/{s['irrelevant_items']} LLM calls on irrelevant posts "
+          f"({s['irrelevant_let_through']} let through)")
+    print(f"   Wrong:    {s['relevant_skipped']} relevant posts skipped")
+    print("   Reasons:  " + ", ".join(f"{r} {n}" for r, n in sorted(s["skip_reasons"].items(), key=lambda kv: -kv[1])))
+    print(f"   Speed:    {s['microseconds_per_item']:.1f} µs per post")
+    for miss in s["false_skips"]:
+        print(f"   FALSE SKIP ({miss['score']:.2f}, {', '.join(miss['reasons'])}): {miss['text'][:60]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the relevance pre-filter on the labelled corpus.")
+    parser.add_argument("--threshold", type=float, help="Skip threshold (default: settings.relevance_threshold)")
+    parser.add_argument("--model", default="", help="Logistic model JSON to use (and to write with --train)")
+    parser.add_argument("--train", action="store_true", help="Fit the logistic model on the corpus first")
+    parser.add_argument("--repeat", type=int, default=200, help="Passes over the corpus for the speed measurement")
+    parser.add_argument("--strict", action="store_true", help="Exit non-zero if any relevant post is skipped")
+    args = parser.parse_args()
+
+    rows = load_corpus()
+    if args.train:
+        args.model = args.model or "data/relevance_model.json"
+        train(rows, args.model)
+    summary = run(rows, args.threshold, args.model, args.repeat)
+    print_report(summary)
+    if args.strict and summary["relevant_skipped"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Render profile comparison on the fake platform pages.
+
+Runs the same scale benchmark (same seed, same fake content) once per render
+profile and compares CPU-seconds per hour and RSS of the whole process tree
+(Python + Playwright driver + Chromium), plus CPU cost per scanned item.
+
+Real time is the default here: idle rendering work (animations, compositing)
+is a per-second cost, which a virtual clock would hide.
+
+Usage (from the project root):
+    python -m benchmarks.render_bench --duration 600
+    python -m benchmarks.render_bench --profiles default,low --platform instagram --virtual-time
+"""
+import argparse
+import asyncio
+import json
+
+from core.browser import RENDER_PROFILES
+
+from .fake_platform import FakePlatformConfig
+from .replay import HISTORY_FILE
+from .scale_bench import run as run_scale
+
+
+def print_comparison(results: list):
+    header = f"{'profile':<10} {'CPU-s/h':>9} {'RSS MB':>8} {'max MB':>8} {'heap MB/h':>10} {'items':>7} {'CPU ms/item':>12}"
+    print("\n" + header)
+    print("-" * len(header))
+    baseline = results[0]
+    for r in results:
+        cpu_seconds = r["cpu_seconds_per_hour"] * r["duration_seconds"] / 3600
+        per_item = cpu_seconds * 1000 / r["scanned"] if r["scanned"] else 0.0
+        print(
+            f"{r['render_profile']:<10} {r['cpu_seconds_per_hour']:>9.0f} {r['process_tree_rss_mb']:>8.0f} "
+            f"{r['process_tree_rss_mb_max']:>8.0f} {r['js_heap_growth_mb_per_hour']:>10.1f} {r['scanned']:>7} {per_item:>12.1f}"
+        )
+    for r in results[1:]:
+        if baseline["cpu_seconds_per_hour"]:
+            cpu = r["cpu_seconds_per_hour"] / baseline["cpu_seconds_per_hour"] - 1
+            rss = r["process_tree_rss_mb"] / baseline["process_tree_rss_mb"] - 1 if baseline["process_tree_rss_mb"] else 0.0
+            print(f"   {r['render_profile']} vs {baseline['render_profile']}: CPU {cpu:+.0%}, RSS {rss:+.0%}")
+
+
+async def compare(profiles: list, platform: str, mode: str, duration: float, config: FakePlatformConfig,
+                  virtual_time: bool, seed: int) -> list:
+    results = []
+    for profile in profiles:
+        print(f"▶️  Render profile '{profile}' for {duration:.0f}s...")
+        results.append(await run_scale(platform, mode, duration, config, virtual_time=virtual_time,
+                                       seed=seed, render_profile=profile))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CPU/RSS per hour between render profiles.")
+    parser.add_argument("--profiles", default=",".join(RENDER_PROFILES), help="Comma-separated render profiles")
+    parser.add_argument("--platform", default="threads", choices=["threads", "instagram", "x"])
+    parser.add_argument("--mode", default="feed", choices=["feed", "notification"])
+    parser.add_argument("--duration", type=float, default=300, help="Seconds per profile")
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--image-ratio", type=float, default=0.4)
+    parser.add_argument("--virtual-time", action="store_true", help="Use the virtual clock (compares work, not idle cost)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    unknown = [p for p in profiles if p not in RENDER_PROFILES]
+    if unknown:
+        parser.error(f"Unknown render profile(s): {', '.join(unknown)}")
+
+    config = FakePlatformConfig(posts=args.posts, image_ratio=args.image_ratio, seed=args.seed)
+    results = asyncio.run(compare(profiles, args.platform, args.mode, args.duration, config,
+                                  args.virtual_time, args.seed))
+    print_comparison(results)
+
+    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+        for r in results:
+            f.write(json.dumps({**r, "benchmark": "render"}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Record/replay harness for deterministic end-to-end adapter benchmarks.
+
+record: runs a real (logged-in) session, saving all network traffic into a HAR
+        archive plus DOM snapshots around every adapter call.
+replay: re-runs the same call sequence offline through BrowserEngine with
+        route_from_har, using the unchanged adapter code, and reports per-call
+        latency. Adapter pacing runs on a seeded VirtualClock unless
+        --real-time is given. Results are appended to a history file tagged with the current
+        git commit, so regressions can be tracked commit by commit.
+
+Usage (from the project root):
+    python -m benchmarks.replay record --platform threads --steps feed,feed,notifications
+    python -m benchmarks.replay replay --session data/sessions/threads-20240101-120000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+from config import settings
+from core import clock
+from core.browser import BrowserEngine
+from core.factory import PlatformAdapterFactory
+
+SESSIONS_DIR = Path("data/sessions")
+HISTORY_FILE = Path("data/bench_history.jsonl")
+REPLAY_COMMENT = "Replay benchmark comment"
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+async def _snapshot(page, path: Path) -> int:
+    """Save the current DOM and return its element count."""
+    path.write_text(await page.content(), encoding="utf-8")
+    return await page.evaluate("() => document.getElementsByTagName('*').length")
+
+
+async def _run_steps(adapter, browser, steps, snapshot_dir: Path = None) -> list:
+    """Run the adapter call sequence, timing each call."""
+    results = []
+    last_posts = []
+    for seq, step in enumerate(steps):
+        page = browser.page
+        entry = {"seq": seq, "step": step}
+        if snapshot_dir:
+            entry["dom_before"] = await _snapshot(page, snapshot_dir / f"{seq:03d}_{step}_before.html")
+
+        start = time.perf_counter()
+        if step == "feed":
+            last_posts = await adapter.get_feed()
+            entry["items"] = len(last_posts)
+        elif step == "notifications":
+            entry["items"] = len(await adapter.get_notifications())
+        elif step == "reply":
+            entry["items"] = 0
+            if last_posts:
+                entry["items"] = int(await adapter.reply(last_posts[0], REPLAY_COMMENT) is True)
+        else:
+            raise ValueError(f"Unknown step: {step}")
+        entry["seconds"] = time.perf_counter() - start
+        entry["url"] = page.url
+
+        if snapshot_dir:
+            entry["dom_after"] = await _snapshot(page, snapshot_dir / f"{seq:03d}_{step}_after.html")
+        results.append(entry)
+        print(f"   [{seq:03d}] {step:<14} {entry['seconds']:7.2f}s  items={entry['items']}")
+    return results
+
+
+async def record(platform: str, steps: list, out_dir: Path):
+    snapshot_dir = out_dir / "snapshots"
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    har_path = out_dir / "session.har"
+
+    browser = BrowserEngine(record_har_path=str(har_path))
+    adapter = PlatformAdapterFactory.get_adapter(platform, browser)
+    try:
+        await browser.start()
+        await adapter.login()
+        results = await _run_steps(adapter, browser, steps, snapshot_dir)
+    finally:
+        await browser.stop()  # HAR is flushed when the context closes
+
+    manifest = {
+        "platform": platform,
+        "steps": steps,
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "dry_run": settings.dry_run,
+        "results": results,
+    }
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    print(f"📼 Session recorded to {out_dir}")
+
+
+async def replay(session_dir: Path, runs: int = 1, virtual_time: bool = True, seed: int = 0) -> dict:
+    manifest = json.loads((session_dir / "manifest.json").read_text(encoding="utf-8"))
+    platform, steps = manifest["platform"], manifest["steps"]
+
+    per_step = {}
+    totals = []
+    for run in range(runs):
+        # Same seed every run, so every run sees the same "random" delays and scrolls
+        previous_clock = clock.set_clock(clock.VirtualClock(seed=seed)) if virtual_time else None
+        browser = BrowserEngine(replay_har_path=str(session_dir / "session.har"), headless=True)
+        adapter = PlatformAdapterFactory.get_adapter(platform, browser)
+        try:
+            await browser.start()
+            await adapter.login()
+            print(f"▶️  Replay run {run + 1}/{runs}")
+            results = await _run_steps(adapter, browser, steps)
+        finally:
+            await browser.stop()
+            if virtual_time:
+                clock.set_clock(previous_clock)
+        totals.append(sum(r["seconds"] for r in results))
+        for r in results:
+            per_step.setdefault(f"{r['seq']:03d}_{r['step']}", []).append(r["seconds"])
+
+    summary = {
+        "session": str(session_dir),
+        "platform": platform,
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "runs": runs,
+        "virtual_time": virtual_time,
+        "total_seconds_median": statistics.median(totals),
+        "steps": {k: statistics.median(v) for k, v in per_step.items()},
+        "recorded_steps": {f"{r['seq']:03d}_{r['step']}": r["seconds"] for r in manifest["results"]},
+    }
+    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(summary) + "\n")
+    print(f"✅ Replay median total: {summary['total_seconds_median']:.2f}s (appended to {HISTORY_FILE})")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record/replay adapter sessions for benchmarking.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Record a live session into a HAR archive")
+    rec.add_argument("--platform", default=settings.platform)
+    rec.add_argument("--steps", default="feed,notifications",
+                     help="Comma-separated adapter calls: feed, notifications, reply")
+    rec.add_argument("--out", help="Session directory (default: data/sessions/<platform>-<timestamp>)")
+
+    rep = sub.add_parser("replay", help="Replay a recorded session offline")
+    rep.add_argument("--session", required=True, help="Session directory created by 'record'")
+    rep.add_argument("--runs", type=int, default=3)
+    rep.add_argument("--real-time", action="store_true", help="Really sleep instead of using the virtual clock")
+    rep.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        steps = [s.strip() for s in args.steps.split(",") if s.strip()]
+        out_dir = Path(args.out) if args.out else SESSIONS_DIR / f"{args.platform}-{datetime.now():%Y%m%d-%H%M%S}"
+        os.makedirs(out_dir, exist_ok=True)
+        asyncio.run(record(args.platform, steps, out_dir))
+    else:
+        asyncio.run(replay(Path(args.session), args.runs, virtual_time=not args.real_time, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Warm vs cold restart on the fake platform.
+
+Phase 1 runs the feed loop with a session checkpoint for --duration seconds,
+then stops it as a crash would. Phase 2 restarts twice from the same reply
+history: cold (no checkpoint) and warm (resuming the checkpoint). Each restart
+runs for --restart-duration seconds. The comparison shows the work the
+checkpoint saves:
+
+- rescanned:     posts handed to the loop again although phase 1 already saw them
+- regenerated:   LLM generations for posts phase 1 had already generated for
+- first reply:   seconds from loop start to the first reply
+
+Usage (from the project root):
+    python -m benchmarks.restart_bench --platform threads --duration 300 --restart-duration 120
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from .fake_platform import FakePlatformConfig
+from .replay import HISTORY_FILE
+from .scale_bench import run as run_scale
+
+
+def _work(result: dict, phase1: dict) -> dict:
+    seen = set(phase1["scanned_digests"])
+    generated = set(phase1["generated_digests"])
+    return {
+        "scanned": result["scanned"],
+        "rescanned": len(seen.intersection(result["scanned_digests"])),
+        "generations": result["generations"],
+        "regenerated": sum(1 for d in result["generated_digests"] if d in generated),
+        "replies": result["replies"],
+        "first_reply_seconds": result["first_reply_seconds"],
+    }
+
+
+async def compare(platform: str, duration: float, restart_duration: float, config: FakePlatformConfig,
+                  virtual_time: bool, seed: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        checkpoint = str(tmp / "checkpoint.json")
+        history = tmp / "history.db"
+        common = dict(virtual_time=virtual_time, seed=seed, keep_digests=True)
+
+        print(f"▶️  Phase 1: {duration:.0f}s with checkpointing...")
+        phase1 = await run_scale(platform, "feed", duration, config, checkpoint_path=checkpoint,
+                                 history_db=str(history), **common)
+        shutil.copy(history, tmp / "history_cold.db")
+        shutil.copy(history, tmp / "history_warm.db")
+
+        print(f"▶️  Cold restart: {restart_duration:.0f}s without checkpoint...")
+        cold = await run_scale(platform, "feed", restart_duration, config,
+                               history_db=str(tmp / "history_cold.db"), **common)
+        print(f"▶️  Warm restart: {restart_duration:.0f}s resuming the checkpoint...")
+        warm = await run_scale(platform, "feed", restart_duration, config, checkpoint_path=checkpoint,
+                               history_db=str(tmp / "history_warm.db"), **common)
+
+    return {
+        "benchmark": "restart",
+        "platform": platform,
+        "duration_seconds": duration,
+        "restart_duration_seconds": restart_duration,
+        "phase1": {"scanned": phase1["scanned"], "generations": phase1["generations"], "replies": phase1["replies"]},
+        "cold": _work(cold, phase1),
+        "warm": _work(warm, phase1),
+        "checkpoint": warm["checkpoint"],
+    }
+
+
+def print_comparison(r: dict):
+    p = r["phase1"]
+    print(f"\n📊 Restart on {r['platform']}: phase 1 scanned {p['scanned']}, generated {p['generations']}, "
+          f"replied {p['replies']}")
+    header = f"{'restart':<8} {'scanned':>8} {'rescanned':>10} {'generations':>12} {'regenerated':>12} {'replies':>8} {'1st reply s':>12}"
+    print(header)
+    print("-" * len(header))
+    for name in ("cold", "warm"):
+        w = r[name]
+        first = f"{w['first_reply_seconds']:.1f}" if w["first_reply_seconds"] is not None else "-"
+        print(f"{name:<8} {w['scanned']:>8} {w['rescanned']:>10} {w['generations']:>12} {w['regenerated']:>12} "
+              f"{w['replies']:>8} {first:>12}")
+    saved = r["checkpoint"] or {}
+    print(f"   Checkpoint: {saved.get('seen_posts', 0)} seen posts restored, "
+          f"{saved.get('skipped_seen_posts', 0)} skipped, {saved.get('reused_replies', 0)} replies reused")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the work a session checkpoint saves on restart.")
+    parser.add_argument("--platform", default="threads", choices=["threads", "instagram"])
+    parser.add_argument("--duration", type=float, default=300, help="Seconds before the simulated crash")
+    parser.add_argument("--restart-duration", type=float, default=120, help="Seconds per restart run")
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--real-time", action="store_true", help="Really sleep instead of using the virtual clock")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = FakePlatformConfig(posts=args.posts, seed=args.seed)
+    result = asyncio.run(compare(args.platform, args.duration, args.restart_duration, config,
+                                 not args.real_time, args.seed))
+    print_comparison(result)
+    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Scale benchmark: runs the real main loops (run_feed_mode / run_notification_mode)
+headless against the local fake platform for a fixed duration.
+
+Reports scan throughput (posts per minute), reply latency, renderer JS heap and
+DOM node growth, and Python RSS growth. Runs with dry_run forced on and a
+throwaway history database, so no LLM calls are made and nothing real is
+touched. Pacing runs on a seeded VirtualClock by default (--real-time to
+disable), so human delays and reply spacing cost no wall time. Results are
+appended to data/bench_history.jsonl like the replay benchmark.
+
+Usage (from the project root):
+    python -m benchmarks.scale_bench --platform threads --mode feed --duration 600
+    python -m benchmarks.scale_bench --platform instagram --mode notification --posts 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from config import settings
+from core import clock
+from core.brain import BotBrain
+from core.checkpoint import SessionCheckpoint, content_digest
+from core.browser import BrowserEngine
+from core.db import Database
+from core.factory import PlatformAdapterFactory
+from core.watchdog import process_tree_usage
+
+from .fake_platform import FakePlatformConfig, FakePlatformServer, route_to_fake
+from .replay import HISTORY_FILE, _git_commit
+
+
+def _rss_bytes() -> int:
+    """Resident set size of this process (Linux /proc, falls back to ru_maxrss)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except Exception:
+            return 0
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class AdapterProbe:
+    """Wraps adapter (and brain) calls with timers; leaves their own logic untouched."""
+
+    def __init__(self, adapter, brain=None):
+        self.adapter = adapter
+        self.scan_seconds = []
+        self.scanned = 0
+        self.scanned_digests = set()
+        self.generated_digests = []
+        self.reply_seconds = []
+        self.first_reply_at = None
+        self.loop_started = time.monotonic()
+        self._wrap(adapter, "get_feed", self._on_scan)
+        self._wrap(adapter, "get_notifications", self._on_scan)
+        self._wrap(adapter, "reply", self._on_reply)
+        self._wrap(adapter, "reply_to_comment", self._on_reply)
+        if brain is not None:
+            self._wrap(brain, "generate_comment", self._on_generate, record_args=True)
+
+    def _wrap(self, target, name: str, record, record_args: bool = False):
+        original = getattr(target, name)
+
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = await original(*args, **kwargs)
+            record(time.perf_counter() - start, args if record_args else result)
+            return result
+
+        setattr(target, name, timed)
+
+    def _on_scan(self, seconds, result):
+        self.scan_seconds.append(seconds)
+        self.scanned += len(result or [])
+        self.scanned_digests.update(content_digest(item.content) for item in result or [])
+
+    def _on_reply(self, seconds, result):
+        self.reply_seconds.append(seconds)
+        if self.first_reply_at is None:
+            self.first_reply_at = time.monotonic() - self.loop_started
+
+    def _on_generate(self, seconds, args):
+        self.generated_digests.append(content_digest(args[0] if args else ""))
+
+
+async def _sample_memory(browser: BrowserEngine, samples: list, interval: float):
+    cdp, cdp_page = None, None
+    start = time.monotonic()
+    while True:
+        try:
+            if cdp_page is not browser.page:  # the watchdog may have recycled it
+                cdp_page = browser.page
+                cdp = await browser.context.new_cdp_session(cdp_page)
+                await cdp.send("Performance.enable")
+            metrics = {m["name"]: m["value"] for m in (await cdp.send("Performance.getMetrics"))["metrics"]}
+        except Exception:
+            cdp_page = None
+            metrics = {}
+        tree_cpu, tree_rss = process_tree_usage()
+        samples.append({
+            "t": time.monotonic() - start,
+            "rss": _rss_bytes(),
+            "tree_cpu": tree_cpu,
+            "tree_rss": tree_rss,
+            "js_heap": metrics.get("JSHeapUsedSize", 0),
+            "nodes": metrics.get("Nodes", 0),
+        })
+        await asyncio.sleep(interval)
+
+
+async def run(platform: str, mode: str, duration: float, config: FakePlatformConfig,
+              sample_interval: float = 5.0, virtual_time: bool = True, seed: int = 0,
+              render_profile: str = None, checkpoint_path: str = None, history_db: str = None,
+              keep_digests: bool = False) -> dict:
+    """
+    `checkpoint_path` enables SessionCheckpoint (resumed if the file exists);
+    `history_db` keeps reply history across runs (default: a throwaway DB);
+    `keep_digests` adds the content digests of scanned/generated posts to the
+    summary (used by the restart benchmark).
+    """
+    import main as bot  # deferred: importing main configures logging
+
+    virtual = clock.VirtualClock(seed=seed) if virtual_time else None
+    previous_clock = clock.set_clock(virtual) if virtual else None
+    server = FakePlatformServer(config).start()
+    settings.dry_run = True
+    settings.platform = platform
+    settings.headless = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(db_path=history_db or str(Path(tmp) / "history.db"))
+        await db.init_db()
+        browser = BrowserEngine(headless=True, persist_session=False, render_profile=render_profile)
+        # Registered as a context hook so it survives watchdog context recycles
+        browser.context_hooks.append(lambda context: route_to_fake(context, server.base_url))
+        adapter = PlatformAdapterFactory.get_adapter(platform, browser)
+        brain = BotBrain()
+        probe = AdapterProbe(adapter, brain)
+        checkpoint = SessionCheckpoint(platform, mode, path=checkpoint_path) if checkpoint_path else None
+        samples = []
+        sampler = None
+        try:
+            await browser.start()
+            await adapter.login()
+            if checkpoint:
+                await checkpoint.resume(adapter)
+            sampler = asyncio.create_task(_sample_memory(browser, samples, sample_interval))
+            loop = bot.run_notification_mode if mode == "notification" else bot.run_feed_mode
+            start = probe.loop_started = time.monotonic()
+            try:
+                await asyncio.wait_for(loop(adapter, brain, db, checkpoint), timeout=duration)
+            except asyncio.TimeoutError:
+                pass
+            elapsed = time.monotonic() - start
+            if checkpoint:
+                await checkpoint.save()
+        finally:
+            if sampler:
+                sampler.cancel()
+            await browser.stop()
+            server.stop()
+            if virtual:
+                clock.set_clock(previous_clock)
+
+    first, last = (samples[0], samples[-1]) if samples else ({}, {})
+    hours = max(elapsed, 1e-9) / 3600
+    summary = {
+        "benchmark": "scale",
+        "platform": platform,
+        "mode": mode,
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "duration_seconds": elapsed,
+        "render_profile": browser.render_profile,
+        "virtual_time": virtual_time,
+        "seed": seed,
+        "virtual_seconds_skipped": virtual.slept if virtual else 0.0,
+        "fake_platform": {"posts": config.posts, "image_ratio": config.image_ratio,
+                          "languages": config.languages, "recycle_after": config.recycle_after},
+        "scanned": probe.scanned,
+        "scans": len(probe.scan_seconds),
+        "scanned_per_minute": probe.scanned / max(elapsed / 60, 1e-9),
+        "scan_seconds_median": statistics.median(probe.scan_seconds) if probe.scan_seconds else 0.0,
+        "replies": len(probe.reply_seconds),
+        "generations": len(probe.generated_digests),
+        "first_reply_seconds": probe.first_reply_at,
+        "checkpoint": checkpoint.work_saved() if checkpoint else None,
+        "replies_received": len(server.state.replies),
+        "reply_seconds_p50": _percentile(probe.reply_seconds, 50),
+        "reply_seconds_p95": _percentile(probe.reply_seconds, 95),
+        "rss_growth_mb_per_hour": (last.get("rss", 0) - first.get("rss", 0)) / 2**20 / hours,
+        "js_heap_growth_mb_per_hour": (last.get("js_heap", 0) - first.get("js_heap", 0)) / 2**20 / hours,
+        "cpu_seconds_per_hour": (last.get("tree_cpu", 0) - first.get("tree_cpu", 0)) / hours,
+        "process_tree_rss_mb": last.get("tree_rss", 0) / 2**20,
+        "process_tree_rss_mb_max": max((x["tree_rss"] for x in samples), default=0) / 2**20,
+        "dom_nodes_start": first.get("nodes", 0),
+        "dom_nodes_end": last.get("nodes", 0),
+    }
+    if keep_digests:
+        summary["scanned_digests"] = sorted(probe.scanned_digests)
+        summary["generated_digests"] = probe.generated_digests
+    return summary
+
+
+def print_summary(s: dict):
+    print(f"\n📊 {s['platform']} / {s['mode']} for {s['duration_seconds']:.0f}s (render profile: {s['render_profile']})")
+    if s["virtual_time"]:
+        print(f"   Clock:     virtual (seed {s['seed']}), {s['virtual_seconds_skipped']:.0f}s of pacing skipped")
+    print(f"   Scanned:   {s['scanned']} items in {s['scans']} scans ({s['scanned_per_minute']:.1f}/min, "
+          f"median scan {s['scan_seconds_median']:.2f}s)")
+    print(f"   Replies:   {s['replies']} sent, {s['replies_received']} received by fake server "
+          f"(p50 {s['reply_seconds_p50']:.2f}s, p95 {s['reply_seconds_p95']:.2f}s)")
+    print(f"   Memory:    RSS {s['rss_growth_mb_per_hour']:+.1f} MB/h, JS heap {s['js_heap_growth_mb_per_hour']:+.1f} MB/h, "
+          f"DOM nodes {s['dom_nodes_start']:.0f} -> {s['dom_nodes_end']:.0f}")
+    print(f"   Process:   {s['cpu_seconds_per_hour']:.0f} CPU-s/h, RSS {s['process_tree_rss_mb']:.0f} MB "
+          f"(max {s['process_tree_rss_mb_max']:.0f} MB) incl. browser")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot loops against the local fake platform.")
+    parser.add_argument("--platform", default="threads", choices=["threads", "instagram", "x"])
+    parser.add_argument("--mode", default="feed", choices=["feed", "notification"])
+    parser.add_argument("--duration", type=float, default=300, help="Seconds to run the loop")
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--image-ratio", type=float, default=0.4)
+    parser.add_argument("--languages", default="en,zh-TW")
+    parser.add_argument("--recycle-after", type=int, default=0, help="Virtualize the feed to this many nodes")
+    parser.add_argument("--sample-interval", type=float, default=5.0)
+    parser.add_argument("--real-time", action="store_true", help="Really sleep instead of using the virtual clock")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the virtual clock's randomness")
+    parser.add_argument("--render-profile", help="BrowserEngine render profile (default: settings.render_profile)")
+    args = parser.parse_args()
+
+    config = FakePlatformConfig(
+        posts=args.posts, image_ratio=args.image_ratio, recycle_after=args.recycle_after,
+        languages=[l.strip() for l in args.languages.split(",") if l.strip()],
+    )
+    summary = asyncio.run(run(args.platform, args.mode, args.duration, config, args.sample_interval,
+                              virtual_time=not args.real_time, seed=args.seed,
+                              render_profile=args.render_profile))
+    print_summary(summary)
+    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(summary) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Offline selector benchmark over the saved HTML fixtures in benchmarks/fixtures.
+
+Loads every fixture page into headless Chromium through a local file server and,
+for every SelectorEntry in adapters.selectors, reports match counts, evaluation
+time and whether the intended element (marked with data-bench-target) was hit.
+
+Usage (from the project root):
+    python -m benchmarks.selector_bench
+    python -m benchmarks.selector_bench --platform threads --repeat 50
+    python -m benchmarks.selector_bench --json data/selector_bench.json --strict
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from playwright.async_api import async_playwright
+
+from adapters import selectors
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# A selector matching more than this many non-target elements is "over-broad"
+BROAD_EXTRA_MATCHES = 20
+# Median count() round-trip above this is "slow"
+SLOW_MS = 5.0
+
+_EXPECTED_SCRIPT = """
+() => [...document.querySelectorAll('[data-bench-target]')]
+        .flatMap((el) => el.getAttribute('data-bench-target').split(' '))
+"""
+_TARGET_HITS_SCRIPT = """
+(els, name) => els.filter(
+    (el) => (el.getAttribute('data-bench-target') || '').split(' ').includes(name)
+).length
+"""
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory: Path):
+    """Start a background HTTP server for `directory`; returns (server, base_url)."""
+    handler = partial(_QuietHandler, directory=str(directory))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def discover_fixtures(platform: str = None):
+    for platform_dir in sorted(p for p in FIXTURES_DIR.iterdir() if p.is_dir()):
+        if platform and platform_dir.name != platform:
+            continue
+        for page in sorted(platform_dir.glob("*.html")):
+            yield platform_dir.name, page.stem, page.relative_to(FIXTURES_DIR).as_posix()
+
+
+async def measure(page, selector: str, target: str, repeat: int) -> dict:
+    locator = page.locator(selector)
+    timings = []
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = await locator.count()
+        timings.append((time.perf_counter() - start) * 1000)
+    hits = await locator.evaluate_all(_TARGET_HITS_SCRIPT, target) if count else 0
+    return {"matches": count, "target_hits": hits, "ms_p50": statistics.median(timings), "ms_max": max(timings)}
+
+
+def _variants(entry):
+    yield "union", str(entry), False
+    for i, alt in enumerate(entry.alternatives):
+        yield f"alt{i}", alt, False
+    for i, alt in enumerate(entry.fallbacks):
+        yield f"fallback{i}", alt, True
+
+
+async def bench_fixture(page, url: str, platform: str, name: str, repeat: int) -> list:
+    await page.goto(url)
+    expected_names = await page.evaluate(_EXPECTED_SCRIPT)
+    rows = []
+    for entry in selectors.registry.entries():
+        expected = expected_names.count(entry.name)
+        for variant, selector, is_fallback in _variants(entry):
+            result = await measure(page, selector, entry.name, repeat)
+            if not expected and not result["matches"]:
+                continue
+            flags = []
+            if variant == "union" and expected and not result["target_hits"]:
+                flags.append("MISS")
+            if expected and result["matches"] - result["target_hits"] > BROAD_EXTRA_MATCHES:
+                flags.append("BROAD")
+            if result["ms_p50"] > SLOW_MS:
+                flags.append("SLOW")
+            rows.append({
+                "fixture": f"{platform}/{name}",
+                "entry": entry.name,
+                "variant": variant,
+                "selector": selector,
+                "expected": expected,
+                "fallback": is_fallback,
+                "flags": flags,
+                **result,
+            })
+    return rows
+
+
+def print_report(rows: list):
+    header = f"{'fixture':<28} {'entry':<32} {'variant':<10} {'match':>6} {'hit':>7} {'p50 ms':>8}  flags"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        hit = f"{r['target_hits']}/{r['expected']}" if r["expected"] else "-"
+        print(
+            f"{r['fixture']:<28} {r['entry']:<32} {r['variant']:<10} {r['matches']:>6} {hit:>7} "
+            f"{r['ms_p50']:>8.2f}  {' '.join(r['flags'])}"
+        )
+
+
+def strict_failures(rows: list) -> list:
+    """Misses anywhere, and BROAD/SLOW on non-fallback alternatives."""
+    failures = []
+    for r in rows:
+        if "MISS" in r["flags"]:
+            failures.append(r)
+        elif r["variant"].startswith("alt") and ({"BROAD", "SLOW"} & set(r["flags"])):
+            failures.append(r)
+    return failures
+
+
+async def run(platform: str = None, repeat: int = 20) -> list:
+    server, base_url = serve_directory(FIXTURES_DIR)
+    rows = []
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            page = await browser.new_page()
+            for plat, name, rel in discover_fixtures(platform):
+                rows.extend(await bench_fixture(page, f"{base_url}/{rel}", plat, name, repeat))
+            await browser.close()
+    finally:
+        server.shutdown()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark adapter selectors against saved fixtures.")
+    parser.add_argument("--platform", help="Only run fixtures for this platform (threads, instagram, facebook)")
+    parser.add_argument("--repeat", type=int, default=20, help="count() evaluations per selector")
+    parser.add_argument("--json", help="Also write the raw rows to this JSON file")
+    parser.add_argument("--strict", action="store_true", help="Exit non-zero on misses or slow/over-broad alternatives")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.platform, args.repeat))
+    print_report(rows)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    failures = strict_failures(rows)
+    if failures:
+        print(f"\n{len(failures)} problem(s): " + ", ".join(f"{r['fixture']}:{r['entry']}:{r['variant']}" for r in failures))
+    if args.strict and failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
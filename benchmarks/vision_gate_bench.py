@@ -0,0 +1,111 @@
+"""
+Savings vs quality report for the vision gate (core.vision_gate).
+
+Reads the JSON-lines decision log (VISION_GATE_LOG_FILE) and reports how many
+posts went text-only and why, the image tokens that avoided, and, for the
+counterfactual samples (VISION_GATE_COUNTERFACTUAL_RATE > 0), how far the reply
+the gate chose is from the one the other branch produced. Divergence is
+1 - Jaccard similarity over character bigrams, so it works for CJK replies as
+well; a text-only decision whose vision reply diverges a lot is a candidate
+for a looser gate. --show prints the most divergent pairs for a manual read.
+
+Usage (from the project root):
+    python -m benchmarks.vision_gate_bench
+    python -m benchmarks.vision_gate_bench --log data/vision_gate.jsonl --show 10 --json data/vision_gate_report.json
+"""
+import argparse
+import json
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from config import settings
+from core.rate_limiter import IMAGE_TOKENS
+
+
+def load_log(path: Path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _bigrams(text: str) -> set:
+    text = " ".join((text or "").lower().split())
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+
+def divergence(a: str, b: str) -> float:
+    x, y = _bigrams(a), _bigrams(b)
+    return 1 - len(x & y) / max(len(x | y), 1)
+
+
+def run(rows: list) -> dict:
+    decisions = [r for r in rows if r["event"] == "decision"]
+    near_duplicates = {r["post_id"] for r in rows if r["event"] == "near_duplicate"}
+    by_reason = Counter()
+    images_avoided = 0
+    for row in decisions:
+        text_only = row["decision"] == "text_only" or row["post_id"] in near_duplicates
+        reason = "near_duplicate" if row["post_id"] in near_duplicates else (row["reasons"] or ["worth_it"])[0]
+        by_reason[("text_only" if text_only else "vision", reason)] += 1
+        if text_only:
+            images_avoided += row.get("images", 0) if row["post_id"] not in near_duplicates else 1
+
+    pairs = []
+    per_decision = defaultdict(list)
+    for row in rows:
+        if row["event"] != "counterfactual":
+            continue
+        d = divergence(row["reply"], row["counterfactual_reply"])
+        per_decision[row["decision"]].append(d)
+        pairs.append({**row, "divergence": round(d, 3)})
+    pairs.sort(key=lambda p: -p["divergence"])
+
+    total = len(decisions)
+    text_only = sum(n for (d, _), n in by_reason.items() if d == "text_only")
+    return {
+        "benchmark": "vision_gate",
+        "decisions": total,
+        "text_only": text_only,
+        "text_only_share": text_only / max(total, 1),
+        "by_reason": {f"{d}/{r}": n for (d, r), n in by_reason.most_common()},
+        "images_avoided": images_avoided,
+        "image_tokens_avoided": images_avoided * IMAGE_TOKENS,
+        "counterfactuals": len(pairs),
+        "mean_divergence": {d: sum(v) / len(v) for d, v in per_decision.items()},
+        "pairs": pairs,
+    }
+
+
+def print_report(s: dict, show: int = 5):
+    print(f"\n🎚️  Vision gate over {s['decisions']} decisions")
+    print(f"   Text-only: {s['text_only']} ({s['text_only_share']:.0%}), "
+          f"~{s['image_tokens_avoided']:,} image tokens avoided ({s['images_avoided']} images)")
+    for key, n in s["by_reason"].items():
+        print(f"     {key:<28} {n}")
+    if not s["counterfactuals"]:
+        print("   No counterfactual samples (set VISION_GATE_COUNTERFACTUAL_RATE to collect some).")
+        return
+    print(f"   Counterfactual pairs: {s['counterfactuals']}")
+    for decision, mean in sorted(s["mean_divergence"].items()):
+        print(f"     gate chose {decision:<10} mean reply divergence {mean:.2f}")
+    for pair in s["pairs"][:show]:
+        print(f"   [{pair['divergence']:.2f}] {pair['decision']} ({', '.join(pair['reasons']) or '-'}) {pair['post_id']}")
+        print(f"       chosen:         {pair['reply'][:100]!r}")
+        print(f"       {pair['counterfactual_branch']:<15} {pair['counterfactual_reply'][:100]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report vision gate savings and counterfactual reply divergence.")
+    parser.add_argument("--log", default=settings.vision_gate_log_file, help="Decision log (default: VISION_GATE_LOG_FILE)")
+    parser.add_argument("--show", type=int, default=5, help="Most divergent counterfactual pairs to print")
+    parser.add_argument("--json", help="Also write the summary to this JSON file")
+    args = parser.parse_args()
+
+    summary = run(load_log(Path(args.log)))
+    print_report(summary, args.show)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
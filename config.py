@@ -22,9 +22,24 @@ class Settings(BaseSettings):
     ollama_base_url: str = Field(default="http://localhost:11434/v1", description="Ollama API URL")
     ollama_model: str = Field(default="qwen2.5-vl", description="Ollama model name")
 
+    # Retryable LLM errors (rate limited / transient): jittered exponential backoff
+    llm_backoff_base_seconds: float = Field(default=2, gt=0, description="First backoff step")
+    llm_backoff_max_seconds: float = Field(default=300, gt=0, description="Backoff ceiling (a longer Retry-After still wins)")
+
+    # Client-side rate limiter (token buckets per provider/model, AIMD on 429s / rate-limit headers)
+    llm_rate_limits: str = Field(
+        default="openai=500/200000;google=15/1000000",
+        description="provider[:model]=requests/tokens per minute, ';'-separated (0 or missing = unlimited until headers say otherwise)"
+    )
+    llm_rate_decrease: float = Field(default=0.5, gt=0, lt=1, description="Budget multiplier after a 429")
+    llm_rate_increase: float = Field(default=0.05, gt=0, le=1, description="Budget fraction restored per successful call")
+    llm_rate_min_factor: float = Field(default=0.1, gt=0, le=1, description="Lowest budget fraction AIMD may cut to")
+
     # --- Browser / Playwright ---
     headless: bool = Field(default=False, description="Run browser in headless mode")
     user_data_dir: str = Field(default="./data/browser_context", description="Browser profile path")
+    render_profile: str = Field(default="default", description="Render profile: default, low (reduced motion, no GPU in headless, smaller viewport)")
+    render_js_heap_mb: int = Field(default=0, ge=0, description="Renderer JS heap cap in MB (0 = use the render profile's value)")
 
     # --- Persona ---
     persona_prompt: str = Field(
@@ -45,6 +60,102 @@ Tone: Casual, friendly, slightly chaotic but smart.""",
         description="System prompt for the bot"
     )
 
+    # --- Language Detection ---
+    language_detection_enabled: bool = Field(default=True, description="Tag items with a locally detected language before generation")
+    supported_languages: str = Field(default="en,zh-TW,zh-CN,ja,ko,es,fr,de,pt,it,id", description="Languages the persona replies in; others are skipped (empty = all)")
+    language_min_confidence: float = Field(default=0.5, ge=0, le=1, description="Latin-script guesses below this confidence stay undetermined")
+    language_min_margin: float = Field(default=0.2, ge=0, le=1, description="Minimum posterior lead over the runner-up language, else undetermined")
+    language_min_ngrams: int = Field(default=40, ge=0, description="Latin text with fewer n-grams known to the model stays undetermined (short slang)")
+    prompt_variants_dir: str = Field(default="data/prompts", description="Optional per-language system prompts: persona.<lang>.txt")
+    reply_max_chars_cjk: int = Field(default=30, ge=0, description="Reply length limit for Chinese/Japanese (0 = no limit)")
+    reply_max_chars_hangul: int = Field(default=40, ge=0, description="Reply length limit for Korean/Thai (0 = no limit)")
+    reply_max_words: int = Field(default=15, ge=0, description="Reply length limit in words for space-separated scripts (0 = no limit)")
+
+    # --- Relevance Pre-filter ---
+    relevance_filter_enabled: bool = Field(default=True, description="Score feed posts locally and skip low-value ones before the LLM")
+    relevance_threshold: float = Field(default=0.5, ge=0, le=1, description="Posts scoring below this are skipped")
+    relevance_min_chars: int = Field(default=12, ge=0, description="Fewer letters than this counts as too short (a CJK character counts as 3)")
+    relevance_model_file: str = Field(default="", description="Optional logistic model JSON averaged with the rules (empty = rules only)")
+
+    # --- Image Description Cache ---
+    image_cache_enabled: bool = Field(default=True, description="Answer near-duplicate images text-only from a cached description")
+    image_hash_algorithm: str = Field(default="dhash", description="Perceptual hash: dhash (faster), phash (more robust to edits)")
+    image_hash_max_distance: int = Field(default=6, ge=0, le=64, description="Max differing bits (of 64) for two images to count as the same")
+    image_cache_max_entries: int = Field(default=5000, gt=0, description="Descriptions kept in memory (least recently used dropped)")
+
+    # --- Multi-image Vision ---
+    vision_image_policy: str = Field(default="composite", description="Posts with several images: composite (one tiled image), top_k (separate images)")
+    vision_max_images: int = Field(default=4, gt=0, description="Images tiled / sent per post, most salient first")
+    vision_fetch_images: int = Field(default=6, gt=0, description="Image URLs fetched per post (icons among them are dropped)")
+    vision_max_side: int = Field(default=1024, gt=0, description="Longest side of the composite / each downscaled image (px)")
+    vision_min_image_side: int = Field(default=100, ge=0, description="Images with a shorter side are treated as avatars/icons and dropped")
+    vision_jpeg_quality: int = Field(default=80, ge=1, le=95, description="JPEG quality of re-encoded images")
+
+    # --- Vision Gate ---
+    vision_gate_enabled: bool = Field(default=True, description="Decide per post between text-only and vision from local signals")
+    vision_gate_text_chars: int = Field(default=240, ge=0, description="Post text with this many letters goes text-only (a CJK character counts as 3; 0 = never)")
+    vision_gate_avatar_side: int = Field(default=200, ge=0, description="Near-square images up to this size are treated as avatars")
+    vision_gate_max_aspect: float = Field(default=4.0, gt=1, description="Wider/taller images than this ratio are treated as banners")
+    vision_gate_min_entropy: float = Field(default=2.5, ge=0, le=8, description="Images below this grayscale entropy (bits) are treated as flat/blank")
+    vision_gate_counterfactual_rate: float = Field(default=0.0, ge=0, le=1, description="Share of gated posts that also get a shadow reply from the other branch (not posted)")
+    vision_gate_log_file: str = Field(default="data/vision_gate.jsonl", description="JSON-lines decision / counterfactual log (empty = off)")
+
+    # --- Logging ---
+    log_level: str = Field(default="INFO", description="Root log level")
+    log_file: str = Field(default="data/bot.log", description="Log file path (empty = console only)")
+    log_format: str = Field(default="text", description="Log file format: text, json (one JSON object per line)")
+    log_rotation: str = Field(default="size", description="Rotate the log file by: size, time")
+    log_max_mb: float = Field(default=20, gt=0, description="Size that triggers a rotation (size rotation)")
+    log_rotate_when: str = Field(default="midnight", description="TimedRotatingFileHandler 'when' (time rotation), e.g. midnight, H")
+    log_backup_count: int = Field(default=10, ge=0, description="Rotated log files to keep")
+    log_compress: bool = Field(default=True, description="Gzip rotated log files")
+
+    # --- Notification Polling ---
+    poll_min_interval_seconds: float = Field(default=10, ge=1, description="Shortest wait between notification polls (after activity)")
+    poll_max_interval_seconds: float = Field(default=300, ge=1, description="Longest wait between notification polls (quiet account)")
+    poll_backoff_factor: float = Field(default=2.0, ge=1.0, description="Interval multiplier after an empty poll")
+    poll_jitter_ratio: float = Field(default=0.2, ge=0, le=1, description="Random +/- fraction applied to each interval")
+    poll_quiet_hours: str = Field(default="", description="Local quiet window, e.g. '01:00-07:00' (empty = disabled)")
+    poll_quiet_interval_seconds: float = Field(default=900, ge=1, description="Poll interval used during quiet hours")
+    notification_locales: str = Field(default="en,zh-TW,zh-CN,ja,ko", description="Keyword packs compiled into the notification classifier")
+
+    # --- Metrics ---
+    metrics_enabled: bool = Field(default=True, description="Collect stage timings, counters and gauges")
+    metrics_host: str = Field(default="127.0.0.1", description="Bind address of the Prometheus endpoint")
+    metrics_port: int = Field(default=9464, ge=0, description="Prometheus text endpoint port (0 = off)")
+    metrics_jsonl_file: str = Field(default="", description="Append periodic metric snapshots to this JSONL file (empty = off)")
+    metrics_jsonl_interval_seconds: float = Field(default=60, ge=1, description="Seconds between JSONL snapshots")
+
+    # --- Event Loop Monitor / Profiler ---
+    loop_monitor_enabled: bool = Field(default=True, description="Warn (with stack) when the event loop is blocked")
+    loop_lag_warn_ms: float = Field(default=250, gt=0, description="Loop lag/stall that triggers a warning")
+    profile_seconds: float = Field(default=30, gt=0, description="Default length of a profiler window")
+    profile_sample_ms: float = Field(default=5, gt=0, description="Sampling period of the profiler")
+    profile_flag_file: str = Field(default="data/profile.flag", description="Create this file to start a profiler window (content: seconds)")
+    profile_dir: str = Field(default="data/profiles", description="Where folded-stack profiles are written")
+
+    # --- Session Checkpoint ---
+    checkpoint_enabled: bool = Field(default=True, description="Periodically save loop state and resume from it on start")
+    checkpoint_file: str = Field(default="data/checkpoint.json", description="Checkpoint path (written atomically)")
+    checkpoint_interval_seconds: float = Field(default=120, ge=1, description="Seconds between periodic checkpoints")
+    checkpoint_max_age_hours: float = Field(default=24, gt=0, description="Ignore checkpoints (and unposted replies) older than this")
+
+    # --- Renderer Memory Watchdog ---
+    watchdog_enabled: bool = Field(default=True, description="Recycle the page/context when the renderer grows too large")
+    watchdog_interval_seconds: float = Field(default=60, ge=1, description="Minimum time between renderer metric samples")
+    watchdog_max_js_heap_mb: float = Field(default=400, ge=0, description="JSHeapUsedSize limit in MB (0 = no limit)")
+    watchdog_max_dom_nodes: int = Field(default=150000, ge=0, description="DOM node limit (0 = no limit)")
+    watchdog_max_documents: int = Field(default=50, ge=0, description="Live document limit (0 = no limit)")
+    watchdog_max_rss_mb: float = Field(default=3000, ge=0, description="RSS limit of the bot + browser processes in MB; forces a context recycle (0 = no limit)")
+    watchdog_context_recycle_after: int = Field(default=3, ge=1, description="Page recycles before escalating to a full context recycle")
+    watchdog_metrics_file: str = Field(default="data/renderer_metrics.jsonl", description="JSONL export of watchdog samples (empty = off)")
+
+    # --- Reply Flow Waits ---
+    reply_open_timeout_seconds: float = Field(default=10, gt=0, description="Max wait for the reply modal/composer to open")
+    reply_focus_timeout_seconds: float = Field(default=3, gt=0, description="Max wait for the reply textbox to take focus")
+    reply_send_enabled_timeout_seconds: float = Field(default=5, gt=0, description="Max wait for the send button to become enabled")
+    reply_close_timeout_seconds: float = Field(default=15, gt=0, description="Max wait for the modal to close / textbox to clear after sending")
+
     # --- Safety ---
     max_comments_per_session: int = Field(default=10, ge=1)
     min_delay_seconds: int = Field(default=5, ge=1)
@@ -1,55 +1,203 @@
 from abc import ABC, abstractmethod
+from email.utils import parsedate_to_datetime
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import openai
 from openai import AsyncOpenAI
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from google.generativeai.types import BlockedPromptException, StopCandidateException
 from config import settings
+from core import metrics
+from core.language import LANGUAGE_NAMES, UNDETERMINED, clip_reply, reply_limit
+from core.rate_limiter import estimate_tokens, get_limiter
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+# --- Error taxonomy ---
+# Providers translate SDK errors into these so the main loops can decide
+# between backing off, skipping the post and stopping the session.
+
+class LLMError(Exception):
+    """Base class for classified provider errors."""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitedError(LLMError):
+    """Too many requests right now; retry after `retry_after` seconds (if the provider said)."""
+
+
+class QuotaExhaustedError(LLMError):
+    """Billing / daily quota used up - retrying will not help this session."""
+
+
+class TransientLLMError(LLMError):
+    """Timeouts, connection drops, 5xx - safe to retry after a backoff."""
+
+
+class ContentRejectedError(LLMError):
+    """The provider refused this input/output (safety filter); skip the post."""
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_retry_after(value) -> float:
+    """
+    Seconds from a Retry-After style value: "12", "1.5", an HTTP date, or a
+    Go-style duration as in x-ratelimit-reset-* ("6m0s", "250ms"). None if unparseable.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_after_from_headers(headers) -> float:
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        ms = parse_retry_after(headers.get("retry-after-ms"))
+        if ms is not None:
+            return ms / 1000
+    for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        seconds = parse_retry_after(headers.get(name))
+        if seconds is not None:
+            return seconds
+    return None
+
+
+# Added in openai 1.40; older SDKs never raise it (isinstance against () is False)
+_OPENAI_CONTENT_FILTER_ERROR = getattr(openai, "ContentFilterFinishReasonError", ())
+
+
+def classify_openai_error(e: Exception) -> Optional[LLMError]:
+    """Map an OpenAI-compatible SDK error (OpenAI, Ollama) to the taxonomy; None for unknown errors."""
+    if isinstance(e, openai.RateLimitError):
+        if getattr(e, "code", None) == "insufficient_quota" or "insufficient_quota" in str(e):
+            return QuotaExhaustedError(str(e))
+        return RateLimitedError(str(e), _retry_after_from_headers(e.response.headers))
+    if isinstance(e, (openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)):
+        return TransientLLMError(str(e))
+    if isinstance(e, openai.APIStatusError) and (e.status_code >= 500 or e.status_code in (408, 409)):
+        return TransientLLMError(str(e), _retry_after_from_headers(e.response.headers))
+    if isinstance(e, _OPENAI_CONTENT_FILTER_ERROR) or (
+        isinstance(e, openai.BadRequestError) and getattr(e, "code", None) in ("content_policy_violation", "content_filter")
+    ):
+        return ContentRejectedError(str(e))
+    return None
+
+
+_GOOGLE_RETRY_IN = re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+
+
+def classify_google_error(e: Exception) -> Optional[LLMError]:
+    """Map a google-generativeai / api_core error to the taxonomy; None for unknown errors."""
+    if isinstance(e, google_exceptions.ResourceExhausted):
+        message = str(e)
+        if "PerDay" in message or "per day" in message.lower() or "billing" in message.lower():
+            return QuotaExhaustedError(message)
+        retry_after = None
+        for detail in getattr(e, "details", None) or ():
+            delay = getattr(detail, "retry_delay", None)
+            if delay is not None:
+                retry_after = delay.seconds + delay.nanos / 1e9
+        if retry_after is None:
+            match = _GOOGLE_RETRY_IN.search(message)
+            retry_after = float(match.group(1)) if match else None
+        return RateLimitedError(message, retry_after)
+    if isinstance(e, (google_exceptions.ServiceUnavailable, google_exceptions.InternalServerError,
+                      google_exceptions.DeadlineExceeded, google_exceptions.GatewayTimeout)):
+        return TransientLLMError(str(e))
+    if isinstance(e, (BlockedPromptException, StopCandidateException)):
+        return ContentRejectedError(str(e))
+    return None
+
+
 class LLMProvider(ABC):
+    model_name: str = ""
+    # Filled by generate() for the rate limiter: total tokens used and response headers (if available)
+    last_usage: int = None
+    last_headers = None
+
     @abstractmethod
-    async def generate(self, system_prompt: str, user_content: str, image_base64: str = None) -> str:
+    async def generate(self, system_prompt: str, user_content: str, images: Sequence[str] = ()) -> str:
+        """images: base64 JPEG payloads (see core.vision), sent in order after the text."""
         pass
 
+async def _openai_create(provider: LLMProvider, **kwargs):
+    """chat.completions.create that also keeps the rate-limit headers and usage."""
+    raw = await provider.client.chat.completions.with_raw_response.create(**kwargs)
+    provider.last_headers = raw.headers
+    response = raw.parse()
+    provider.last_usage = response.usage.total_tokens if response.usage else None
+    return response
+
+
+def _openai_user_message(user_content: str, images: Sequence[str]) -> dict:
+    if not images:
+        return {"role": "user", "content": user_content}
+    # OpenAI Vision format: the text part followed by one image_url part per image
+    content: List[dict] = [{"type": "text", "text": user_content}]
+    content.extend({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image}"}} for image in images)
+    return {"role": "user", "content": content}
+
+
+def _openai_text(response) -> str:
+    choice = response.choices[0]
+    if choice.message.content is None:
+        if choice.finish_reason == "content_filter":
+            raise ContentRejectedError("Completion blocked by the content filter")
+        raise LLMError(f"Empty completion (finish_reason={choice.finish_reason})")
+    return choice.message.content.strip()
+
+
 class OpenAIProvider(LLMProvider):
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        # Retries are owned by the main loop's backoff (see RetryBackoff), not the SDK
+        self.client = AsyncOpenAI(api_key=settings.openai_api_key, max_retries=0)
         self.model = settings.openai_model
+        self.model_name = self.model
 
-    async def generate(self, system_prompt: str, user_content: str, image_base64: str = None) -> str:
+    async def generate(self, system_prompt: str, user_content: str, images: Sequence[str] = ()) -> str:
         messages = [
             {"role": "system", "content": system_prompt}
         ]
         
-        if image_base64:
-            # Multimodal payload
-            user_msg = {
-                "role": "user", 
-                "content": [
-                    {"type": "text", "text": user_content},
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_base64}"
-                        }
-                    }
-                ]
-            }
-            messages.append(user_msg)
-        else:
-            # Text-only payload
-            messages.append({"role": "user", "content": user_content})
+        messages.append(_openai_user_message(user_content, images))
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await _openai_create(
+                self,
                 model=self.model,
                 messages=messages,
                 max_tokens=200
             )
-            return response.choices[0].message.content.strip()
         except Exception as e:
             logger.error(f"OpenAI generation failed: {e}")
-            raise
+            classified = classify_openai_error(e)
+            if classified is None:
+                raise  # not in the taxonomy: keep the original error and traceback
+            raise classified from e
+        return _openai_text(response)
 
 class GoogleProvider(LLMProvider):
     def __init__(self):
@@ -57,73 +205,106 @@ class GoogleProvider(LLMProvider):
         # Verify model supports vision? Assuming gemini-pro-vision or similar if needed, 
         # but modern 'gemini-pro' or 'gemini-1.5-flash' handles both.
         self.model = genai.GenerativeModel(settings.google_model)
+        self.model_name = settings.google_model
 
-    async def generate(self, system_prompt: str, user_content: str, image_base64: str = None) -> str:
+    async def generate(self, system_prompt: str, user_content: str, images: Sequence[str] = ()) -> str:
         content_parts = [system_prompt, "\n\nUser Post: " + user_content]
         
-        if image_base64:
-             # Convert base64 back to bytes for Gemini? 
-             # Gemini API often takes a specific dict for blob
+        for image in images:
+             # Gemini takes images as inline blobs
              import base64
-             image_data = {
+             content_parts.append({
                  'mime_type': 'image/jpeg',
-                 'data': base64.b64decode(image_base64)
-             }
-             content_parts.append(image_data)
+                 'data': base64.b64decode(image)
+             })
 
         try:
             response = await self.model.generate_content_async(content_parts)
-            return response.text.strip()
         except Exception as e:
             logger.error(f"Google Gemini generation failed: {e}")
-            raise
+            classified = classify_google_error(e)
+            if classified is None:
+                raise  # not in the taxonomy: keep the original error and traceback
+            raise classified from e
+        usage = getattr(response, "usage_metadata", None)
+        self.last_usage = getattr(usage, "total_token_count", None) or None
+        try:
+            return response.text.strip()
+        except ValueError as e:
+            # .text raises when the candidate was blocked (safety) and has no parts
+            raise ContentRejectedError(f"Gemini returned no text: {e}") from e
 
 class OllamaProvider(LLMProvider):
     def __init__(self):
         # Ollama is OpenAI-compatible
         self.client = AsyncOpenAI(
             base_url=settings.ollama_base_url,
-            api_key="ollama" 
+            api_key="ollama",
+            max_retries=0
         )
         self.model = settings.ollama_model
+        self.model_name = self.model
 
-    async def generate(self, system_prompt: str, user_content: str, image_base64: str = None) -> str:
+    async def generate(self, system_prompt: str, user_content: str, images: Sequence[str] = ()) -> str:
         messages = [
             {"role": "system", "content": system_prompt}
         ]
 
-        if image_base64:
-             # Standard OpenAI Vision format
-            user_msg = {
-                "role": "user", 
-                "content": [
-                    {"type": "text", "text": user_content},
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_base64}"
-                        }
-                    }
-                ]
-            }
-            messages.append(user_msg)
-        else:
-            messages.append({"role": "user", "content": user_content})
+        messages.append(_openai_user_message(user_content, images))
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await _openai_create(
+                self,
                 model=self.model,
                 messages=messages,
                 max_tokens=200
             )
-            return response.choices[0].message.content.strip()
         except Exception as e:
             logger.error(f"Ollama generation failed: {e}")
-            raise
+            classified = classify_openai_error(e)
+            if classified is None:
+                raise  # not in the taxonomy: keep the original error and traceback
+            raise classified from e
+        return _openai_text(response)
+
+# Asked for alongside a vision reply so the image can later be answered text-only
+# from core.image_cache; split_image_description() takes the line off again.
+IMAGE_DESCRIPTION_PROMPT = (
+    "\n\nAfter your reply, add one final line starting with 'IMAGE:' that describes the image "
+    "neutrally in at most 25 English words. That line is removed before posting."
+)
+# Models don't stick to the format: "**IMAGE:** ...", "Image - ...", "*Image description: ...*",
+# or "IMAGE: ..." tacked onto the reply line. Any case at line start (bullets/markdown allowed),
+# bold or upper-case anywhere else; the marker and the rest of its line come off.
+_IMAGE_MARKER = re.compile(
+    r"(?:^[ \t>#*_`•-]*\[?(?i:image(?:[ \t]+description)?)\]?[*_`]*[ \t]*(?::|：|[ \t][-–—])"
+    r"|(?:\*\*|__)(?i:image(?:[ \t]+description)?)[ \t]*:?[ \t]*(?:\*\*|__)[ \t]*:?"
+    r"|\bIMAGE(?:[ \t]+DESCRIPTION)?[ \t]*:)"
+    r"[*_` \t]*(?P<description>[^\n]*?)[*_` \t]*$",
+    re.MULTILINE,
+)
+MAX_IMAGE_DESCRIPTION_CHARS = 300
+
+
+def split_image_description(text: str) -> Tuple[str, Optional[str]]:
+    """(reply, description); every image line is removed from the reply, the last one is the description."""
+    matches = list(_IMAGE_MARKER.finditer(text))
+    if not matches:
+        return text.strip(), None
+    descriptions = [m.group("description") for m in matches if m.group("description")]
+    reply = _IMAGE_MARKER.sub("", text)
+    reply = re.sub(r"[ \t]+\n", "\n", reply)
+    reply = re.sub(r"\n{3,}", "\n\n", reply).strip()
+    description = descriptions[-1][:MAX_IMAGE_DESCRIPTION_CHARS] if descriptions else None
+    return reply, description
+
 
 class BotBrain:
     def __init__(self):
         self.provider = self._get_provider()
+        self._prompts: Dict[str, str] = {}
+        # Description returned with the last vision reply (describe_image=True)
+        self.last_image_description: Optional[str] = None
         logger.info(f"BotBrain initialized with provider: {settings.llm_provider}")
 
     def _get_provider(self) -> LLMProvider:
@@ -135,13 +316,65 @@ class BotBrain:
         else:
             return OpenAIProvider()
 
-    async def generate_comment(self, text_content: str, image_base64: str = None) -> str:
+    def system_prompt(self, language: str = None) -> str:
+        """
+        Persona prompt for a detected language: PROMPT_VARIANTS_DIR/persona.<lang>.txt
+        if it exists, otherwise the base persona plus a language / length line.
+        """
+        if not language or language == UNDETERMINED:
+            return settings.persona_prompt
+        prompt = self._prompts.get(language)
+        if prompt is None:
+            try:
+                prompt = (Path(settings.prompt_variants_dir) / f"persona.{language}.txt").read_text(encoding="utf-8").strip()
+            except OSError:
+                name = LANGUAGE_NAMES.get(language, language)
+                limit, unit = reply_limit(language)
+                prompt = f"{settings.persona_prompt}\n\nThe post is in {name}. Reply in {name}" + (f", max {limit} {unit}." if limit else ".")
+            self._prompts[language] = prompt
+        return prompt
+
+    async def generate_comment(self, text_content: str, images: Sequence[str] = (), language: str = None,
+                               image_description: str = None, describe_image: bool = False) -> str:
+        """
+        images are prepared payloads (core.vision.prepare_images). image_description
+        replaces the image with a cached description (text-only request);
+        describe_image asks the vision model for one (single image only), left in
+        last_image_description.
+        """
+        self.last_image_description = None
         if settings.dry_run:
             logger.info("[DRY_RUN] Generating mock comment")
             return "This is a dry-run comment mock!"
             
-        return await self.provider.generate(
-            system_prompt=settings.persona_prompt,
-            user_content=text_content,
-            image_base64=image_base64
-        )
+        system_prompt = self.system_prompt(language)
+        describe_image = describe_image and len(images) == 1
+        if describe_image:
+            system_prompt += IMAGE_DESCRIPTION_PROMPT
+        if image_description and not images:
+            text_content = f"{text_content}\n\n[Attached image: {image_description}]"
+        limiter = get_limiter(settings.llm_provider, self.provider.model_name)
+        estimate = estimate_tokens(system_prompt, text_content, images=len(images))
+        await limiter.acquire(estimate)
+        self.provider.last_usage = self.provider.last_headers = None
+        with metrics.timer("llm_generate", provider=settings.llm_provider, vision=bool(images)) as t:
+            try:
+                comment = await self.provider.generate(
+                    system_prompt=system_prompt,
+                    user_content=text_content,
+                    images=images
+                )
+            except RateLimitedError as e:
+                limiter.on_rate_limited(e.retry_after)
+                raise
+        limiter.on_success(estimate, self.provider.last_usage, self.provider.last_headers)
+        logger.info(f"   🧠 Comment generated in {t.seconds:.1f}s", extra={"stage": "llm_generate", "duration": t.seconds})
+        if describe_image:
+            comment, self.last_image_description = split_image_description(comment)
+        if language and language != UNDETERMINED:
+            clipped = clip_reply(comment, language)
+            if clipped != comment:
+                logger.info(f"   ✂️  Reply trimmed to the {language} length limit ({len(comment)} -> {len(clipped)} chars)")
+                metrics.inc("replies_clipped", language=language)
+                comment = clipped
+        return comment
@@ -6,13 +6,62 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Rendering presets. "low" trades visual fidelity for CPU/memory on long sessions;
+# 1024x720 still gets the desktop layouts (sidebar nav, feed articles) the selectors target.
+RENDER_PROFILES = {
+    "default": {
+        "viewport": {"width": 1280, "height": 800},
+        "reduced_motion": "no-preference",
+        "args": [],
+        "headless_args": [],
+        "disable_animations": False,
+        "js_heap_mb": 0,
+    },
+    "low": {
+        "viewport": {"width": 1024, "height": 720},
+        "reduced_motion": "reduce",
+        "args": ["--disable-smooth-scrolling"],
+        # Nobody looks at a headless window: no GPU process, no GPU compositing
+        "headless_args": ["--disable-gpu", "--disable-gpu-compositing", "--disable-features=PaintHolding"],
+        "disable_animations": True,
+        "js_heap_mb": 512,
+    },
+}
+
+# Sites that ignore prefers-reduced-motion still get their animations switched off
+_NO_ANIMATION_SCRIPT = """
+document.addEventListener('DOMContentLoaded', () => {
+  const style = document.createElement('style');
+  style.textContent = '*, *::before, *::after { animation: none !important; transition: none !important; scroll-behavior: auto !important; }';
+  document.head.appendChild(style);
+});
+"""
+
 class BrowserEngine:
-    def __init__(self):
+    def __init__(self, record_har_path: str = None, replay_har_path: str = None, headless: bool = None,
+                 persist_session: bool = True, render_profile: str = None):
+        """
+        record_har_path: record all network traffic of the session into this HAR file.
+        replay_har_path: serve all requests from this HAR file (offline replay).
+        headless: override settings.headless (e.g. for benchmarks).
+        persist_session: save cookies back to auth.json on stop (off for replays/fake platforms).
+        render_profile: key of RENDER_PROFILES (default: settings.render_profile).
+        """
+        self.record_har_path = record_har_path
+        self.replay_har_path = replay_har_path
+        self.headless = settings.headless if headless is None else headless
+        self.persist_session = persist_session and not replay_har_path
+        self.render_profile = render_profile or settings.render_profile
+        if self.render_profile not in RENDER_PROFILES:
+            raise ValueError(f"Unknown render profile '{self.render_profile}'. Options: {', '.join(RENDER_PROFILES)}")
         self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
         self.stealth = Stealth() # Instantiate Stealth
+        # Async callables run on every new context, e.g. extra routes for benchmarks.
+        # They are re-applied when the context is recycled.
+        self.context_hooks = []
         
         # Ensure directory exists
         os.makedirs(settings.user_data_dir, exist_ok=True)
@@ -25,24 +74,56 @@ class BrowserEngine:
         # Load storage state if exists
         storage_state = self.auth_path if os.path.exists(self.auth_path) else None
         
+        profile = RENDER_PROFILES[self.render_profile]
+        render_args = list(profile["args"])
+        if self.headless:
+            render_args += profile["headless_args"]
+        js_heap_mb = settings.render_js_heap_mb or profile["js_heap_mb"]
+        if js_heap_mb:
+            render_args.append(f"--js-flags=--max-old-space-size={js_heap_mb}")
+
         # Enhanced Launch Args for Anti-Detection
         self.browser = await self.playwright.chromium.launch(
-            headless=settings.headless,
+            headless=self.headless,
             args=[
                 "--disable-blink-features=AutomationControlled",
                 "--no-sandbox",
                 "--disable-infobars",
                 "--disable-extensions",
                 "--disable-dev-shm-usage",
-            ]
+            ] + render_args
         )
-        
+        logger.info(f"🎨 Render profile: {self.render_profile}")
+        await self._open_context(storage_state)
+
+    async def _open_context(self, storage_state):
+        """Create the browser context and its first (stealth) page."""
+        profile = RENDER_PROFILES[self.render_profile]
+        context_options = {}
+        if self.record_har_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.record_har_path)), exist_ok=True)
+            context_options.update(record_har_path=self.record_har_path, record_har_content="attach")
+            logger.info(f"📼 Recording network traffic to {self.record_har_path}")
+
         self.context = await self.browser.new_context(
             storage_state=storage_state,
-            viewport={"width": 1280, "height": 800},
+            viewport=profile["viewport"],
+            reduced_motion=profile["reduced_motion"],
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            locale="zh-TW"
+            locale="zh-TW",
+            **context_options
         )
+
+        if self.replay_har_path:
+            # Anything not in the archive is aborted, so replay never touches the network
+            await self.context.route_from_har(self.replay_har_path, not_found="abort")
+            logger.info(f"📼 Replaying network traffic from {self.replay_har_path}")
+
+        if profile["disable_animations"]:
+            await self.context.add_init_script(_NO_ANIMATION_SCRIPT)
+
+        for hook in self.context_hooks:
+            await hook(self.context)
         
         self.page = await self.context.new_page()
         
@@ -50,9 +131,47 @@ class BrowserEngine:
         await self.stealth.apply_stealth_async(self.page)
         logger.info("🛡️  Stealth Mode Activated.")
 
+    async def recycle_page(self):
+        """
+        Replace the page with a fresh one at the same URL, dropping the old
+        renderer's DOM and JS heap. Adapters must forget cached page handles
+        (BaseAdapter.on_page_recycled).
+        """
+        old_page = self.page
+        url = old_page.url if old_page else ""
+        self.page = await self.context.new_page()
+        await self.stealth.apply_stealth_async(self.page)
+        if old_page:
+            await old_page.close()
+        if url.startswith("http"):
+            await self.page.goto(url, timeout=60000)
+        logger.info(f"♻️  Page recycled ({url or 'blank'})")
+
+    async def recycle_context(self):
+        """
+        Replace the whole context (cookies carried over in memory), releasing
+        everything the old one accumulated. Falls back to recycle_page while
+        recording a HAR, since a new context would start a new archive.
+        """
+        if self.record_har_path:
+            logger.info("♻️  Recording HAR: recycling the page instead of the context.")
+            await self.recycle_page()
+            return
+        url = self.page.url if self.page else ""
+        storage_state = await self.context.storage_state()
+        if self.persist_session:
+            await self.context.storage_state(path=self.auth_path)
+        await self.context.close()
+        await self._open_context(storage_state)
+        if url.startswith("http"):
+            await self.page.goto(url, timeout=60000)
+        logger.info(f"♻️  Context recycled ({url or 'blank'})")
+
     async def stop(self):
         if self.context:
-            await self.context.storage_state(path=self.auth_path)
+            # Never let an offline replay / fake platform overwrite the real session cookies
+            if self.persist_session:
+                await self.context.storage_state(path=self.auth_path)
             await self.context.close()
         if self.browser:
             await self.browser.close()
@@ -0,0 +1,195 @@
+"""
+Session checkpoint for fast warm restarts.
+
+Everything the loops know besides reply_history lives in memory: the feed
+seen-set, the scroll position, the notification cursor and replies that were
+generated but not posted yet. SessionCheckpoint writes that state to a small
+JSON file in data/ every few minutes (and right after each generated reply),
+atomically (temp file + fsync + os.replace, off the event loop), and hands it
+back on the next start.
+
+Pending replies are keyed by the same key the rest of the state uses for
+the item: the feed observer key for observed feeds (also what feed_seen
+holds), a digest of the post text for other feeds (feed IDs are not stable
+across processes) and the notification identity for notifications.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from config import settings
+from core import clock, metrics
+from core.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+VERSION = 2
+
+
+def content_digest(text: str) -> str:
+    normalized = " ".join((text or "").split())[:500]
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: str, data: str):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SessionCheckpoint:
+    def __init__(self, platform: str, mode: str, path: str = None, interval: float = None,
+                 max_age_hours: float = None):
+        self.platform = platform
+        self.mode = mode
+        self.path = path or settings.checkpoint_file
+        self.interval = interval if interval is not None else settings.checkpoint_interval_seconds
+        self.max_age_seconds = (max_age_hours if max_age_hours is not None else settings.checkpoint_max_age_hours) * 3600
+
+        # post key (see post_key) or notification ID -> {"post_id", "comment", "created_at"}
+        self.pending: Dict[str, dict] = {}
+        self.cursor_ids: list = []
+        self.restored: Dict[str, float] = {}
+        self.reused_replies = 0
+        self.reused_tokens = 0
+        self._last_save: Optional[float] = None
+        self._adapter = None
+
+    # --- loading ---
+
+    def load(self) -> dict:
+        """The saved state if it matches this platform/mode and is fresh enough, else {}."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return {}
+        age = time.time() - state.get("saved_at", 0)
+        if state.get("version") != VERSION or state.get("platform") != self.platform or state.get("mode") != self.mode:
+            logger.info("Checkpoint is for another platform/mode; starting fresh.")
+            return {}
+        if age > self.max_age_seconds:
+            logger.info(f"Checkpoint is {age / 3600:.1f}h old; starting fresh.")
+            return {}
+        return state
+
+    async def resume(self, adapter, restore_scroll: bool = None) -> dict:
+        """Load the checkpoint and apply it to the adapter. Call after login()."""
+        self._adapter = adapter
+        state = self.load()
+        if not state:
+            return {}
+        now = time.time()
+        self.pending = {k: v for k, v in state.get("pending_replies", {}).items()
+                        if now - v.get("created_at", 0) <= self.max_age_seconds}
+        self.cursor_ids = state.get("notification_cursor", [])
+        restore_scroll = (self.mode == "feed") if restore_scroll is None else restore_scroll
+        reached = await adapter.restore_state(state.get("adapter", {}), restore_scroll=restore_scroll)
+        self.restored = {
+            "age_seconds": now - state["saved_at"],
+            "seen_posts": len(state.get("adapter", {}).get("feed_seen", [])),
+            "pending_replies": len(self.pending),
+            "cursor_ids": len(self.cursor_ids),
+            "scroll_y": reached or 0,
+        }
+        logger.info(
+            f"♻️  Resumed checkpoint from {self.restored['age_seconds'] / 60:.0f} min ago: "
+            f"{self.restored['seen_posts']} seen posts, {self.restored['pending_replies']} unposted replies, "
+            f"{self.restored['cursor_ids']} cursor IDs" + (f", scroll y={reached:.0f}" if reached else "")
+        )
+        return state
+
+    def merge_cursor(self, cursor):
+        """Add checkpointed notification IDs the DB cursor doesn't have yet."""
+        for notif_id in self.cursor_ids:
+            if notif_id not in cursor:
+                cursor.add(notif_id)
+
+    # --- pending replies ---
+
+    @staticmethod
+    def post_key(post) -> str:
+        """Checkpoint key of a feed post: its observer key, else a digest of its text."""
+        return post.key or content_digest(post.content)
+
+    def pending_reply(self, key: str, content: str = "") -> Optional[str]:
+        """A reply generated before the restart for this item, if any (counted as reused)."""
+        entry = self.pending.get(key)
+        if entry is None:
+            return None
+        self.reused_replies += 1
+        self.reused_tokens += estimate_tokens(settings.persona_prompt, content)
+        metrics.inc("checkpoint_reused_replies")
+        return entry["comment"]
+
+    async def add_pending(self, key: str, post_id: str, comment: str):
+        """Remember a generated reply and checkpoint right away (LLM output is the costly part)."""
+        self.pending[key] = {"post_id": post_id, "comment": comment, "created_at": time.time()}
+        await self.save()
+
+    def resolve(self, key: str):
+        """The reply was posted (or given up on); forget it."""
+        self.pending.pop(key, None)
+
+    # --- saving ---
+
+    async def maybe_save(self, cursor=None):
+        if self._last_save is None or clock.monotonic() - self._last_save >= self.interval:
+            await self.save(cursor)
+
+    async def save(self, cursor=None):
+        self._last_save = clock.monotonic()
+        if cursor is not None:
+            self.cursor_ids = cursor.ids
+        adapter_state = {}
+        if self._adapter is not None:
+            try:
+                adapter_state = await self._adapter.export_state()
+            except Exception as e:
+                logger.debug(f"Checkpoint could not read adapter state: {e}")
+        state = {
+            "version": VERSION,
+            "platform": self.platform,
+            "mode": self.mode,
+            "saved_at": time.time(),
+            "adapter": adapter_state,
+            "notification_cursor": self.cursor_ids,
+            "pending_replies": self.pending,
+        }
+        try:
+            with metrics.timer("checkpoint"):
+                await asyncio.to_thread(_write_atomic, self.path, json.dumps(state, ensure_ascii=False))
+        except OSError as e:
+            logger.warning(f"Checkpoint write failed: {e}")
+
+    # --- reporting ---
+
+    def work_saved(self) -> dict:
+        observer = getattr(self._adapter, "feed_observer", None)
+        return {
+            **self.restored,
+            "skipped_seen_posts": observer.restored_hits if observer is not None else 0,
+            "reused_replies": self.reused_replies,
+            "reused_tokens_estimate": self.reused_tokens,
+        }
+
+    def log_work_saved(self):
+        if not self.restored:
+            return
+        saved = self.work_saved()
+        logger.info(
+            f"   [Checkpoint] Work saved by resuming: {saved['skipped_seen_posts']} already-seen posts skipped, "
+            f"{saved['reused_replies']} replies reused (~{saved['reused_tokens_estimate']} LLM tokens)"
+        )
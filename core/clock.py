@@ -0,0 +1,139 @@
+"""
+Clock abstraction for all pacing (human delays, reply spacing, poll waits).
+
+Production uses RealClock, which is exactly asyncio.sleep + the global
+`random` module. Benchmarks install a VirtualClock: sleeps advance a virtual
+timestamp instantly and all randomness comes from a seeded generator, so an
+end-to-end run is reproducible and finishes in seconds instead of hours.
+
+Call sites use the module-level helpers so the active clock can be swapped:
+
+    from core import clock
+    await clock.sleep(settings.min_delay_seconds)
+    await clock.human_delay(1.0, 3.0)
+"""
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from core import metrics
+
+
+class RealClock:
+    """Wall-clock time and the process-wide random generator."""
+
+    def __init__(self, rng: random.Random = None):
+        # The `random` module itself by default, so production behaviour is unchanged
+        self.random = rng or random
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+    async def wait_event(self, event: asyncio.Event, timeout: float) -> bool:
+        """Wait for `event` up to `timeout` seconds; True if it was set."""
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return event.is_set()
+
+    def keystroke_delay_ms(self) -> int:
+        """Per-key typing delay passed to Playwright."""
+        return self.random.randint(50, 150)
+
+
+class VirtualClock(RealClock):
+    """
+    Time only moves when someone sleeps; sleeping returns immediately.
+    `slept` is the total virtual time skipped, i.e. wall time saved.
+    """
+
+    def __init__(self, seed: int = 0, start: datetime = None):
+        super().__init__(random.Random(seed))
+        self._start = start or datetime.now()
+        self._now = 0.0
+        self.slept = 0.0
+        self.sleeps = 0
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def now(self) -> datetime:
+        return self._start + timedelta(seconds=self._now)
+
+    def advance(self, seconds: float):
+        seconds = max(0.0, seconds)
+        self._now += seconds
+        self.slept += seconds
+        self.sleeps += 1
+
+    async def sleep(self, seconds: float):
+        self.advance(seconds)
+        # Still yield so other tasks (observers, watchers) get to run
+        await asyncio.sleep(0)
+
+    async def wait_event(self, event: asyncio.Event, timeout: float) -> bool:
+        await asyncio.sleep(0)
+        if event.is_set():
+            return True
+        self.advance(timeout)
+        await asyncio.sleep(0)
+        return event.is_set()
+
+    def keystroke_delay_ms(self) -> int:
+        self.random.randint(50, 150)  # keep the random stream identical to a real run
+        return 0
+
+
+_clock = RealClock()
+
+
+def get_clock() -> RealClock:
+    return _clock
+
+
+def set_clock(clock: RealClock) -> RealClock:
+    """Install `clock` globally; returns the previous one."""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+def monotonic() -> float:
+    return _clock.monotonic()
+
+
+def now() -> datetime:
+    return _clock.now()
+
+
+async def sleep(seconds: float):
+    metrics.observe("sleep", seconds)
+    await _clock.sleep(seconds)
+
+
+async def human_delay(min_s: float = 1.0, max_s: float = 3.0):
+    await sleep(_clock.random.uniform(min_s, max_s))
+
+
+async def wait_event(event: asyncio.Event, timeout: float) -> bool:
+    return await _clock.wait_event(event, timeout)
+
+
+def uniform(a: float, b: float) -> float:
+    return _clock.random.uniform(a, b)
+
+
+def randint(a: int, b: int) -> int:
+    return _clock.random.randint(a, b)
+
+
+def keystroke_delay_ms() -> int:
+    return _clock.keystroke_delay_ms()
@@ -1,5 +1,59 @@
 import aiosqlite
+import json
 import os
+from typing import Dict, Iterable
+
+
+class NotificationCursor:
+    """
+    Per-platform high-water mark for notification sync.
+    Keeps the most recent handled notification identities (oldest first,
+    bounded) so parsing can stop at the first already-seen item.
+
+    Items whose reply failed or was rate limited are not handled: they go into
+    `unresolved` (id -> failed attempts). While any are pending, adapters read
+    past handled items instead of stopping (see `reached`), so the retries are
+    offered again; after `max_attempts` an item is given up and marked handled.
+    """
+    def __init__(self, platform: str, ids: Iterable[str] = (), max_size: int = 500,
+                 unresolved: Dict[str, int] = None, max_attempts: int = 3):
+        self.platform = platform
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self._ids = dict.fromkeys(ids)  # insertion-ordered set
+        self.unresolved: Dict[str, int] = dict(unresolved or {})
+
+    def __contains__(self, notif_id: str) -> bool:
+        return notif_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def reached(self, notif_id: str) -> bool:
+        """Parsing can stop here: the item was handled and nothing older awaits a retry."""
+        return notif_id in self._ids and not self.unresolved
+
+    def add(self, notif_id: str):
+        """Mark handled (replied to or deliberately skipped)."""
+        self.unresolved.pop(notif_id, None)
+        self._ids.pop(notif_id, None)
+        self._ids[notif_id] = None
+        while len(self._ids) > self.max_size:
+            self._ids.pop(next(iter(self._ids)))
+
+    def defer(self, notif_id: str) -> bool:
+        """Count a failed attempt; False once the item is given up (and marked handled)."""
+        attempts = self.unresolved.get(notif_id, 0) + 1
+        if attempts >= self.max_attempts:
+            self.add(notif_id)
+            return False
+        self.unresolved[notif_id] = attempts
+        return True
+
+    @property
+    def ids(self) -> list:
+        return list(self._ids)
+
 
 class Database:
     def __init__(self, db_path="data/history.db"):
@@ -15,6 +69,22 @@ class Database:
                     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS notification_cursor (
+                    platform TEXT PRIMARY KEY,
+                    seen_ids TEXT,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS image_descriptions (
+                    image_hash TEXT PRIMARY KEY,
+                    description TEXT,
+                    hits INTEGER DEFAULT 0,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    last_used DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
             await db.commit()
 
     async def is_replied(self, post_id: str) -> bool:
@@ -29,3 +99,47 @@ class Database:
                 (post_id, reply_content)
             )
             await db.commit()
+
+    async def load_notification_cursor(self, platform: str) -> NotificationCursor:
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("SELECT seen_ids FROM notification_cursor WHERE platform = ?", (platform,)) as cursor:
+                row = await cursor.fetchone()
+        state = json.loads(row[0]) if row and row[0] else []
+        if isinstance(state, list):  # stored before unresolved items were kept
+            state = {"ids": state}
+        return NotificationCursor(platform, state.get("ids", ()), unresolved=state.get("unresolved"))
+
+    async def save_notification_cursor(self, cursor: NotificationCursor):
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "INSERT OR REPLACE INTO notification_cursor (platform, seen_ids, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+                (cursor.platform, json.dumps({"ids": cursor.ids, "unresolved": cursor.unresolved}))
+            )
+            await db.commit()
+
+    async def load_image_descriptions(self, prefix: str, limit: int) -> list:
+        """[(image_hash, description)] for one hash algorithm, most recently used first."""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT image_hash, description FROM image_descriptions WHERE image_hash LIKE ? "
+                "ORDER BY last_used DESC LIMIT ?",
+                (prefix + "%", limit)
+            ) as cursor:
+                return list(await cursor.fetchall())
+
+    async def save_image_description(self, image_hash: str, description: str):
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "INSERT OR REPLACE INTO image_descriptions (image_hash, description, last_used) "
+                "VALUES (?, ?, CURRENT_TIMESTAMP)",
+                (image_hash, description)
+            )
+            await db.commit()
+
+    async def touch_image_description(self, image_hash: str):
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "UPDATE image_descriptions SET hits = hits + 1, last_used = CURRENT_TIMESTAMP WHERE image_hash = ?",
+                (image_hash,)
+            )
+            await db.commit()
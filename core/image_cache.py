@@ -0,0 +1,146 @@
+"""
+Perceptual-hash cache of image descriptions for vision requests.
+
+The same memes, screenshots and brand images show up in many posts. The first
+time an image is sent to the vision model, BotBrain also asks for a one-line
+neutral description of it; that description is stored under the image's
+64-bit perceptual hash (dHash by default, pHash optional) in the reply history
+database. Later images within IMAGE_HASH_MAX_DISTANCE bits are answered with a
+text-only request that carries the cached description instead of the image.
+
+Hashing decodes the image with Pillow, so it runs in a worker thread.
+"""
+import asyncio
+import base64
+import binascii
+import io
+import logging
+import math
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from config import settings
+from core import metrics
+from core.rate_limiter import CHARS_PER_TOKEN, IMAGE_TOKENS
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 8  # 8x8 = 64-bit hashes
+_DCT_SIZE = 32
+# Low-frequency DCT-II basis rows for pHash
+_COS = [[math.cos((2 * x + 1) * u * math.pi / (2 * _DCT_SIZE)) for x in range(_DCT_SIZE)] for u in range(HASH_SIZE)]
+
+
+def dhash(image: Image.Image) -> int:
+    """Difference hash: is each pixel brighter than its right neighbour (9x8 grayscale)."""
+    width = HASH_SIZE + 1
+    pixels = image.convert("L").resize((width, HASH_SIZE), Image.Resampling.LANCZOS).tobytes()
+    bits = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            i = row * width + col
+            bits = (bits << 1) | (pixels[i] > pixels[i + 1])
+    return bits
+
+
+def phash(image: Image.Image) -> int:
+    """DCT hash: low 8x8 frequencies of a 32x32 grayscale image against their median."""
+    pixels = image.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.Resampling.LANCZOS).tobytes()
+    rows = [pixels[y * _DCT_SIZE:(y + 1) * _DCT_SIZE] for y in range(_DCT_SIZE)]
+    # Separable 2D DCT, computing only the coefficients we keep
+    row_freqs = [[sum(c * p for c, p in zip(_COS[u], row)) for u in range(HASH_SIZE)] for row in rows]
+    coeffs = [sum(_COS[v][y] * row_freqs[y][u] for y in range(_DCT_SIZE))
+              for v in range(HASH_SIZE) for u in range(HASH_SIZE)]
+    ac = sorted(coeffs[1:])  # the DC term only says how bright the image is
+    median = ac[len(ac) // 2]
+    bits = 0
+    for c in coeffs:
+        bits = (bits << 1) | (c > median)
+    return bits
+
+
+HASHERS = {"dhash": dhash, "phash": phash}
+
+
+def image_fingerprint(image_base64: str, algorithm: str = "dhash") -> Optional[int]:
+    try:
+        with Image.open(io.BytesIO(base64.b64decode(image_base64))) as image:
+            return HASHERS[algorithm](image)
+    except (OSError, ValueError, binascii.Error, Image.DecompressionBombError) as e:
+        logger.debug(f"Could not hash image: {e}")
+        return None
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class ImageDescriptionCache:
+    def __init__(self, db, algorithm: str = None, max_distance: int = None, max_entries: int = None):
+        self.db = db
+        self.algorithm = algorithm or settings.image_hash_algorithm
+        if self.algorithm not in HASHERS:
+            raise ValueError(f"Unknown IMAGE_HASH_ALGORITHM '{self.algorithm}' (expected one of {sorted(HASHERS)})")
+        self.max_distance = max_distance if max_distance is not None else settings.image_hash_max_distance
+        self.max_entries = max_entries or settings.image_cache_max_entries
+        self._entries: Dict[int, str] = {}  # hash -> description, least recently used first
+        self.lookups = 0
+        self.hits = 0
+        self.tokens_saved = 0
+
+    def _key(self, fingerprint: int) -> str:
+        return f"{self.algorithm}:{fingerprint:016x}"
+
+    async def load(self):
+        prefix = f"{self.algorithm}:"
+        for key, description in reversed(await self.db.load_image_descriptions(prefix, self.max_entries)):
+            self._entries[int(key[len(prefix):], 16)] = description
+        if self._entries:
+            logger.info(f"🖼️  Image description cache: {len(self._entries)} known images ({self.algorithm})")
+
+    def _nearest(self, fingerprint: int) -> Optional[Tuple[int, int]]:
+        if fingerprint in self._entries:
+            return fingerprint, 0
+        best = min(self._entries, key=lambda h: hamming(h, fingerprint), default=None)
+        if best is None:
+            return None
+        distance = hamming(best, fingerprint)
+        return (best, distance) if distance <= self.max_distance else None
+
+    async def match(self, image_base64: str) -> Tuple[Optional[int], Optional[str]]:
+        """(fingerprint, cached description) for an image; the description is None on a miss."""
+        with metrics.timer("image_hash", algorithm=self.algorithm):
+            fingerprint = await asyncio.to_thread(image_fingerprint, image_base64, self.algorithm)
+        if fingerprint is None:
+            return None, None
+        self.lookups += 1
+        nearest = self._nearest(fingerprint)
+        if nearest is None:
+            metrics.inc("image_cache_lookups", result="miss")
+            return fingerprint, None
+        known, distance = nearest
+        description = self._entries.pop(known)
+        self._entries[known] = description  # most recently used
+        self.hits += 1
+        self.tokens_saved += max(0, IMAGE_TOKENS - len(description) // CHARS_PER_TOKEN)
+        metrics.inc("image_cache_lookups", result="hit")
+        metrics.set_gauge("image_cache_tokens_saved", self.tokens_saved)
+        logger.debug(f"Image cache hit at distance {distance}: {description}")
+        await self.db.touch_image_description(self._key(known))
+        return fingerprint, description
+
+    async def store(self, fingerprint: int, description: str):
+        self._entries.pop(fingerprint, None)
+        self._entries[fingerprint] = description
+        while len(self._entries) > self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
+        await self.db.save_image_description(self._key(fingerprint), description)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.hits}/{self.lookups} hits ({self.hit_rate:.0%}), "
+                f"~{self.tokens_saved} image tokens saved, {len(self._entries)} known images")
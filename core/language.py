@@ -0,0 +1,268 @@
+"""
+Offline language identification for posts and notifications.
+
+Two stages, both local and cheap enough to run on every scanned item:
+
+1. Script counts (a handful of C-level regex scans). Hangul, kana, Cyrillic,
+   Thai etc. settle the language outright; Han-only text is split into zh-TW /
+   zh-CN by counting characters that exist in only one of the two scripts.
+2. Latin text goes through a character 1-3 gram naive Bayes model shipped as
+   core/langid_model.json (built with `python -m benchmarks.langid_bench --train`).
+   Only n-grams that are frequent in some language are stored, as offsets from
+   that language's unseen-n-gram score, so scoring touches one dict entry per
+   n-gram. A few languages the persona never replies in (Dutch, Tagalog, ...)
+   are in the model only so their posts get a name instead of the nearest
+   supported language. Guesses under LANGUAGE_MIN_CONFIDENCE / _MARGIN, or with
+   fewer than LANGUAGE_MIN_NGRAMS known n-grams (short slang), stay "und".
+
+The result tags the item (Post.language / Notification.language) so the loops
+can skip unsupported languages before paying for generation, and BotBrain can
+pick a per-language prompt and reply length limit.
+"""
+import json
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = Path(__file__).with_name("langid_model.json")
+MODEL_VERSION = 1
+UNDETERMINED = "und"
+
+LANGUAGE_NAMES = {
+    "en": "English", "es": "Spanish", "fr": "French", "de": "German", "pt": "Portuguese",
+    "it": "Italian", "id": "Indonesian", "vi": "Vietnamese", "zh": "Chinese",
+    "zh-TW": "Traditional Chinese", "zh-CN": "Simplified Chinese", "ja": "Japanese",
+    "ko": "Korean", "ru": "Russian", "ar": "Arabic", "he": "Hebrew", "th": "Thai",
+    "hi": "Hindi", "el": "Greek", "nl": "Dutch", "sv": "Swedish", "da": "Danish",
+    "tr": "Turkish", "pl": "Polish", "tl": "Tagalog",
+}
+
+# Only read this much of a post; the first few lines are plenty
+MAX_CHARS = 300
+# Fewer letters than this can't be told apart reliably
+MIN_LETTERS = 4
+WORD_CACHE_SIZE = 50_000
+
+_SCRIPTS = {
+    "hangul": re.compile(r"[가-힯ᄀ-ᇿ㄰-㆏]"),
+    "kana": re.compile(r"[぀-ヿㇰ-ㇿｦ-ﾟ]"),
+    "han": re.compile(r"[一-鿿㐀-䶿豈-﫿]"),
+    "latin": re.compile(r"[a-zA-ZÀ-ɏḀ-ỿ]"),
+    "cyrillic": re.compile(r"[Ѐ-ӿ]"),
+    "arabic": re.compile(r"[؀-ۿ]"),
+    "hebrew": re.compile(r"[֐-׿]"),
+    "thai": re.compile(r"[฀-๿]"),
+    "devanagari": re.compile(r"[ऀ-ॿ]"),
+    "greek": re.compile(r"[Ͱ-Ͽ]"),
+}
+# Scripts that identify the language by themselves
+_SCRIPT_LANGUAGE = {
+    "hangul": "ko", "kana": "ja", "cyrillic": "ru", "arabic": "ar",
+    "hebrew": "he", "thai": "th", "devanagari": "hi", "greek": "el",
+}
+_VIETNAMESE = re.compile(r"[ơưđăạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ]")
+
+# Characters that only exist in one of the two Chinese scripts (pairwise aligned)
+_SIMPLIFIED_ONLY = "们这个来时会说对还为无发过与当实点种从头长见问题电学车东门气话让觉体应样爱网买卖读钱饭经欢结义显难岁办习两区参师专业处务动将间关团园图场报梦国际记录写听亲队医双须页顾风飞馆骑验么齐龙终刚调荐别没吗语请谢认识边给红员线视"
+_TRADITIONAL_ONLY = "們這個來時會說對還為無發過與當實點種從頭長見問題電學車東門氣話讓覺體應樣愛網買賣讀錢飯經歡結義顯難歲辦習兩區參師專業處務動將間關團園圖場報夢國際記錄寫聽親隊醫雙須頁顧風飛館騎驗麼齊龍終剛調薦別沒嗎語請謝認識邊給紅員線視麵週"
+_SIMPLIFIED_RE = re.compile(f"[{_SIMPLIFIED_ONLY}]")
+_TRADITIONAL_RE = re.compile(f"[{_TRADITIONAL_ONLY}]")
+
+_WORDS = re.compile(r"[^\W\d_]+")
+
+
+@dataclass(frozen=True, slots=True)
+class LanguageGuess:
+    code: str  # BCP 47-ish tag ("en", "zh-TW", ...) or "und"
+    confidence: float
+    script: str  # dominant script ("latin", "han", ...) or ""
+
+    @property
+    def name(self) -> str:
+        return LANGUAGE_NAMES.get(self.code, self.code)
+
+
+UNKNOWN = LanguageGuess(UNDETERMINED, 0.0, "")
+
+
+def _word_ngrams(word: str) -> List[str]:
+    padded = f" {word} "
+    return [padded[i:i + n] for n in (1, 2, 3) for i in range(len(padded) - n + 1) if padded[i:i + n] != " "]
+
+
+def _ngrams(text: str) -> List[str]:
+    return [g for word in _WORDS.findall(text.lower()) for g in _word_ngrams(word)]
+
+
+class NgramModel:
+    def __init__(self, languages: List[str], unseen: List[float], ngrams: Dict[str, Dict[str, float]]):
+        self.languages = languages
+        self.unseen = unseen
+        index = {lang: i for i, lang in enumerate(languages)}
+        # n-gram -> ((language index, log-prob offset over unseen), ...)
+        self.ngrams = {g: tuple((index[l], d) for l, d in offsets.items()) for g, offsets in ngrams.items()}
+        # word -> (n-gram count, known n-grams, per-language offsets); social posts repeat words a lot
+        self._words: Dict[str, Tuple[int, int, List[float]]] = {}
+
+    @classmethod
+    def load(cls, path: Path = MODEL_FILE) -> "NgramModel":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MODEL_VERSION:
+            raise ValueError(f"unsupported language model version {data.get('version')}")
+        return cls(data["languages"], data["unseen"], data["ngrams"])
+
+    def _word_score(self, word: str) -> Tuple[int, int, List[float]]:
+        cached = self._words.get(word)
+        if cached is None:
+            offsets = [0.0] * len(self.languages)
+            grams = _word_ngrams(word)
+            known = 0
+            for g in grams:
+                entries = self.ngrams.get(g, ())
+                known += bool(entries)
+                for i, offset in entries:
+                    offsets[i] += offset
+            if len(self._words) >= WORD_CACHE_SIZE:
+                self._words.clear()
+            cached = self._words[word] = (len(grams), known, offsets)
+        return cached
+
+    def score(self, text: str) -> Tuple[str, float, float, int]:
+        """(language, posterior, lead over the runner-up's posterior, n-grams known to the model)."""
+        count = hits = 0
+        scores = [0.0] * len(self.languages)
+        for word in _WORDS.findall(text.lower()):
+            n, known, offsets = self._word_score(word)
+            count += n
+            hits += known
+            scores = [s + o for s, o in zip(scores, offsets)]
+        scores = [s + u * count for s, u in zip(scores, self.unseen)]
+        best, second = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:2]
+        # Naive Bayes posterior of the winner (per-n-gram scale so long posts don't saturate)
+        scale = 1 / max(1.0, count / 10)
+        total = sum(math.exp((s - scores[best]) * scale) for s in scores)
+        runner_up = math.exp((scores[second] - scores[best]) * scale)
+        return self.languages[best], 1 / total, (1 - runner_up) / total, hits
+
+
+def train_model(samples: Iterable[Tuple[str, str]], top: int = 600, alpha: float = 0.5) -> dict:
+    """Build the serialized model from (language, text) pairs."""
+    counts: Dict[str, Counter] = defaultdict(Counter)
+    for lang, text in samples:
+        counts[lang].update(_ngrams(text))
+    languages = sorted(counts)
+    vocab = len(set().union(*counts.values())) if counts else 0
+    unseen, ngrams = [], defaultdict(dict)
+    for lang in languages:
+        total = sum(counts[lang].values())
+        denominator = total + alpha * vocab
+        unseen_logp = math.log(alpha / denominator)
+        unseen.append(round(unseen_logp, 4))
+        for g, c in counts[lang].most_common(top):
+            ngrams[g][lang] = round(math.log((c + alpha) / denominator) - unseen_logp, 4)
+    return {"version": MODEL_VERSION, "languages": languages, "unseen": unseen, "ngrams": dict(ngrams)}
+
+
+_model: Optional[NgramModel] = None
+_model_failed = False
+
+
+def get_model() -> Optional[NgramModel]:
+    global _model, _model_failed
+    if _model is None and not _model_failed:
+        try:
+            _model = NgramModel.load()
+        except (OSError, ValueError, KeyError) as e:
+            _model_failed = True
+            logger.warning(f"Language model unavailable ({e}); Latin-script posts stay untagged.")
+    return _model
+
+
+def detect_language(text: str) -> LanguageGuess:
+    text = (text or "")[:MAX_CHARS]
+    counts = {script: len(pattern.findall(text)) for script, pattern in _SCRIPTS.items()}
+    letters = sum(counts.values())
+    if letters < MIN_LETTERS and not (counts["han"] + counts["kana"] + counts["hangul"] >= 2):
+        return UNKNOWN
+    # Japanese mixes kanji with kana; any real amount of kana decides it
+    if counts["kana"] and counts["kana"] >= 0.1 * (counts["han"] + counts["kana"]):
+        return LanguageGuess("ja", (counts["kana"] + counts["han"]) / letters, "kana")
+    script = max(counts, key=counts.get)
+    share = counts[script] / letters
+    if script in _SCRIPT_LANGUAGE:
+        return LanguageGuess(_SCRIPT_LANGUAGE[script], share, script)
+    if script == "han":
+        simplified = len(_SIMPLIFIED_RE.findall(text))
+        traditional = len(_TRADITIONAL_RE.findall(text))
+        if simplified == traditional:
+            return LanguageGuess("zh", share * 0.5, script)
+        code = "zh-TW" if traditional > simplified else "zh-CN"
+        return LanguageGuess(code, share * max(simplified, traditional) / (simplified + traditional), script)
+    if _VIETNAMESE.search(text.lower()):
+        return LanguageGuess("vi", share, script)
+    model = get_model()
+    if model is None:
+        return LanguageGuess(UNDETERMINED, 0.0, script)
+    code, confidence, margin, hits = model.score(text)
+    confidence *= share
+    if (hits < settings.language_min_ngrams or confidence < settings.language_min_confidence
+            or margin < settings.language_min_margin):
+        # Too little to go on, or an out-of-model language landing near one we know
+        return LanguageGuess(UNDETERMINED, confidence, script)
+    return LanguageGuess(code, confidence, script)
+
+
+def supported_languages() -> List[str]:
+    return [l.strip() for l in settings.supported_languages.split(",") if l.strip()]
+
+
+def is_supported(code: str) -> bool:
+    """Undetermined text is always allowed; 'zh' matches any zh-* entry and vice versa."""
+    allowed = supported_languages()
+    if not allowed or not code or code == UNDETERMINED or code in allowed:
+        return True
+    base = code.split("-")[0]
+    if code == base:
+        return any(a.split("-")[0] == base for a in allowed)
+    return base in allowed
+
+
+def reply_limit(code: str) -> Tuple[int, str]:
+    """(amount, unit) reply length limit for the language's script."""
+    if code in ("zh", "zh-TW", "zh-CN", "ja"):
+        return settings.reply_max_chars_cjk, "characters"
+    if code in ("ko", "th"):
+        return settings.reply_max_chars_hangul, "characters"
+    return settings.reply_max_words, "words"
+
+
+_SENTENCE_END = re.compile(r"[。！？!?.，,、~～…]")
+
+
+def clip_reply(text: str, code: str) -> str:
+    """Trim a reply to the script's limit, at the last sentence/clause break if there is one."""
+    limit, unit = reply_limit(code)
+    if not limit:
+        return text
+    if unit == "characters":
+        if len(text) <= limit:
+            return text
+        head = text[:limit]
+    else:
+        words = text.split()
+        if len(words) <= limit:
+            return text
+        head = " ".join(words[:limit])
+    breaks = [m.end() for m in _SENTENCE_END.finditer(head)]
+    if breaks and breaks[-1] >= len(head) // 2:
+        head = head[:breaks[-1]]
+    return head.rstrip(" ,，、")
@@ -0,0 +1,157 @@
+"""
+Non-blocking, rotating, optionally structured logging.
+
+Log calls on the event loop only enqueue the record (QueueHandler); a
+QueueListener thread does the formatting and the console/disk I/O. The log
+file rotates by size or by time and rotated files are gzip-compressed.
+
+With LOG_FORMAT=json the file gets one JSON object per line. Structured
+fields come from `log_context()` / `bind_log_context()` (platform, mode,
+post_id - set once per session or item and attached to every record logged
+under it) and from `extra=` on individual calls (stage, duration):
+
+    with log_context(post_id=post_id):
+        logger.info("Reply sent", extra={"stage": "reply", "duration": t.seconds})
+"""
+import atexit
+import contextvars
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+from config import settings
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+# Fields copied into JSON lines when present on the record
+STRUCTURED_FIELDS = ("platform", "mode", "post_id", "stage", "duration")
+
+_context: contextvars.ContextVar[dict] = contextvars.ContextVar("log_context", default={})
+_listener: Optional[logging.handlers.QueueListener] = None
+_exc_formatter = logging.Formatter()
+
+
+@contextmanager
+def log_context(**fields):
+    """Attach fields (platform, mode, post_id...) to every record logged inside the block."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def bind_log_context(**fields):
+    """Set fields for the rest of the current task (e.g. platform/mode for a session); None clears."""
+    _context.set({k: v for k, v in {**_context.get(), **fields}.items() if v is not None})
+
+
+class _ContextFilter(logging.Filter):
+    """Runs on the emitting thread/task, so the contextvars are still visible."""
+
+    def filter(self, record):
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Keeps the traceback in exc_text (not merged into msg) so JSON lines get a separate 'exc'."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        row = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in STRUCTURED_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                row[key] = round(value, 4) if key == "duration" else value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            row["exc"] = record.exc_text
+        return json.dumps(row, ensure_ascii=False)
+
+
+def _gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def _file_handler(path: str) -> logging.Handler:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if settings.log_rotation == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=settings.log_rotate_when, backupCount=settings.log_backup_count, encoding="utf-8")
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=int(settings.log_max_mb * 2**20), backupCount=settings.log_backup_count, encoding="utf-8")
+    if settings.log_compress:
+        handler.namer = _gzip_namer
+        handler.rotator = _gzip_rotator
+    handler.setFormatter(JsonFormatter() if settings.log_format == "json" else logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+def setup_logging(path: str = None, level: str = None):
+    """Install the queue handler on the root logger and start the writer thread (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+    path = path if path is not None else settings.log_file
+
+    handlers = []
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(TEXT_FORMAT))
+    handlers.append(console)
+    if path:
+        handlers.append(_file_handler(path))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel((level or settings.log_level).upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,166 @@
+"""
+Event-loop stall detection and on-demand sampling profiler.
+
+Everything (Playwright IPC, aiosqlite callbacks, LLM HTTP, logging) shares one
+asyncio loop, so any blocking call stalls all of it. LoopMonitor runs:
+
+- a heartbeat task on the loop, measuring how late each tick fires (loop lag),
+- a watcher thread that notices when the heartbeat stops and captures the
+  loop thread's stack *while it is blocked*, logging it once per stall,
+- a sampling profiler window, started by SIGUSR1 (POSIX) or by creating the
+  flag file (any OS). It samples the loop thread's stack every few ms for N
+  seconds and writes folded stacks ("frame;frame;frame count") that
+  flamegraph.pl, speedscope or inferno render directly.
+
+    echo 60 > data/profile.flag     # profile the live session for 60 s
+"""
+import asyncio
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from config import settings
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _folded_stack(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.1, warn_ms: float = None, profile_seconds: float = None,
+                 flag_file: str = None, profile_dir: str = None, sample_ms: float = None):
+        self.interval = interval
+        self.warn_seconds = (warn_ms if warn_ms is not None else settings.loop_lag_warn_ms) / 1000
+        self.profile_seconds = profile_seconds or settings.profile_seconds
+        self.flag_file = flag_file if flag_file is not None else settings.profile_flag_file
+        self.profile_dir = profile_dir or settings.profile_dir
+        self.sample_seconds = (sample_ms or settings.profile_sample_ms) / 1000
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread_id: Optional[int] = None
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._last_beat = time.monotonic()
+        self._stall_reported = False
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._profiling = threading.Lock()
+
+    # --- lifecycle ---
+
+    def start(self):
+        """Call from inside the running loop."""
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._heartbeat = asyncio.create_task(self._beat())
+        self._watcher = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watcher.start()
+        try:
+            self.loop.add_signal_handler(signal.SIGUSR1, self.request_profile)
+            trigger = f"kill -USR1 {os.getpid()} or create {self.flag_file}"
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+            trigger = f"create {self.flag_file}"  # no SIGUSR1 / add_signal_handler on Windows
+        logger.info(f"🩺 Loop monitor on (warn > {self.warn_seconds * 1000:.0f} ms). Profile: {trigger}")
+
+    def stop(self):
+        self._stop.set()
+        if self._heartbeat:
+            self._heartbeat.cancel()
+        try:
+            self.loop.remove_signal_handler(signal.SIGUSR1)
+        except Exception:
+            pass
+
+    # --- lag measurement ---
+
+    async def _beat(self):
+        # Real time on purpose: we measure the loop itself, not pacing
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._last_beat = now
+            self._stall_reported = False
+            self.max_lag = max(self.max_lag, lag)
+            metrics.observe("loop_lag", lag)
+            if lag >= self.warn_seconds:
+                logger.warning(f"🐌 Event loop lag {lag * 1000:.0f} ms")
+
+    def _watch(self):
+        next_flag_check = 0.0
+        while not self._stop.wait(self.interval):
+            blocked = time.monotonic() - self._last_beat - self.interval
+            if blocked >= self.warn_seconds and not self._stall_reported:
+                self._stall_reported = True
+                self.stalls += 1
+                metrics.inc("loop_stalls")
+                frame = sys._current_frames().get(self.loop_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame else "(no frame)"
+                logger.warning(f"🐌 Event loop blocked for {blocked * 1000:.0f} ms so far. Loop thread stack:\n{stack}")
+            if self.flag_file and time.monotonic() >= next_flag_check:
+                next_flag_check = time.monotonic() + 1.0
+                self._check_flag_file()
+
+    # --- profiler window ---
+
+    def _check_flag_file(self):
+        if not os.path.exists(self.flag_file):
+            return
+        try:
+            with open(self.flag_file, encoding="utf-8") as f:
+                content = f.read().strip()
+            os.remove(self.flag_file)
+        except OSError:
+            return
+        seconds = float(content) if content.replace(".", "", 1).isdigit() else None
+        self.request_profile(seconds)
+
+    def request_profile(self, seconds: float = None):
+        """Start a profiler window on a background thread (no-op if one is running)."""
+        if self._profiling.locked():
+            logger.info("Profiler window already running.")
+            return
+        threading.Thread(target=self._profile, args=(seconds or self.profile_seconds,),
+                         name="loop-profiler", daemon=True).start()
+
+    def _profile(self, seconds: float):
+        with self._profiling:
+            logger.info(f"🔬 Sampling the event loop thread for {seconds:g}s...")
+            stacks = Counter()
+            deadline = time.monotonic() + seconds
+            samples = 0
+            while time.monotonic() < deadline and not self._stop.is_set():
+                frame = sys._current_frames().get(self.loop_thread_id)
+                if frame is not None:
+                    stacks[_folded_stack(frame)] += 1
+                    samples += 1
+                time.sleep(self.sample_seconds)
+
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, f"loop-{datetime.now():%Y%m%d-%H%M%S}.folded")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            logger.info(f"🔬 Profile written: {path} ({samples} samples, {len(stacks)} unique stacks)")
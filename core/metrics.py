@@ -0,0 +1,322 @@
+"""
+In-process metrics: stage latency histograms, counters and gauges.
+
+Cheap enough to leave on in production - an observation is a bisect into a
+fixed bucket list, a deque append and a counter bump under an uncontended
+lock. Exposed as Prometheus text on a localhost HTTP endpoint
+(settings.metrics_port) and optionally snapshotted to a JSONL file.
+
+    from core import metrics
+    with metrics.timer("scan"):
+        posts = await adapter.get_feed()
+    metrics.inc("posts_scanned", len(posts))
+    metrics.set_gauge("feed_queue_depth", n)
+"""
+import asyncio
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "socialbot_"
+# Seconds; covers a 5 ms selector probe up to a multi-minute poll wait
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+QUANTILES = (0.5, 0.95, 0.99)
+# Recent observations kept per series for quantiles
+RESERVOIR_SIZE = 1024
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value) -> str:
+    """Label value escaping of the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(key: LabelKey, extra: Dict[str, str] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + inner + "}"
+
+
+class _Series:
+    __slots__ = ("buckets", "count", "sum", "recent")
+
+    def __init__(self, n_buckets: int):
+        self.buckets = [0] * n_buckets
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = tuple(buckets)
+        self._series: Dict[LabelKey, _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.bounds))
+            index = bisect.bisect_left(self.bounds, value)
+            if index < len(self.bounds):
+                series.buckets[index] += 1
+            series.count += 1
+            series.sum += value
+            series.recent.append(value)
+
+    def quantiles(self, **labels) -> Dict[float, float]:
+        with self._lock:
+            series = self._series.get(_key(labels))
+            values = sorted(series.recent) if series else []
+        return _quantiles(values)
+
+    def snapshot(self) -> Dict[LabelKey, dict]:
+        with self._lock:
+            items = [(k, s.count, s.sum, sorted(s.recent)) for k, s in self._series.items()]
+        return {k: {"count": c, "sum": total, **{f"p{int(q * 100)}": v for q, v in _quantiles(vals).items()}}
+                for k, c, total, vals in items}
+
+    def render(self) -> list:
+        full = PREFIX + self.name
+        lines = [f"# HELP {full} {self.help}", f"# TYPE {full} histogram"]
+        quantile_lines = []
+        with self._lock:
+            items = [(k, list(s.buckets), s.count, s.sum, sorted(s.recent)) for k, s in self._series.items()]
+        for key, buckets, count, total, values in items:
+            cumulative = 0
+            for bound, n in zip(self.bounds, buckets):
+                cumulative += n
+                lines.append(f"{full}_bucket{_fmt_labels(key, {'le': f'{bound:g}'})} {cumulative}")
+            lines.append(f"{full}_bucket{_fmt_labels(key, {'le': '+Inf'})} {count}")
+            lines.append(f"{full}_sum{_fmt_labels(key)} {total:.6f}")
+            lines.append(f"{full}_count{_fmt_labels(key)} {count}")
+            for q, v in _quantiles(values).items():
+                quantile_lines.append(f"{full}_quantile{_fmt_labels(key, {'quantile': f'{q:g}'})} {v:.6f}")
+        if quantile_lines:
+            lines += [f"# HELP {full}_quantile Recent {self.name} quantiles (last {RESERVOIR_SIZE} observations)",
+                      f"# TYPE {full}_quantile gauge"] + quantile_lines
+        return lines
+
+
+def _quantiles(values: list) -> Dict[float, float]:
+    if not values:
+        return {}
+    last = len(values) - 1
+    return {q: values[min(last, int(round(q * last)))] for q in QUANTILES}
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def snapshot(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list:
+        full = PREFIX + self.name + "_total"
+        lines = [f"# HELP {full} {self.help}", f"# TYPE {full} counter"]
+        lines += [f"{full}{_fmt_labels(k)} {v:g}" for k, v in self.snapshot().items()]
+        return lines
+
+
+class Gauge:
+    """A set() value per label set, or a callback evaluated at scrape time."""
+
+    def __init__(self, name: str, help: str, callback: Callable[[], float] = None):
+        self.name = name
+        self.help = help
+        self.callback = callback
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def snapshot(self) -> Dict[LabelKey, float]:
+        if self.callback is not None:
+            try:
+                return {(): float(self.callback())}
+            except Exception:
+                return {}
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list:
+        full = PREFIX + self.name
+        lines = [f"# HELP {full} {self.help}", f"# TYPE {full} gauge"]
+        lines += [f"{full}{_fmt_labels(k)} {v:g}" for k, v in self.snapshot().items()]
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, help or name.replace("_", " "), **kwargs)
+        return metric
+
+    def histogram(self, name: str, help: str = "", buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, buckets=buckets)
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "", callback: Callable[[], float] = None) -> Gauge:
+        gauge = self._get_or_create(Gauge, name, help)
+        if callback is not None:
+            gauge.callback = callback
+        return gauge
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """JSON-friendly view: {"ts", "histograms", "counters", "gauges"}."""
+        out = {"ts": time.time(), "histograms": {}, "counters": {}, "gauges": {}}
+        for name, metric in list(self._metrics.items()):
+            section = ("histograms" if isinstance(metric, Histogram)
+                       else "counters" if isinstance(metric, Counter) else "gauges")
+            for key, value in metric.snapshot().items():
+                label = ",".join(f"{k}={v}" for k, v in key)
+                out[section][f"{name}{{{label}}}" if label else name] = value
+        return out
+
+
+registry = MetricsRegistry()
+
+STAGE_HISTOGRAM = "stage_seconds"
+
+
+def observe(stage: str, seconds: float, **labels):
+    """Record one stage duration (scan, extract, dedup, enrichment, llm_generate, type, submit, sleep...)."""
+    if settings.metrics_enabled:
+        registry.histogram(STAGE_HISTOGRAM, "Time spent per bot stage").observe(seconds, stage=stage, **labels)
+
+
+class _Timing:
+    __slots__ = ("seconds",)
+
+    def __init__(self):
+        self.seconds = 0.0
+
+
+@contextmanager
+def timer(stage: str, **labels):
+    """`with metrics.timer("scan") as t:` - works around awaits too; `t.seconds` is set on exit."""
+    timing = _Timing()
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing.seconds = time.perf_counter() - start
+        observe(stage, timing.seconds, **labels)
+
+
+def inc(name: str, value: float = 1, **labels):
+    if settings.metrics_enabled:
+        registry.counter(name).inc(value, **labels)
+
+
+def set_gauge(name: str, value: float, **labels):
+    if settings.metrics_enabled:
+        registry.gauge(name).set(value, **labels)
+
+
+def gauge_callback(name: str, callback: Callable[[], float], help: str = ""):
+    registry.gauge(name, help, callback=callback)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int = None, host: str = None):
+    """Serve /metrics on a daemon thread. Returns the server, or None when disabled/unavailable."""
+    port = settings.metrics_port if port is None else port
+    host = host or settings.metrics_host
+    if not settings.metrics_enabled or not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning(f"Metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"📈 Metrics at http://{host}:{port}/metrics")
+    return server
+
+
+async def run_jsonl_exporter(path: str = None, interval: float = None):
+    """Append a snapshot every `interval` seconds until cancelled (written off the event loop)."""
+    path = path if path is not None else settings.metrics_jsonl_file
+    interval = interval or settings.metrics_jsonl_interval_seconds
+    if not settings.metrics_enabled or not path:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def write(line: str):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    try:
+        while True:
+            # Real time on purpose: this is reporting, not pacing
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(write, json.dumps(registry.snapshot()))
+    finally:
+        write(json.dumps(registry.snapshot()))
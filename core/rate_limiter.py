@@ -0,0 +1,211 @@
+"""
+Client-side RPM/TPM limiter in front of the LLM providers.
+
+One `ProviderRateLimiter` per (provider, model), shared by every call that
+goes through BotBrain, so retries and any future batched/cached/hedged calls
+draw from the same budget. Each holds two token buckets (requests and tokens
+per minute) whose refill rate is `limit * factor`:
+
+- AIMD: a 429 halves `factor` (multiplicative decrease); every successful
+  call adds `increase` back, up to 1.0 (additive increase).
+- Rate-limit response headers (x-ratelimit-limit-*/remaining-*) replace the
+  configured limits with the real ones and clamp the buckets to what the
+  provider says is left, so we slow down *before* tripping a 429.
+
+Limits come from LLM_RATE_LIMITS, e.g. "openai=500/200000;google:gemini-1.5-pro=2/32000"
+(requests/tokens per minute, 0 = unlimited; a provider entry applies to all
+its models, a provider:model entry wins).
+"""
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from config import settings
+from core import clock, metrics
+
+logger = logging.getLogger(__name__)
+
+# Rough prompt sizing before we know the real usage
+CHARS_PER_TOKEN = 4
+IMAGE_TOKENS = 765
+
+
+def estimate_tokens(*texts: str, images: int = 0, max_output: int = 200) -> int:
+    chars = sum(len(t or "") for t in texts)
+    return chars // CHARS_PER_TOKEN + images * IMAGE_TOKENS + max_output
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """'openai=500/200000;google:gemini-1.5-pro=2/32000' -> {'openai': (500, 200000), ...}"""
+    limits = {}
+    for entry in (spec or "").replace(",", ";").split(";"):
+        if "=" not in entry:
+            continue
+        key, value = entry.split("=", 1)
+        try:
+            rpm, tpm = (int(float(v)) for v in value.split("/", 1))
+        except ValueError:
+            logger.warning(f"Invalid LLM_RATE_LIMITS entry '{entry.strip()}', expected provider[:model]=rpm/tpm.")
+            continue
+        limits[key.strip().lower()] = (rpm, tpm)
+    return limits
+
+
+class TokenBucket:
+    def __init__(self, limit_per_minute: float):
+        self.limit = limit_per_minute
+        self.factor = 1.0
+        self.tokens = float(limit_per_minute)
+        self._updated = clock.monotonic()
+
+    @property
+    def capacity(self) -> float:
+        return self.limit * self.factor
+
+    def refill(self):
+        now = clock.monotonic()
+        if self.limit:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 when unlimited or available now)."""
+        if not self.limit:
+            return 0.0
+        self.refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60 / self.capacity
+
+    def take(self, amount: float):
+        if self.limit:
+            self.tokens -= min(amount, self.capacity)
+
+
+class ProviderRateLimiter:
+    def __init__(self, provider: str, model: str, rpm: int, tpm: int,
+                 decrease: float = None, increase: float = None, min_factor: float = None):
+        self.provider = provider
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.decrease = decrease if decrease is not None else settings.llm_rate_decrease
+        self.increase = increase if increase is not None else settings.llm_rate_increase
+        self.min_factor = min_factor if min_factor is not None else settings.llm_rate_min_factor
+        self.waited_seconds = 0.0
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def factor(self) -> float:
+        return self.requests.factor
+
+    def _set_factor(self, factor: float):
+        factor = max(self.min_factor, min(1.0, factor))
+        for bucket in (self.requests, self.tokens):
+            bucket.refill()
+            bucket.factor = factor
+            bucket.tokens = min(bucket.tokens, bucket.capacity)
+
+    async def acquire(self, estimated_tokens: int):
+        """Wait (FIFO) until one request and `estimated_tokens` fit in the current budget."""
+        async with self._lock:
+            start = clock.monotonic()
+            while True:
+                wait = max(self.blocked_until - clock.monotonic(),
+                           self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                if wait <= 0:
+                    break
+                await clock.sleep(wait)
+            self.requests.take(1)
+            self.tokens.take(estimated_tokens)
+            waited = clock.monotonic() - start
+        self.waited_seconds += waited
+        if waited > 0:
+            metrics.observe("rate_limit_wait", waited, provider=self.provider)
+        self._export()
+
+    def on_success(self, estimated_tokens: int, used_tokens: Optional[int] = None, headers=None):
+        if used_tokens is not None:
+            # Settle the estimate against the real usage
+            self.tokens.take(used_tokens - estimated_tokens)
+        near_limit = self._apply_headers(headers) if headers else False
+        if not near_limit and self.factor < 1.0:
+            self._set_factor(self.factor + self.increase)
+        self._export()
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        self._set_factor(self.factor * self.decrease)
+        self.requests.tokens = 0.0
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, clock.monotonic() + retry_after)
+        metrics.inc("llm_rate_limited", provider=self.provider)
+        logger.warning(
+            f"   🚦 {self.provider}/{self.model} rate limited: budget cut to {self.factor:.0%} "
+            f"(~{self.requests.capacity:.0f} RPM, ~{self.tokens.capacity:.0f} TPM)"
+        )
+        self._export()
+
+    def _apply_headers(self, headers) -> bool:
+        """Adopt the provider's real limits and remaining budget. True when close to the limit."""
+        near_limit = False
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            limit = _header_number(headers, f"x-ratelimit-limit-{kind}")
+            remaining = _header_number(headers, f"x-ratelimit-remaining-{kind}")
+            if limit and limit != bucket.limit:
+                logger.info(f"   🚦 {self.provider}/{self.model} {kind} limit from headers: {limit:.0f}/min")
+                bucket.refill()
+                if not bucket.limit:
+                    bucket.tokens = limit  # was unlimited; start full, remaining clamps below
+                bucket.limit = limit
+            if remaining is not None and bucket.limit:
+                bucket.refill()
+                bucket.tokens = min(bucket.tokens, remaining)
+                near_limit = near_limit or remaining < 0.1 * bucket.limit
+        return near_limit
+
+    def _export(self):
+        labels = {"provider": self.provider, "model": self.model}
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            if bucket.limit:
+                bucket.refill()
+                metrics.set_gauge("llm_limiter_available", bucket.tokens, kind=kind, **labels)
+                metrics.set_gauge("llm_limiter_capacity", bucket.capacity, kind=kind, **labels)
+        metrics.set_gauge("llm_limiter_factor", self.factor, **labels)
+        metrics.set_gauge("llm_limiter_wait_seconds", self.waited_seconds, **labels)
+
+    def stats(self) -> dict:
+        return {
+            "factor": self.factor,
+            "rpm": self.requests.capacity,
+            "tpm": self.tokens.capacity,
+            "requests_available": self.requests.tokens,
+            "tokens_available": self.tokens.tokens,
+            "waited_seconds": self.waited_seconds,
+        }
+
+
+def _header_number(headers, name: str) -> Optional[float]:
+    try:
+        value = headers.get(name)
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+_limiters: Dict[Tuple[str, str], ProviderRateLimiter] = {}
+
+
+def get_limiter(provider: str, model: str) -> ProviderRateLimiter:
+    """The shared limiter for this provider/model (created on first use)."""
+    provider, model = provider.lower(), str(model)
+    key = (provider, model)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limits = parse_limits(settings.llm_rate_limits)
+        rpm, tpm = limits.get(f"{provider}:{model.lower()}") or limits.get(provider) or (0, 0)
+        limiter = _limiters[key] = ProviderRateLimiter(provider, model, rpm, tpm)
+        if rpm or tpm:
+            logger.info(f"🚦 Rate limiter for {provider}/{model}: {rpm or '∞'} RPM, {tpm or '∞'} TPM")
+    return limiter
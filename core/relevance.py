@@ -0,0 +1,177 @@
+"""
+Local relevance pre-filter between the adapter and the brain.
+
+Scores a feed post from cheap text features (length, link and hashtag ratio,
+sponsored / "Suggested for you" markers, detected language) so ads, header
+rows and posts that are just an emoji or a link are skipped before we pay for
+generation. Rules give a score in [0, 1]; an optional logistic model
+(RELEVANCE_MODEL_FILE, trained with `python -m benchmarks.relevance_bench --train`)
+is averaged in when configured. Sponsored markers always score 0.
+"""
+import json
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Feed chrome that marks ads / recommendation blocks; only looked for in the
+# first HEADER_CHARS, where the post header is (content is flattened to one line).
+# It has to be a standalone token in its header form ("Sponsored ·", "Paid partnership
+# with ..."), so "Not sponsored, but..." or "this isn't a paid partnership" in a caption doesn't count.
+_SEPARATORS = r"\s·•|｜"
+_SPONSORED = re.compile(
+    rf"(?:^|(?<=[{_SEPARATORS}]))(?<![Nn]ot )(?<![Nn]o )(?<!n't )(?<!n't a )"
+    r"(?:Sponsored|Promoted|Paid partnership|Suggested for you|Suggested threads|Suggested posts"
+    r"|贊助|赞助|為你推薦|推薦給你|为你推荐|推荐给你|合作夥伴|付費合作)"
+    rf"(?=$|[{_SEPARATORS}])"
+)
+HEADER_CHARS = 120
+_URL = re.compile(r"https?://\S+|www\.\S+|\b[\w-]+\.(?:com|net|org|io|ly|me|tw|cn|co)(?:/\S*)?\b", re.IGNORECASE)
+_LETTER = re.compile(r"[^\W\d_]")
+_DENSE = re.compile(r"[一-鿿぀-ヿ가-힯]")
+# A CJK character carries roughly what a few Latin letters do
+DENSE_WEIGHT = 3
+_WORD = re.compile(r"\S+")
+
+# Rule penalties, subtracted from a starting score of 1.0
+PENALTIES = {
+    "no_text": 0.8,
+    "too_short": 0.6,
+    "mostly_links": 0.6,
+    "hashtag_spam": 0.6,
+    "unknown_language": 0.2,
+}
+# Image posts with a short caption are normal; their text penalties are softened
+IMAGE_DISCOUNT = 0.5
+
+
+@dataclass(frozen=True, slots=True)
+class RelevanceScore:
+    score: float
+    reasons: Tuple[str, ...] = ()  # penalties that applied, strongest first
+    features: Dict[str, float] = field(default_factory=dict, repr=False)
+
+    @property
+    def reason(self) -> str:
+        return self.reasons[0] if self.reasons else "low_score"
+
+
+def extract_features(text: str, has_image: bool = False, language: str = "") -> Dict[str, float]:
+    text = text or ""
+    words = _WORD.findall(text)
+    link_chars = sum(len(m) for m in _URL.findall(text))
+    return {
+        "letters": float(len(_LETTER.findall(text)) + (DENSE_WEIGHT - 1) * len(_DENSE.findall(text))),
+        "words": float(len(words)),
+        "link_ratio": link_chars / max(len(text.strip()), 1),
+        "hashtag_ratio": sum(w.startswith("#") for w in words) / max(len(words), 1),
+        "sponsored": float(bool(_SPONSORED.search(text[:HEADER_CHARS]))),
+        "has_image": float(has_image),
+        "unknown_language": float(language == "und"),
+    }
+
+
+def rule_score(features: Dict[str, float]) -> Tuple[float, Tuple[str, ...]]:
+    if features["sponsored"]:
+        return 0.0, ("sponsored",)
+    applied = []
+    if features["letters"] == 0:
+        applied.append("no_text")
+    elif features["letters"] < settings.relevance_min_chars:
+        applied.append("too_short")
+    if features["link_ratio"] > 0.5:
+        applied.append("mostly_links")
+    if features["hashtag_ratio"] > 0.5:
+        applied.append("hashtag_spam")
+    if features["unknown_language"]:
+        applied.append("unknown_language")
+    discount = IMAGE_DISCOUNT if features["has_image"] else 1.0
+    penalties = {reason: PENALTIES[reason] * (discount if reason in ("no_text", "too_short") else 1.0)
+                 for reason in applied}
+    reasons = tuple(sorted(penalties, key=penalties.get, reverse=True))
+    return max(0.0, 1.0 - sum(penalties.values())), reasons
+
+
+class LogisticModel:
+    """{"bias": b, "weights": {feature: w}} over extract_features() (letters/words log-scaled)."""
+
+    def __init__(self, bias: float, weights: Dict[str, float]):
+        self.bias = bias
+        self.weights = weights
+
+    @classmethod
+    def load(cls, path: str) -> "LogisticModel":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(float(data["bias"]), {k: float(v) for k, v in data["weights"].items()})
+
+    def predict(self, features: Dict[str, float]) -> float:
+        x = _model_inputs(features)
+        z = self.bias + sum(w * x.get(name, 0.0) for name, w in self.weights.items())
+        return 1 / (1 + math.exp(-max(-30.0, min(30.0, z))))
+
+
+def _model_inputs(features: Dict[str, float]) -> Dict[str, float]:
+    return {k: math.log1p(v) if k in ("letters", "words") else v for k, v in features.items()}
+
+
+def train_logistic(rows: Iterable[Tuple[Dict[str, float], bool]], epochs: int = 500, lr: float = 0.1,
+                   l2: float = 0.01) -> dict:
+    """Plain batch gradient descent; the feature set is tiny, so no numpy needed."""
+    data = [(_model_inputs(f), 1.0 if y else 0.0) for f, y in rows]
+    names = sorted({k for x, _ in data for k in x})
+    bias, weights = 0.0, {k: 0.0 for k in names}
+    for _ in range(epochs):
+        grad_b, grad_w = 0.0, {k: 0.0 for k in names}
+        for x, y in data:
+            z = bias + sum(weights[k] * x.get(k, 0.0) for k in names)
+            error = 1 / (1 + math.exp(-max(-30.0, min(30.0, z)))) - y
+            grad_b += error
+            for k in names:
+                grad_w[k] += error * x.get(k, 0.0)
+        n = max(len(data), 1)
+        bias -= lr * grad_b / n
+        for k in names:
+            weights[k] -= lr * (grad_w[k] / n + l2 * weights[k])
+    return {"bias": round(bias, 4), "weights": {k: round(w, 4) for k, w in weights.items()}}
+
+
+class RelevanceFilter:
+    def __init__(self, threshold: float = None, model_path: str = None):
+        self.threshold = threshold if threshold is not None else settings.relevance_threshold
+        model_path = settings.relevance_model_file if model_path is None else model_path
+        self.model: Optional[LogisticModel] = None
+        if model_path:
+            try:
+                self.model = LogisticModel.load(model_path)
+                logger.info(f"🪶 Relevance model loaded from {model_path}")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Relevance model {model_path} unusable ({e}); using rules only.")
+        self.scored = 0
+        self.skipped: Dict[str, int] = {}
+
+    def score(self, text: str, has_image: bool = False, language: str = "") -> RelevanceScore:
+        features = extract_features(text, has_image, language)
+        score, reasons = rule_score(features)
+        if self.model is not None and not features["sponsored"]:
+            score = (score + self.model.predict(features)) / 2
+        return RelevanceScore(round(score, 3), reasons, features)
+
+    def check(self, post) -> Optional[RelevanceScore]:
+        """Score a Post; returns the score when it should be skipped, else None (and counts the reason)."""
+        result = self.score(post.content, post.has_image or bool(post.image_urls), post.language)
+        self.scored += 1
+        if result.score >= self.threshold:
+            return None
+        self.skipped[result.reason] = self.skipped.get(result.reason, 0) + 1
+        return result
+
+    def summary(self) -> str:
+        skipped = sum(self.skipped.values())
+        reasons = ", ".join(f"{r} {n}" for r, n in sorted(self.skipped.items(), key=lambda kv: -kv[1]))
+        return f"{skipped}/{self.scored} posts skipped before the LLM" + (f" ({reasons})" if reasons else "")
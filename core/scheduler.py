@@ -0,0 +1,125 @@
+import logging
+from datetime import datetime, time as dtime
+from typing import Optional, Tuple
+from config import settings
+from core import clock
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_quiet_hours(spec: str) -> Optional[Tuple[dtime, dtime]]:
+    """Parse 'HH:MM-HH:MM' into (start, end). Returns None when disabled/invalid."""
+    if not spec or "-" not in spec:
+        return None
+    try:
+        start, end = (datetime.strptime(part.strip(), "%H:%M").time() for part in spec.split("-", 1))
+    except ValueError:
+        logger.warning(f"Invalid poll_quiet_hours '{spec}', expected 'HH:MM-HH:MM'. Ignoring.")
+        return None
+    return start, end
+
+
+class AdaptivePollScheduler:
+    """
+    Decides how long notification mode waits between polls.
+
+    - Empty poll: interval grows by `backoff_factor`, up to the ceiling.
+    - Poll with activity: interval snaps back to the floor.
+    - Quiet hours: a fixed (long) interval is used instead.
+    Every interval gets +/- `jitter_ratio` random jitter so polls don't line up.
+    Reply pacing (min_delay_seconds) is not affected by this scheduler.
+    """
+
+    def __init__(
+        self,
+        floor: float = None,
+        ceiling: float = None,
+        backoff_factor: float = None,
+        jitter_ratio: float = None,
+        quiet_hours: str = None,
+        quiet_interval: float = None,
+    ):
+        self.floor = floor if floor is not None else settings.poll_min_interval_seconds
+        self.ceiling = max(self.floor, ceiling if ceiling is not None else settings.poll_max_interval_seconds)
+        self.backoff_factor = backoff_factor if backoff_factor is not None else settings.poll_backoff_factor
+        self.jitter_ratio = jitter_ratio if jitter_ratio is not None else settings.poll_jitter_ratio
+        self.quiet_hours = _parse_quiet_hours(quiet_hours if quiet_hours is not None else settings.poll_quiet_hours)
+        self.quiet_interval = quiet_interval if quiet_interval is not None else settings.poll_quiet_interval_seconds
+
+        self.interval = self.floor
+        self.polls = 0
+        self.hits = 0
+
+    def in_quiet_hours(self, now: datetime = None) -> bool:
+        if not self.quiet_hours:
+            return False
+        current = (now or clock.now()).time()
+        start, end = self.quiet_hours
+        if start <= end:
+            return start <= current < end
+        # Window wraps past midnight, e.g. 23:00-06:00
+        return current >= start or current < end
+
+    def next_interval(self) -> float:
+        """Seconds to wait before the next poll (jitter applied)."""
+        base = self.quiet_interval if self.in_quiet_hours() else self.interval
+        jitter = base * self.jitter_ratio
+        return max(1.0, clock.uniform(base - jitter, base + jitter))
+
+    def record(self, hit: bool):
+        """Feed back the outcome of a poll."""
+        self.polls += 1
+        previous = self.interval
+        if hit:
+            self.hits += 1
+            self.interval = self.floor
+        else:
+            self.interval = min(self.ceiling, self.interval * self.backoff_factor)
+        # Every poll is a lot of lines over a long session; only interval changes are news
+        logger.log(
+            logging.INFO if self.interval != previous else logging.DEBUG,
+            f"   ⏱️  Poll {'hit' if hit else 'empty'} | next interval ~{self.interval:.0f}s | "
+            f"hit rate {self.hit_rate:.0%} ({self.hits}/{self.polls})"
+        )
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.polls if self.polls else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "polls": self.polls,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate,
+            "quiet_hours": self.in_quiet_hours(),
+        }
+
+
+class RetryBackoff:
+    """
+    Jittered exponential backoff for retryable LLM errors (rate limited / transient).
+
+    The n-th consecutive failure waits a random time in [d/2, d] with
+    d = min(cap, base * 2**n). A provider-supplied Retry-After is honoured as a
+    lower bound (plus a little jitter so parallel sessions don't retry in
+    lockstep). `reset()` after a success.
+    """
+
+    def __init__(self, base: float = None, cap: float = None):
+        self.base = base if base is not None else settings.llm_backoff_base_seconds
+        self.cap = max(self.base, cap if cap is not None else settings.llm_backoff_max_seconds)
+        self.attempts = 0
+        self.total_seconds = 0.0
+
+    def next_delay(self, retry_after: float = None) -> float:
+        ceiling = min(self.cap, self.base * 2 ** self.attempts)
+        delay = clock.uniform(ceiling / 2, ceiling)
+        if retry_after is not None:
+            delay = max(delay, retry_after + clock.uniform(0, min(1.0, self.base)))
+        self.attempts += 1
+        self.total_seconds += delay
+        return delay
+
+    def reset(self):
+        self.attempts = 0
@@ -0,0 +1,128 @@
+"""
+Multi-image vision payloads.
+
+Posts can carry several images (Facebook multi-photo posts and carousels).
+They are decoded and downscaled concurrently in worker threads, and anything
+smaller than VISION_MIN_IMAGE_SIDE (avatars, badges, icons) is dropped. Then
+VISION_IMAGE_POLICY decides what the provider gets:
+
+- composite: the VISION_MAX_IMAGES most salient images tiled, in post order,
+  into one JPEG of at most VISION_MAX_SIDE px, billed as a single image.
+- top_k: the VISION_MAX_IMAGES most salient images, each downscaled to
+  VISION_MAX_SIDE and sent as separate images.
+
+Salience is pixel area times grayscale entropy, so large detailed photos beat
+flat banners and blank placeholders. A lone image only gets the size check and
+is otherwise passed through untouched.
+"""
+import asyncio
+import base64
+import binascii
+import io
+import logging
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from PIL import Image
+
+from config import settings
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("composite", "top_k")
+
+
+@dataclass(slots=True)
+class _Decoded:
+    index: int  # position in the post
+    image: Image.Image
+    salience: float
+
+
+def _decode(index: int, image_base64: str, max_side: int, min_side: int) -> Optional[_Decoded]:
+    try:
+        with Image.open(io.BytesIO(base64.b64decode(image_base64))) as source:
+            if min(source.size) < min_side:
+                return None
+            area = source.width * source.height
+            source.draft("RGB", (max_side, max_side))  # JPEG: decode at a reduced scale
+            image = source.convert("RGB")
+    except (OSError, ValueError, binascii.Error, Image.DecompressionBombError) as e:
+        logger.debug(f"Could not decode image {index}: {e}")
+        return None
+    image.thumbnail((max_side, max_side))
+    return _Decoded(index, image, area * image.convert("L").entropy())
+
+
+def _short_side(image_base64: str) -> Optional[int]:
+    try:
+        with Image.open(io.BytesIO(base64.b64decode(image_base64))) as source:  # header only
+            return min(source.size)
+    except (OSError, ValueError, binascii.Error, Image.DecompressionBombError):
+        return None
+
+
+def _encode(image: Image.Image, quality: int) -> str:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def tile(images: Sequence[Image.Image], max_side: int) -> Image.Image:
+    """Lay images out in a near-square grid of equal cells, each centred in its cell."""
+    cols = math.ceil(math.sqrt(len(images)))
+    rows = math.ceil(len(images) / cols)
+    cell = max_side // max(cols, rows)
+    canvas = Image.new("RGB", (cols * cell, rows * cell), "white")
+    for i, image in enumerate(images):
+        image = image.copy()
+        image.thumbnail((cell, cell))
+        x = (i % cols) * cell + (cell - image.width) // 2
+        y = (i // cols) * cell + (cell - image.height) // 2
+        canvas.paste(image, (x, y))
+    return canvas
+
+
+def _composite(decoded: List[_Decoded], max_side: int, quality: int) -> str:
+    return _encode(tile([d.image for d in sorted(decoded, key=lambda d: d.index)], max_side), quality)
+
+
+async def prepare_images(images: Sequence[str], policy: str = None, max_images: int = None,
+                         max_side: int = None, min_side: int = None) -> List[str]:
+    """Base64 payloads to send for a post's images, per VISION_IMAGE_POLICY."""
+    if not images:
+        return []
+    if len(images) == 1:
+        min_side = settings.vision_min_image_side if min_side is None else min_side
+        short = await asyncio.to_thread(_short_side, images[0])
+        if short is None or short < min_side:
+            metrics.inc("vision_images_dropped", policy="single")
+            return []
+        return list(images)
+    policy = policy or settings.vision_image_policy
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown VISION_IMAGE_POLICY '{policy}' (expected one of {POLICIES})")
+    max_images = max_images or settings.vision_max_images
+    max_side = max_side or settings.vision_max_side
+    min_side = settings.vision_min_image_side if min_side is None else min_side
+    quality = settings.vision_jpeg_quality
+
+    with metrics.timer("vision_prepare", policy=policy):
+        decoded = await asyncio.gather(*(asyncio.to_thread(_decode, i, b, max_side, min_side)
+                                         for i, b in enumerate(images)))
+        kept = sorted((d for d in decoded if d), key=lambda d: d.salience, reverse=True)[:max_images]
+        if len(kept) < len(images):
+            metrics.inc("vision_images_dropped", len(images) - len(kept), policy=policy)
+        if len(kept) == 1:
+            return [images[kept[0].index]]
+        if not kept:
+            return []
+        if policy == "composite":
+            payloads = [await asyncio.to_thread(_composite, kept, max_side, quality)]
+        else:
+            kept.sort(key=lambda d: d.index)
+            payloads = list(await asyncio.gather(*(asyncio.to_thread(_encode, d.image, quality) for d in kept)))
+    logger.debug(f"Prepared {len(images)} images -> {len(payloads)} payload(s) ({policy}, {len(kept)} kept)")
+    return payloads
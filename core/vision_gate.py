@@ -0,0 +1,218 @@
+"""
+Vision gating: decide per feed post whether its images are worth a multimodal call.
+
+Runs around the lazy image fetch, using only local signals:
+
+1. Before fetching: a post whose text can carry a reply on its own
+   (VISION_GATE_TEXT_CHARS letters, a CJK character counting as 3) goes
+   text-only and its images are never loaded.
+2. After fetching: each image is opened in a worker thread and dropped if it
+   looks like an icon (shorter side under VISION_MIN_IMAGE_SIDE), an avatar
+   (small and near-square), a banner (extreme aspect ratio) or a flat / blank
+   image (low grayscale entropy). If nothing is left the post goes text-only.
+
+Near-duplicates of images that were already described are answered from
+core.image_cache; the loop reports those here too (note_near_duplicate).
+
+Every decision is logged and counted (metric vision_gate{decision,reason}), and
+with VISION_GATE_LOG_FILE set appended as a JSON line. With
+VISION_GATE_COUNTERFACTUAL_RATE > 0 a sample of posts also gets the reply the
+other branch would have produced (shadow call, not posted), logged next to the
+real one so `python -m benchmarks.vision_gate_bench` can weigh the savings
+against reply quality.
+"""
+import asyncio
+import base64
+import binascii
+import io
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from config import settings
+from core import clock, metrics
+from core.brain import LLMError, QuotaExhaustedError
+from core.rate_limiter import IMAGE_TOKENS
+from core.relevance import extract_features
+from core.vision import prepare_images
+
+logger = logging.getLogger(__name__)
+
+# Entropy is measured on a thumbnail; plenty to tell a photo from a flat fill
+_STATS_SIDE = 64
+# Near-square within this ratio counts as avatar-shaped
+AVATAR_ASPECT = 1.15
+
+
+@dataclass(frozen=True, slots=True)
+class ImageStats:
+    width: int
+    height: int
+    entropy: float  # grayscale bits, 0..8
+
+    @property
+    def aspect(self) -> float:
+        return max(self.width, self.height) / max(min(self.width, self.height), 1)
+
+
+def image_stats(image_base64: str) -> Optional[ImageStats]:
+    try:
+        with Image.open(io.BytesIO(base64.b64decode(image_base64))) as image:
+            width, height = image.size
+            image.draft("L", (_STATS_SIDE, _STATS_SIDE))
+            thumb = image.convert("L")
+    except (OSError, ValueError, binascii.Error, Image.DecompressionBombError):
+        return None
+    thumb.thumbnail((_STATS_SIDE, _STATS_SIDE))
+    return ImageStats(width, height, round(thumb.entropy(), 3))
+
+
+def image_reason(stats: Optional[ImageStats]) -> Optional[str]:
+    """Why an image is not worth sending, or None if it is."""
+    if stats is None:
+        return "undecodable"
+    short = min(stats.width, stats.height)
+    if short < settings.vision_min_image_side:
+        return "icon"
+    if short <= settings.vision_gate_avatar_side and stats.aspect <= AVATAR_ASPECT:
+        return "avatar"
+    if stats.aspect > settings.vision_gate_max_aspect:
+        return "banner"
+    if stats.entropy < settings.vision_gate_min_entropy:
+        return "flat_image"
+    return None
+
+
+def _append_line(path: Path, line: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+@dataclass(slots=True)
+class GateDecision:
+    vision: bool
+    reasons: Tuple[str, ...] = ()  # why images were dropped / the post went text-only
+    images: List[str] = field(default_factory=list, repr=False)  # payloads to send (empty when text-only)
+    features: Dict[str, object] = field(default_factory=dict, repr=False)
+    # Sampled: payloads the other branch would send ([] = text-only), for a shadow reply
+    counterfactual: Optional[List[str]] = field(default=None, repr=False)
+
+    @property
+    def decision(self) -> str:
+        return "vision" if self.vision else "text_only"
+
+    @property
+    def reason(self) -> str:
+        return self.reasons[0] if self.reasons else "worth_it"
+
+
+class VisionGate:
+    def __init__(self, text_chars: int = None, counterfactual_rate: float = None, log_file: str = None):
+        self.text_chars = text_chars if text_chars is not None else settings.vision_gate_text_chars
+        self.counterfactual_rate = (settings.vision_gate_counterfactual_rate
+                                    if counterfactual_rate is None else counterfactual_rate)
+        log_file = settings.vision_gate_log_file if log_file is None else log_file
+        self.log_path = Path(log_file) if log_file else None
+        self.decisions: Dict[Tuple[str, str], int] = {}
+        self.images_avoided = 0
+        self.counterfactuals = 0
+
+    async def decide(self, post) -> GateDecision:
+        """Text-only or vision for a post with images; loads them only when needed (or sampled)."""
+        letters = extract_features(post.content)["letters"]
+        text_sufficient = self.text_chars > 0 and letters >= self.text_chars
+        sampled = self.counterfactual_rate > 0 and clock.uniform(0, 1) < self.counterfactual_rate
+        features = {"letters": letters, "images": len(post.images) or len(post.image_loaders)}
+        if text_sufficient and not sampled:
+            return await self._record(post, GateDecision(False, ("text_sufficient",), features=features))
+
+        images = await post.load_images()
+        stats = await asyncio.gather(*(asyncio.to_thread(image_stats, b) for b in images))
+        kept, reasons = [], []
+        for payload, s in zip(images, stats):
+            reason = image_reason(s)
+            if reason:
+                reasons.append(reason)
+            else:
+                kept.append(payload)
+        features["image_stats"] = [[s.width, s.height, s.entropy] if s else None for s in stats]
+        if text_sufficient:
+            reasons.insert(0, "text_sufficient")
+        elif not images:
+            reasons.append("no_image")
+        vision = bool(kept) and not text_sufficient
+        decision = GateDecision(vision, tuple(dict.fromkeys(reasons)), kept if vision else [], features)
+        if sampled and kept:
+            decision.counterfactual = [] if vision else kept
+        return await self._record(post, decision)
+
+    async def note_near_duplicate(self, post, decision: GateDecision):
+        """The image cache turned a vision decision into text-only with a cached description."""
+        key = (decision.decision, decision.reason)
+        self.decisions[key] -= 1
+        self.decisions[("text_only", "near_duplicate")] = self.decisions.get(("text_only", "near_duplicate"), 0) + 1
+        self.images_avoided += 1
+        await self._write({"event": "near_duplicate", "post_id": post.id, "platform": post.platform})
+
+    async def _record(self, post, decision: GateDecision) -> GateDecision:
+        key = (decision.decision, decision.reason)
+        self.decisions[key] = self.decisions.get(key, 0) + 1
+        metrics.inc("vision_gate", decision=decision.decision, reason=decision.reason)
+        if not decision.vision:
+            self.images_avoided += int(decision.features.get("images", 0))
+        detail = ", ".join(decision.reasons) if decision.reasons else f"{len(decision.images)} image(s)"
+        logger.info(f"   🎚️  Vision gate: {decision.decision} ({detail})"
+                    + (" [counterfactual sample]" if decision.counterfactual is not None else ""))
+        await self._write({
+            "event": "decision", "post_id": post.id, "platform": post.platform,
+            "decision": decision.decision, "reasons": list(decision.reasons),
+            "sampled": decision.counterfactual is not None, **decision.features,
+        })
+        return decision
+
+    async def shadow(self, brain, post, decision: GateDecision, reply: str):
+        """Generate (but never post) the other branch's reply for a sampled post and log both."""
+        if decision.counterfactual is None:
+            return
+        images = await prepare_images(decision.counterfactual)
+        try:
+            other = await brain.generate_comment(post.content, images=images, language=post.language)
+        except QuotaExhaustedError:
+            raise
+        except LLMError as e:
+            logger.warning(f"   Counterfactual reply failed: {e}")
+            return
+        self.counterfactuals += 1
+        metrics.inc("vision_gate_counterfactuals", decision=decision.decision)
+        await self._write({
+            "event": "counterfactual", "post_id": post.id, "platform": post.platform,
+            "decision": decision.decision, "reasons": list(decision.reasons),
+            "reply": reply, "counterfactual_reply": other,
+            "counterfactual_branch": "vision" if images else "text_only",
+            "counterfactual_images": len(images),
+        })
+
+    async def _write(self, row: dict):
+        """Append a JSON line to the decision log, off the event loop."""
+        if not self.log_path:
+            return
+        row = {"ts": clock.now().astimezone(timezone.utc).isoformat(timespec="seconds"), **row}
+        try:
+            await asyncio.to_thread(_append_line, self.log_path, json.dumps(row, ensure_ascii=False))
+        except OSError as e:
+            logger.warning(f"Vision gate log {self.log_path} not writable ({e}); disabling it.")
+            self.log_path = None
+
+    def summary(self) -> str:
+        vision = sum(n for (d, _), n in self.decisions.items() if d == "vision")
+        text_only = {r: n for (d, r), n in self.decisions.items() if d == "text_only"}
+        reasons = ", ".join(f"{r} {n}" for r, n in sorted(text_only.items(), key=lambda kv: -kv[1]))
+        return (f"{vision} vision / {sum(text_only.values())} text-only" + (f" ({reasons})" if reasons else "")
+                + f", ~{self.images_avoided * IMAGE_TOKENS} image tokens avoided"
+                + (f", {self.counterfactuals} counterfactual replies" if self.counterfactuals else ""))
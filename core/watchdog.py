@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from config import settings
+from core import clock, metrics
+
+logger = logging.getLogger(__name__)
+
+
+def process_tree_usage(root_pid: int = None) -> tuple:
+    """
+    (cpu_seconds, rss_bytes) summed over `root_pid` and all its descendants,
+    i.e. the Playwright driver and every Chromium process. Linux /proc only;
+    returns (0.0, 0) elsewhere. CPU of already-exited children is not counted.
+    """
+    root_pid = root_pid or os.getpid()
+    try:
+        stats = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                with open(f"/proc/{entry}/statm") as f:
+                    rss_pages = int(f.read().split()[1])
+            except OSError:
+                continue
+            # fields[1] = ppid, fields[11]/[12] = utime/stime (clock ticks)
+            stats[int(entry)] = (int(fields[1]), int(fields[11]) + int(fields[12]), rss_pages)
+    except OSError:
+        return 0.0, 0
+
+    tree, frontier = {root_pid}, [root_pid]
+    while frontier:
+        parent = frontier.pop()
+        for pid, (ppid, _, _) in stats.items():
+            if ppid == parent and pid not in tree:
+                tree.add(pid)
+                frontier.append(pid)
+    ticks = sum(stats[pid][1] for pid in tree if pid in stats)
+    pages = sum(stats[pid][2] for pid in tree if pid in stats)
+    return ticks / os.sysconf("SC_CLK_TCK"), pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class RendererWatchdog:
+    """
+    Keeps multi-hour sessions from bloating the renderer.
+
+    `check()` is meant to be called at safe points (between items, between
+    cycles). At most every `interval` seconds it samples CDP
+    Performance.getMetrics (JSHeapUsedSize, Nodes, Documents) plus the RSS of
+    the whole browser process tree. When a threshold is crossed it recycles
+    the page; if that keeps happening (or RSS is over the limit) the whole
+    context is recycled instead. Samples can be appended to a JSONL file.
+    """
+
+    def __init__(self, browser, adapter=None, interval: float = None, metrics_path: str = None):
+        self.browser = browser
+        self.adapter = adapter
+        self.interval = interval if interval is not None else settings.watchdog_interval_seconds
+        self.metrics_path = metrics_path if metrics_path is not None else settings.watchdog_metrics_file
+        self.limits = {
+            "js_heap_mb": settings.watchdog_max_js_heap_mb,
+            "nodes": settings.watchdog_max_dom_nodes,
+            "documents": settings.watchdog_max_documents,
+            "rss_mb": settings.watchdog_max_rss_mb,
+        }
+        self.last: Dict[str, float] = {}
+        self.page_recycles = 0
+        self.context_recycles = 0
+        self._recycles_since_context = 0
+        self._last_sample = None
+        self._cdp = None
+        self._cdp_page = None
+
+    async def _metrics(self) -> Dict[str, float]:
+        page = self.browser.page
+        if self._cdp_page is not page:
+            self._cdp = await self.browser.context.new_cdp_session(page)
+            await self._cdp.send("Performance.enable")
+            self._cdp_page = page
+        result = await self._cdp.send("Performance.getMetrics")
+        return {m["name"]: m["value"] for m in result["metrics"]}
+
+    async def sample(self) -> Dict[str, float]:
+        try:
+            cdp_metrics = await self._metrics()
+        except Exception as e:
+            logger.debug(f"Watchdog could not read renderer metrics: {e}")
+            self._cdp_page = None
+            cdp_metrics = {}
+        # Blocking file I/O (a /proc scan over every process, the JSONL append) runs off the loop
+        cpu_seconds, rss = await asyncio.to_thread(process_tree_usage)
+        self.last = {
+            "ts": time.time(),
+            "js_heap_mb": cdp_metrics.get("JSHeapUsedSize", 0) / 2**20,
+            "nodes": cdp_metrics.get("Nodes", 0),
+            "documents": cdp_metrics.get("Documents", 0),
+            "rss_mb": rss / 2**20,
+            "cpu_seconds": cpu_seconds,
+            "page_recycles": self.page_recycles,
+            "context_recycles": self.context_recycles,
+        }
+        await asyncio.to_thread(self._export, self.last)
+        for name in ("js_heap_mb", "nodes", "documents", "rss_mb"):
+            metrics.set_gauge(f"renderer_{name}", self.last[name])
+        metrics.set_gauge("renderer_recycles", self.page_recycles, kind="page")
+        metrics.set_gauge("renderer_recycles", self.context_recycles, kind="context")
+        return self.last
+
+    def _export(self, row: dict):
+        if not self.metrics_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.metrics_path)), exist_ok=True)
+            with open(self.metrics_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(row) + "\n")
+        except OSError as e:
+            logger.debug(f"Watchdog could not write metrics: {e}")
+
+    def exceeded(self, sample: Dict[str, float]) -> list:
+        return [name for name, limit in self.limits.items() if limit and sample.get(name, 0) > limit]
+
+    async def check(self) -> Optional[str]:
+        """
+        Sample if due and recycle when over a threshold.
+        Returns "page" / "context" when something was recycled, else None.
+        The caller must treat any locators it still holds as stale afterwards.
+        """
+        now = clock.monotonic()
+        if self._last_sample is not None and now - self._last_sample < self.interval:
+            return None
+        self._last_sample = now
+
+        sample = await self.sample()
+        over = self.exceeded(sample)
+        if not over:
+            return None
+
+        escalate = "rss_mb" in over or self._recycles_since_context >= settings.watchdog_context_recycle_after
+        summary = ", ".join(f"{name} {sample[name]:.0f} > {self.limits[name]:g}" for name in over)
+        logger.warning(f"🧹 Renderer over limits ({summary}). Recycling {'context' if escalate else 'page'}...")
+        try:
+            if escalate:
+                await self.browser.recycle_context()
+                self.context_recycles += 1
+                self._recycles_since_context = 0
+            else:
+                await self.browser.recycle_page()
+                self.page_recycles += 1
+                self._recycles_since_context += 1
+        except Exception as e:
+            logger.error(f"Watchdog recycle failed: {e}")
+            return None
+
+        self._cdp_page = None
+        if self.adapter is not None:
+            self.adapter.on_page_recycled()
+        after = await self.sample()
+        logger.info(
+            f"   Renderer after recycle: heap {after['js_heap_mb']:.0f} MB | nodes {after['nodes']:.0f} | "
+            f"documents {after['documents']:.0f} | RSS {after['rss_mb']:.0f} MB"
+        )
+        return "context" if escalate else "page"
+
+    def stats(self) -> dict:
+        return {**self.last, "page_recycles": self.page_recycles, "context_recycles": self.context_recycles}
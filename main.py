@@ -4,10 +4,24 @@ import sys
 import os
 import httpx 
 from config import settings
+from core import clock, metrics
 from core.db import Database
-from core.brain import BotBrain
+from core.brain import (BotBrain, ContentRejectedError, QuotaExhaustedError,
+                        RateLimitedError, TransientLLMError)
 from core.browser import BrowserEngine
 from core.factory import PlatformAdapterFactory
+from core.scheduler import AdaptivePollScheduler, RetryBackoff
+from core.watchdog import RendererWatchdog
+from core.loop_monitor import LoopMonitor
+from core.checkpoint import SessionCheckpoint
+from core.language import detect_language, is_supported
+from core.relevance import RelevanceFilter
+from core.image_cache import ImageDescriptionCache
+from core.vision import prepare_images
+from core.vision_gate import VisionGate
+from core.logging_setup import bind_log_context, setup_logging
+from adapters import selectors
+from adapters.ui_waits import log_step_stats
 
 # --- Venv Enforcement ---
 def ensure_venv():
@@ -30,18 +44,38 @@ def ensure_venv():
 
 ensure_venv()
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler("data/bot.log"),
-        logging.StreamHandler()
-    ]
-)
+# Setup logging (queued: file/console I/O happens on a background thread)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-async def run_feed_mode(adapter, brain, db):
+async def back_off(backoff, error):
+    """Wait out a rate-limited / transient LLM error (honours Retry-After) and record the time."""
+    kind = "rate_limited" if isinstance(error, RateLimitedError) else "transient"
+    delay = backoff.next_delay(error.retry_after)
+    metrics.inc("llm_backoffs", kind=kind)
+    metrics.observe("backoff", delay, kind=kind)
+    hint = f", Retry-After {error.retry_after:.0f}s" if error.retry_after is not None else ""
+    logger.warning(
+        f"   ⏳ LLM {kind.replace('_', ' ')}{hint}. Backing off {delay:.1f}s "
+        f"(attempt {backoff.attempts}, {backoff.total_seconds:.0f}s total this session)..."
+    )
+    await clock.sleep(delay)
+
+
+def language_supported(item) -> bool:
+    """Tag the post/notification with its detected language; False when the persona doesn't reply in it."""
+    if not settings.language_detection_enabled:
+        return True
+    guess = detect_language(item.content)
+    item.language = guess.code
+    metrics.inc("items_by_language", language=guess.code)
+    if is_supported(guess.code):
+        return True
+    logger.info(f"   🌐 Skipping {guess.name} text (not in SUPPORTED_LANGUAGES).")
+    return False
+
+
+async def run_feed_mode(adapter, brain, db, checkpoint=None):
     """
     Feed browsing mode - scans feed and replies to random posts.
     """
@@ -49,61 +83,169 @@ async def run_feed_mode(adapter, brain, db):
     
     consecutive_errors = 0
     max_consecutive_errors = 3
+    backoff = RetryBackoff()
+    watchdog = RendererWatchdog(adapter.browser, adapter) if settings.watchdog_enabled else None
+    relevance = RelevanceFilter() if settings.relevance_filter_enabled else None
+    image_cache = ImageDescriptionCache(db) if settings.image_cache_enabled else None
+    if image_cache:
+        await image_cache.load()
+    vision_gate = VisionGate() if settings.vision_gate_enabled else None
 
     while True:
         posts_replied = 0
-        posts = await adapter.get_feed()
+        if watchdog:
+            await watchdog.check()
+        if checkpoint:
+            await checkpoint.maybe_save()
+        with metrics.timer("scan", mode="feed"):
+            posts = await adapter.get_feed()
+        metrics.inc("posts_scanned", len(posts))
         
         if not posts:
             logger.warning("   No posts found in this scan. Retrying in 10s...")
-            await asyncio.sleep(10)
+            await clock.sleep(10)
             continue
 
-        for post in posts:
+        for index, post in enumerate(posts):
             if consecutive_errors >= max_consecutive_errors:
                 logger.error("❌ Too many consecutive errors. Stopping session.")
                 return
 
+            # Safe point between items; after a recycle the remaining locators are stale,
+            # so this post and the rest of the batch are offered again instead of settled
+            if watchdog and await watchdog.check():
+                for rest in posts[index:]:
+                    adapter.retry_later(rest)
+                    rest.release()
+                break
+
+            retry = False  # set when the post should be offered again instead of settled
             try:
-                post_id = post['id']
-                if await db.is_replied(post_id):
+                post_id = post.id
+                bind_log_context(post_id=post_id)
+                with metrics.timer("dedup"):
+                    already_replied = await db.is_replied(post_id)
+                if already_replied:
                     logger.info(f"Skipping already replied post: {post_id}")
+                    metrics.inc("posts_skipped", reason="already_replied")
                     continue
                     
                 logger.info(f"Analyzing post: {post_id}")
+                if not language_supported(post):
+                    metrics.inc("posts_skipped", reason="unsupported_language")
+                    continue
+                low = relevance.check(post) if relevance else None
+                if low:
+                    logger.info(f"   🪶 Skipping low-relevance post (score {low.score:.2f}: {', '.join(low.reasons) or low.reason})")
+                    metrics.inc("posts_skipped", reason="low_relevance")
+                    metrics.inc("relevance_skipped", reason=low.reason)
+                    continue
                 
-                image_data = post.get('image')
-                if image_data:
+                # Image payloads are fetched lazily (concurrently), only for posts that get this far
+                # and, with the vision gate on, only when the text alone isn't enough
+                gate = await vision_gate.decide(post) if vision_gate and post.has_image else None
+                if gate:
+                    images = gate.images
+                else:
+                    images = await post.load_images() if post.has_image else []
+                if images:
+                    count = len(images)
+                    images = await prepare_images(images)  # also drops a lone avatar/icon
+                    if count > 1:
+                        logger.info(f"   🗂️  {count} images -> {len(images)} vision payload(s) ({settings.vision_image_policy})")
+                fingerprint, image_description = None, None
+                if len(images) == 1 and image_cache:
+                    fingerprint, image_description = await image_cache.match(images[0])
+                if image_description:
+                    logger.info("   🖼️  Image seen before. Text-only request with its cached description.")
+                    images = []
+                    if gate:
+                        await vision_gate.note_near_duplicate(post, gate)
+                elif images:
                     logger.info("   📸 Image detected! Sending visual data to brain...")
                 else:
                     logger.info("   📄 Text only.")
 
-                comment = await brain.generate_comment(post['content'], image_base64=image_data)
+                key = checkpoint.post_key(post) if checkpoint else None
+                comment = checkpoint.pending_reply(key, post.content) if checkpoint else None
+                if comment:
+                    logger.info("   ♻️  Reusing the reply generated before the restart.")
+                else:
+                    comment = await brain.generate_comment(post.content, images=images, language=post.language,
+                                                           image_description=image_description,
+                                                           describe_image=fingerprint is not None)
+                    if fingerprint is not None and brain.last_image_description:
+                        await image_cache.store(fingerprint, brain.last_image_description)
+                    if not comment:
+                        logger.warning("   ⚠️  Nothing left to post once the image line was removed. Skipping.")
+                        metrics.inc("posts_skipped", reason="empty_reply")
+                        continue
+                    if gate and gate.counterfactual is not None:
+                        await vision_gate.shadow(brain, post, gate, comment)
+                    if checkpoint:
+                        await checkpoint.add_pending(key, post_id, comment)
                 
-                await adapter.reply(post, comment)
+                with metrics.timer("reply", mode="feed") as t:
+                    sent = await adapter.reply(post, comment)
+                if not sent:
+                    # Unconfirmed: keep the generated reply checkpointed and offer the post again
+                    logger.warning(f"   Failed to reply to {post_id}")
+                    retry = True
+                    continue
+                logger.info(f"   ✅ Replied in {t.seconds:.1f}s", extra={"stage": "reply", "duration": t.seconds})
                 await db.add_reply(post_id, comment)
+                if checkpoint:
+                    checkpoint.resolve(key)
                 posts_replied += 1
+                metrics.inc("replies_sent", mode="feed")
                 
                 consecutive_errors = 0
-                await asyncio.sleep(settings.min_delay_seconds)
+                backoff.reset()
+                await clock.sleep(settings.min_delay_seconds)
+            except QuotaExhaustedError as e:
+                logger.critical(f"🚨 API QUOTA EXHAUSTED. Stopping. ({e})")
+                retry = True  # not handled; keep it out of the checkpointed seen-set
+                return
+            except (RateLimitedError, TransientLLMError) as e:
+                # Not counted as a consecutive error; the post is offered again after the back-off
+                retry = True
+                await back_off(backoff, e)
+                continue
+            except ContentRejectedError as e:
+                logger.warning(f"   🚫 Provider rejected post {post.id}: {e}. Skipping.")
+                metrics.inc("posts_skipped", reason="content_rejected")
+                continue
             except Exception as e:
                 consecutive_errors += 1
-                logger.error(f"⚠️  Error processing post {post.get('id', 'unknown')}: {e}")
-                
-                if "insufficient_quota" in str(e) or "429" in str(e):
-                    logger.critical("🚨 API QUOTA EXCEEDED. Stopping.")
-                    return
+                metrics.inc("errors", mode="feed")
+                logger.error(f"⚠️  Error processing post {post.id}: {e}")
+                retry = True
                 
                 logger.info(f"   Skipping... (Consecutive Errors: {consecutive_errors})")
-                await asyncio.sleep(2)
+                await clock.sleep(2)
                 continue
+            finally:
+                # Settle the post with the feed observer (or offer it again), then drop
+                # text, image payload and locator as soon as the item is done
+                if not retry:
+                    adapter.mark_done(post)
+                elif not adapter.retry_later(post):
+                    logger.warning(f"   Giving up on post {post.id} after repeated failures.")
+                post.release()
         
+        bind_log_context(post_id=None)
+        if relevance and relevance.skipped:
+            logger.info(f"   🪶 Relevance filter: {relevance.summary()}")
+        if image_cache and image_cache.lookups:
+            logger.info(f"   🖼️  Image cache: {image_cache.summary()}")
+        if vision_gate and vision_gate.decisions:
+            logger.info(f"   🎚️  Vision gate: {vision_gate.summary()}")
         if posts_replied > 0:
             logger.info(f"✨ Cycle complete. Replied to {posts_replied} posts. Refreshing...")
             await adapter.refresh_feed()
-            await asyncio.sleep(5)
+            await clock.sleep(5)
 
-async def run_notification_mode(adapter, brain, db):
+async def run_notification_mode(adapter, brain, db, checkpoint=None):
     """
     Notification/Comment mode - monitors notifications and replies to comments on your posts.
     """
@@ -111,74 +253,152 @@ async def run_notification_mode(adapter, brain, db):
     
     consecutive_errors = 0
     max_consecutive_errors = 3
+    has_activity = True  # Always do a full fetch on the first pass
+    scheduler = AdaptivePollScheduler()
+    backoff = RetryBackoff()
+    watchdog = RendererWatchdog(adapter.browser, adapter) if settings.watchdog_enabled else None
+    # Persisted high-water mark: parsing stops at the first already-seen notification
+    cursor = await db.load_notification_cursor(settings.platform)
+    if checkpoint:
+        checkpoint.merge_cursor(cursor)
 
-    while True:
-        notifications_replied = 0
+    def retry_later(notif):
+        # Not handled: the cursor keeps offering it until it succeeds or is given up
+        if cursor.defer(notif.id):
+            logger.info(f"   ↩️  Will retry {notif.id} on a later poll.")
+        else:
+            logger.warning(f"   Giving up on {notif.id} after {cursor.max_attempts} attempts.")
+            if checkpoint:
+                checkpoint.resolve(notif.id)
+
+    try:
+        while True:
+            if not has_activity:
+                # Cheap check (badge / page traffic); full fetch only when something changed
+                has_activity = await adapter.wait_for_notifications(scheduler.next_interval())
+                if not has_activity:
+                    scheduler.record(hit=False)
+                continue
+
+            notifications_replied = 0
         
-        try:
-            notifications = await adapter.get_notifications()
-        except Exception as e:
-            logger.error(f"Error fetching notifications: {e}")
-            await asyncio.sleep(30)
-            continue
+            try:
+                with metrics.timer("scan", mode="notification"):
+                    notifications = await adapter.get_notifications(cursor=cursor)
+            except Exception as e:
+                logger.error(f"Error fetching notifications: {e}")
+                await clock.sleep(scheduler.next_interval())
+                continue
         
-        if not notifications:
-            logger.info("   No actionable notifications. Checking again in 30s...")
-            await asyncio.sleep(30)
-            continue
+            scheduler.record(hit=bool(notifications))
+            metrics.inc("notifications_scanned", len(notifications))
+            metrics.set_gauge("poll_interval_seconds", scheduler.interval)
+            # Unresolved items that are no longer listed still use up an attempt
+            listed = {notif.id for notif in notifications}
+            for notif_id in [n for n in cursor.unresolved if n not in listed]:
+                cursor.defer(notif_id)
+            if not notifications:
+                await db.save_notification_cursor(cursor)
+                logger.info("   No actionable notifications. Waiting for new activity...")
+                has_activity = await adapter.wait_for_notifications(scheduler.next_interval()) or bool(cursor.unresolved)
+                continue
 
-        for notif in notifications:
-            if consecutive_errors >= max_consecutive_errors:
-                logger.error("❌ Too many consecutive errors. Stopping session.")
-                return
+            for notif in notifications:
+                if consecutive_errors >= max_consecutive_errors:
+                    logger.error("❌ Too many consecutive errors. Stopping session.")
+                    return
 
-            try:
-                notif_id = notif['id']
-                notif_type = notif.get('type', 'unknown')
+                try:
+                    notif_id = notif.id
+                    bind_log_context(post_id=notif_id)
+                    notif_type = notif.type
                 
-                if await db.is_replied(notif_id):
-                    logger.info(f"Skipping already replied notification: {notif_id}")
-                    continue
+                    with metrics.timer("dedup"):
+                        already_replied = await db.is_replied(notif_id)
+                    if already_replied:
+                        logger.info(f"Skipping already replied notification: {notif_id}")
+                        cursor.add(notif_id)
+                        continue
                 
-                # Only reply to comments, replies, and mentions
-                if notif_type not in ['comment', 'reply', 'mention']:
-                    logger.info(f"Skipping {notif_type} notification: {notif_id}")
-                    continue
+                    # Only reply to comments, replies, and mentions
+                    if notif_type not in ['comment', 'reply', 'mention']:
+                        logger.info(f"Skipping {notif_type} notification: {notif_id}")
+                        cursor.add(notif_id)
+                        continue
                     
-                logger.info(f"Processing {notif_type} notification: {notif_id}")
-                
-                # Generate reply
-                comment = await brain.generate_comment(notif['content'])
+                    if not language_supported(notif):
+                        cursor.add(notif_id)
+                        continue
+
+                    logger.info(f"Processing {notif_type} notification: {notif_id} (confidence {notif.confidence:.2f})")
                 
-                # Send reply
-                success = await adapter.reply_to_comment(notif, comment)
+                    # Generate reply (or reuse one generated before a restart)
+                    comment = checkpoint.pending_reply(notif_id, notif.content) if checkpoint else None
+                    if comment:
+                        logger.info("   ♻️  Reusing the reply generated before the restart.")
+                    else:
+                        comment = await brain.generate_comment(notif.content, language=notif.language)
+                        if checkpoint:
+                            await checkpoint.add_pending(notif_id, notif_id, comment)
                 
-                if success:
-                    await db.add_reply(notif_id, comment)
-                    notifications_replied += 1
-                    consecutive_errors = 0
-                else:
-                    logger.warning(f"   Failed to reply to {notif_id}")
+                    # Send reply
+                    with metrics.timer("reply", mode="notification") as t:
+                        success = await adapter.reply_to_comment(notif, comment)
                 
-                await asyncio.sleep(settings.min_delay_seconds)
+                    if success:
+                        await db.add_reply(notif_id, comment)
+                        notifications_replied += 1
+                        metrics.inc("replies_sent", mode="notification")
+                        logger.info(f"   ✅ Replied in {t.seconds:.1f}s", extra={"stage": "reply", "duration": t.seconds})
+                        consecutive_errors = 0
+                        backoff.reset()
+                        cursor.add(notif_id)
+                        if checkpoint:
+                            checkpoint.resolve(notif_id)
+                    else:
+                        logger.warning(f"   Failed to reply to {notif_id}")
+                        retry_later(notif)
                 
-            except Exception as e:
-                consecutive_errors += 1
-                logger.error(f"⚠️  Error processing notification: {e}")
+                    await clock.sleep(settings.min_delay_seconds)
                 
-                if "insufficient_quota" in str(e) or "429" in str(e):
-                    logger.critical("🚨 API QUOTA EXCEEDED. Stopping.")
+                except QuotaExhaustedError as e:
+                    logger.critical(f"🚨 API QUOTA EXHAUSTED. Stopping. ({e})")
                     return
+                except (RateLimitedError, TransientLLMError) as e:
+                    retry_later(notif)
+                    await back_off(backoff, e)
+                    continue
+                except ContentRejectedError as e:
+                    logger.warning(f"   🚫 Provider rejected notification {notif.id}: {e}. Skipping.")
+                    cursor.add(notif.id)
+                    continue
+                except Exception as e:
+                    consecutive_errors += 1
+                    metrics.inc("errors", mode="notification")
+                    logger.error(f"⚠️  Error processing notification: {e}")
+                    retry_later(notif)
                 
-                logger.info(f"   Skipping... (Consecutive Errors: {consecutive_errors})")
-                await asyncio.sleep(2)
-                continue
+                    logger.info(f"   Skipping... (Consecutive Errors: {consecutive_errors})")
+                    await clock.sleep(2)
+                    continue
+                finally:
+                    notif.release()
         
-        if notifications_replied > 0:
-            logger.info(f"✨ Cycle complete. Replied to {notifications_replied} notifications.")
+            bind_log_context(post_id=None)
+            if notifications_replied > 0:
+                logger.info(f"✨ Cycle complete. Replied to {notifications_replied} notifications.")
+            await db.save_notification_cursor(cursor)
+            if checkpoint:
+                await checkpoint.maybe_save(cursor)
+            if watchdog:
+                await watchdog.check()
         
-        # Wait before next check
-        await asyncio.sleep(30)
+            # Wait for new activity (or pending retries) before the next full fetch
+            has_activity = await adapter.wait_for_notifications(scheduler.next_interval()) or bool(cursor.unresolved)
+    finally:
+        await db.save_notification_cursor(cursor)
+        if checkpoint:
+            checkpoint.cursor_ids = cursor.ids
 
 async def main():
     logger.info(f"Starting Social Bot MVP (Dry Run: {settings.dry_run})")
@@ -215,6 +435,7 @@ async def main():
     
     operation_mode = "notification" if mode_choice == "2" else "feed"
     print(f"✅ Selected Mode: {operation_mode.upper()}")
+    bind_log_context(platform=settings.platform, mode=operation_mode)
 
     # --- Interactive Provider Selection ---
     print("\nSelect LLM Provider:")
@@ -293,19 +514,39 @@ async def main():
         logger.error(f"Failed to initialize adapter for {settings.platform}: {e}")
         return
     
+    metrics.start_http_server()
+    metrics.set_gauge("info", 1, platform=settings.platform, mode=operation_mode, provider=settings.llm_provider)
+    metrics.gauge_callback("selector_first_try_hit_rate", selectors.registry.hit_rate,
+                           "Share of selector lookups that hit on the first alternative")
+    exporter = asyncio.create_task(metrics.run_jsonl_exporter())
+    loop_monitor = LoopMonitor() if settings.loop_monitor_enabled else None
+    checkpoint = SessionCheckpoint(settings.platform, operation_mode) if settings.checkpoint_enabled else None
+    if loop_monitor:
+        loop_monitor.start()
+
     try:
         await browser.start()
         await adapter.login()
+        if checkpoint:
+            await checkpoint.resume(adapter)
         
         # Run selected mode
         if operation_mode == "notification":
-            await run_notification_mode(adapter, brain, db)
+            await run_notification_mode(adapter, brain, db, checkpoint)
         else:
-            await run_feed_mode(adapter, brain, db)
+            await run_feed_mode(adapter, brain, db, checkpoint)
             
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
     finally:
+        selectors.registry.log_stats()
+        log_step_stats()
+        exporter.cancel()
+        if loop_monitor:
+            loop_monitor.stop()
+        if checkpoint:
+            await checkpoint.save()
+            checkpoint.log_work_saved()
         await browser.stop()
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from core import brain
+from core.brain import (ContentRejectedError, QuotaExhaustedError, RateLimitedError, TransientLLMError,
+                        classify_openai_error, parse_retry_after)
+
+
+def response(status, headers=None):
+    return httpx.Response(status, headers=headers or {}, request=httpx.Request("POST", "https://api.test/v1/chat"))
+
+
+def test_rate_limit_carries_retry_after():
+    error = classify_openai_error(openai.RateLimitError("slow down", response=response(429, {"retry-after-ms": "1500"}), body=None))
+    assert isinstance(error, RateLimitedError) and error.retry_after == 1.5
+
+
+def test_insufficient_quota_stops_the_session():
+    error = openai.RateLimitError("insufficient_quota", response=response(429), body={"code": "insufficient_quota"})
+    assert isinstance(classify_openai_error(error), QuotaExhaustedError)
+
+
+def test_server_errors_and_timeouts_are_transient():
+    error = openai.InternalServerError("boom", response=response(503, {"retry-after": "7"}), body=None)
+    assert isinstance(classify_openai_error(error), TransientLLMError)
+    timeout = openai.APITimeoutError(request=httpx.Request("POST", "https://api.test"))
+    assert isinstance(classify_openai_error(timeout), TransientLLMError)
+
+
+def test_content_filter_is_rejected():
+    error = openai.BadRequestError("nope", response=response(400), body={"code": "content_policy_violation"})
+    assert isinstance(classify_openai_error(error), ContentRejectedError)
+
+
+def test_unknown_errors_are_not_classified():
+    assert classify_openai_error(ValueError("bug")) is None
+    assert classify_openai_error(openai.AuthenticationError("key", response=response(401), body=None)) is None
+
+
+def test_provider_reraises_unknown_errors_unchanged(monkeypatch):
+    async def create(provider, **kwargs):
+        raise KeyError("bug")
+
+    monkeypatch.setattr(brain, "_openai_create", create)
+    monkeypatch.setattr(brain.settings, "openai_api_key", "test")
+    with pytest.raises(KeyError):
+        asyncio.run(brain.OpenAIProvider().generate("system", "post"))
+
+
+@pytest.mark.parametrize("value, seconds", [("12", 12.0), ("1.5", 1.5), ("6m0s", 360.0), ("250ms", 0.25), ("soon", None)])
+def test_parse_retry_after(value, seconds):
+    assert parse_retry_after(value) == seconds
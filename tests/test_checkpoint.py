@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from adapters.base import BaseAdapter, Post
+from adapters.feed_observer import FeedObserver
+from core.checkpoint import SessionCheckpoint
+
+
+class FakeAdapter(BaseAdapter):
+    def __init__(self):
+        self.feed_observer = FeedObserver(page=None, selector="article")
+
+    async def login(self):
+        pass
+
+    async def get_feed(self):
+        return []
+
+    async def reply(self, post, comment):
+        return True
+
+    async def get_notifications(self, cursor=None):
+        return []
+
+    async def reply_to_comment(self, notification, comment):
+        return True
+
+
+def checkpoint(path):
+    return SessionCheckpoint("instagram", "feed", path=str(path), interval=0, max_age_hours=1)
+
+
+def test_round_trip_keeps_settled_posts_and_pending_replies(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    adapter = FakeAdapter()
+    adapter.feed_observer._on_posts(None, [{"dom_id": "a-1", "text": "replied post"},
+                                          {"dom_id": "a-2", "text": "drained, not processed"},
+                                          {"dom_id": "a-3", "text": "reply generated, not posted"}])
+    replied, unprocessed, generated = adapter.feed_observer.drain()
+    adapter.feed_observer.done(replied.key)
+
+    before = checkpoint(path)
+
+    async def first_run():
+        await before.resume(adapter)
+        post = Post(id="ig_1", content="Reply generated, not posted (parsed text)", key=generated.key)
+        await before.add_pending(before.post_key(post), post.id, "Nice!")
+
+    asyncio.run(first_run())
+
+    restarted = FakeAdapter()
+    after = checkpoint(path)
+    asyncio.run(after.resume(restarted))
+    assert restarted._take_resumed_feed_seen() == [replied.key]
+    # Same key as before although the parsed content differs from the rendered text
+    assert after.pending_reply(generated.key) == "Nice!"
+    assert after.reused_replies == 1
+    assert unprocessed.key not in json.loads(path.read_text())["adapter"]["feed_seen"]
+
+    after.resolve(generated.key)
+    assert after.pending_reply(generated.key) is None
+
+
+def test_post_key_falls_back_to_text_digest_for_unobserved_feeds():
+    assert SessionCheckpoint.post_key(Post(id="x", content="a  b")) == SessionCheckpoint.post_key(Post(id="y", content="a b"))
+    assert SessionCheckpoint.post_key(Post(id="x", content="a b", key="k")) == "k"
+
+
+def test_other_platform_or_version_starts_fresh(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    asyncio.run(checkpoint(path).save())
+    assert checkpoint(path).load()
+    assert SessionCheckpoint("threads", "feed", path=str(path)).load() == {}
+
+    state = json.loads(path.read_text())
+    path.write_text(json.dumps({**state, "version": 1}))
+    assert checkpoint(path).load() == {}
@@ -0,0 +1,82 @@
+from adapters.feed_observer import FeedObserver
+
+
+def report(observer, *texts):
+    observer._on_posts(None, [{"dom_id": f"d{i}", "text": text} for i, text in enumerate(texts)])
+
+
+def keys(posts):
+    return [post.key for post in posts]
+
+
+def test_reported_posts_stay_pending_until_done():
+    observer = FeedObserver(page=None, selector="article")
+    report(observer, "first post", "second post")
+    first, second = observer.drain()
+    assert observer.seen_keys == []
+
+    # Re-rendering a pending post does not report it twice
+    report(observer, "first post")
+    assert observer.drain() == []
+
+    observer.done(first.key)
+    assert observer.seen_keys == [first.key]
+    report(observer, "first post")
+    assert observer.drain() == []
+
+
+def test_requeue_offers_the_same_post_again_until_given_up():
+    observer = FeedObserver(page=None, selector="article", max_attempts=3)
+    report(observer, "rate limited post")
+    post = observer.drain()[0]
+
+    assert observer.requeue(post.key)
+    assert keys(observer.drain()) == [post.key]
+    assert observer.requeue(post.key)
+    assert keys(observer.drain()) == [post.key]
+    assert not observer.requeue(post.key)
+    assert observer.drain() == []
+    assert observer.seen_keys == [post.key]
+
+
+def test_forgotten_post_is_reported_again_when_rerendered():
+    observer = FeedObserver(page=None, selector="article")
+    report(observer, "recycled before it was read")
+    post = observer.drain()[0]
+    observer.forget(post.key)
+    assert observer.seen_keys == []
+    report(observer, "recycled before it was read")
+    assert keys(observer.drain()) == [post.key]
+
+
+def test_restored_seen_set_skips_settled_posts_only():
+    settled = FeedObserver.fingerprint("already replied")
+    observer = FeedObserver(page=None, selector="article", seen=[settled])
+    report(observer, "already replied", "never processed")
+    assert [post.text for post in observer.drain()] == ["never processed"]
+    assert observer.restored_hits == 1
+
+
+def test_rebind_drops_pending_posts_of_the_old_page():
+    observer = FeedObserver(page="old", selector="article")
+    report(observer, "on the old page")
+    observer.rebind("new")
+    assert observer.drain() == []
+    report(observer, "on the old page")
+    assert len(observer.drain()) == 1
+
+
+def test_fingerprint_ignores_whitespace_layout():
+    assert FeedObserver.fingerprint("a  b\nc") == FeedObserver.fingerprint("a b c")
+
+
+def test_reload_moves_pending_posts_to_the_new_nodes():
+    observer = FeedObserver(page="page", selector="article")
+    observer._on_posts(None, [{"dom_id": "a-1", "text": "rate limited post"}])
+    post = observer.drain()[0]
+    assert observer.requeue(post.key)
+
+    # page.reload(): same Page, new document, the observer re-tags every post
+    observer.rebind("page")
+    observer._on_posts(None, [{"dom_id": "b-1", "text": "rate limited post"}])
+    assert [p.selector for p in observer.drain()] == ["[data-sb-post='b-1']"]
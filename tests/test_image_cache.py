@@ -0,0 +1,97 @@
+import asyncio
+import base64
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from core.brain import split_image_description
+from core.db import Database
+from core.image_cache import ImageDescriptionCache, hamming, image_fingerprint
+
+
+def picture(size=(320, 240), fmt="PNG", quality=95, shift=0) -> str:
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    w, h = size
+    draw.rectangle([w * 0.1 + shift, h * 0.2, w * 0.5 + shift, h * 0.8], fill="navy")
+    draw.ellipse([w * 0.55, h * 0.1, w * 0.9, h * 0.6], fill="orange")
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **({"quality": quality} if fmt == "JPEG" else {}))
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def other_picture() -> str:
+    image = Image.new("RGB", (320, 240), "black")
+    ImageDraw.Draw(image).polygon([(0, 240), (160, 0), (320, 240)], fill="yellow")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+@pytest.mark.parametrize("algorithm", ["dhash", "phash"])
+def test_fingerprint_survives_rescaling_and_recompression(algorithm):
+    original = image_fingerprint(picture(), algorithm)
+    resized = image_fingerprint(picture(size=(640, 480), fmt="JPEG", quality=60), algorithm)
+    assert 0 <= original < 2 ** 64
+    assert hamming(original, resized) <= 6
+    assert hamming(original, image_fingerprint(other_picture(), algorithm)) > 10
+
+
+def test_undecodable_image_has_no_fingerprint():
+    assert image_fingerprint("bm90IGFuIGltYWdl") is None
+    assert image_fingerprint("%%%") is None
+
+
+def test_cache_round_trip_through_the_database(tmp_path):
+    db = Database(str(tmp_path / "history.db"))
+
+    async def scenario():
+        await db.init_db()
+        cache = ImageDescriptionCache(db, algorithm="dhash", max_distance=6, max_entries=10)
+        fingerprint, description = await cache.match(picture())
+        assert description is None
+        await cache.store(fingerprint, "a navy block next to an orange circle")
+
+        restarted = ImageDescriptionCache(db, algorithm="dhash", max_distance=6, max_entries=10)
+        await restarted.load()
+        _, near = await restarted.match(picture(size=(640, 480), fmt="JPEG", quality=60))
+        _, miss = await restarted.match(other_picture())
+        return restarted, near, miss
+
+    cache, near, miss = asyncio.run(scenario())
+    assert near == "a navy block next to an orange circle"
+    assert miss is None
+    assert (cache.hits, cache.lookups) == (1, 2)
+
+
+def test_unknown_algorithm_is_rejected():
+    with pytest.raises(ValueError):
+        ImageDescriptionCache(db=None, algorithm="md5")
+
+
+@pytest.mark.parametrize("text", [
+    "Love the colors here!\nIMAGE: a red car parked by the sea",
+    "Love the colors here!\n\n**IMAGE:** a red car parked by the sea",
+    "Love the colors here!\n**Image**: a red car parked by the sea",
+    "Love the colors here!\nImage - a red car parked by the sea",
+    "Love the colors here!\n*Image description: a red car parked by the sea*",
+    "- image: a red car parked by the sea\nLove the colors here!",
+    "Love the colors here! IMAGE: a red car parked by the sea",
+    "Love the colors here! **Image:** a red car parked by the sea",
+])
+def test_image_description_is_stripped_whatever_the_format(text):
+    reply, description = split_image_description(text)
+    assert reply == "Love the colors here!"
+    assert description == "a red car parked by the sea"
+
+
+def test_every_image_line_is_removed_and_the_last_one_kept():
+    reply, description = split_image_description("IMAGE: a cat\nSo cute 😍\nIMAGE: a cat on a sofa")
+    assert reply == "So cute 😍"
+    assert description == "a cat on a sofa"
+
+
+def test_ordinary_uses_of_the_word_are_left_alone():
+    for text in ("Image-perfect sunset 🔥", "What an image: pure magic", "Can't stop looking at this image"):
+        assert split_image_description(text) == (text, None)
@@ -0,0 +1,75 @@
+import pytest
+
+from benchmarks.langid_bench import MIN_ACCURACY, load_corpus
+from core.language import UNDETERMINED, clip_reply, detect_language, is_supported
+
+
+def test_test_split_accuracy():
+    corpus = load_corpus("test")
+    correct = sum(detect_language(row["text"]).code == row["lang"] for row in corpus)
+    assert correct / len(corpus) >= MIN_ACCURACY
+
+
+@pytest.mark.parametrize("text, code", [
+    ("今天天氣真好，我們去公園走走吧", "zh-TW"),
+    ("今天天气真好，我们去公园走走吧", "zh-CN"),
+    ("今日はとても良い天気ですね", "ja"),
+    ("오늘 날씨가 정말 좋네요", "ko"),
+    ("Сегодня отличная погода", "ru"),
+    ("Hôm nay trời đẹp quá, đi dạo thôi", "vi"),
+    ("The weather is lovely today, let's go for a walk in the park", "en"),
+])
+def test_script_and_model_stages(text, code):
+    guess = detect_language(text)
+    assert guess.code == code
+    assert 0 < guess.confidence <= 1
+
+
+def test_too_little_text_is_undetermined():
+    assert detect_language("ok!").code == UNDETERMINED
+    assert detect_language("👍👍 123").code == UNDETERMINED
+    assert detect_language("好耶").code != UNDETERMINED  # two Han characters already say a lot
+
+
+def test_is_supported(monkeypatch):
+    monkeypatch.setattr("core.language.settings.supported_languages", "en,zh-TW")
+    assert is_supported("en") and is_supported("zh-TW")
+    assert is_supported(UNDETERMINED)
+    assert is_supported("zh")  # base tag matches any zh-* entry
+    assert not is_supported("zh-CN")
+    assert not is_supported("ko")
+
+
+def test_clip_reply_cuts_at_a_clause_break(monkeypatch):
+    monkeypatch.setattr("core.language.settings.reply_max_chars_cjk", 10)
+    assert clip_reply("好喜歡這張照片，顏色超美的！真的", "zh-TW") == "好喜歡這張照片"
+    monkeypatch.setattr("core.language.settings.reply_max_words", 5)
+    assert clip_reply("We loved it, the colors are amazing here", "en") == "We loved it"
+    assert clip_reply("Short one", "en") == "Short one"
+
+
+@pytest.mark.parametrize("text", [
+    "Zo blij dat het eindelijk zomer is, tijd voor een ijsje",  # Dutch
+    "Någon mer som tycker att måndagar borde förbjudas",  # Swedish
+    "Grabe ang init ngayon, parang ayaw ko nang lumabas ng bahay",  # Tagalog
+    "Minulla oli tänään todella mukava päivä puistossa ystävien kanssa",  # Finnish, not in the model
+    "Dnes jsem měl opravdu pěkný den v parku s přáteli",  # Czech, not in the model
+    "Leo nilikuwa na siku nzuri sana katika bustani na marafiki zangu",  # Swahili, not in the model
+])
+def test_out_of_model_languages_are_not_passed_off_as_supported(text):
+    guess = detect_language(text)
+    assert guess.code == UNDETERMINED or not is_supported(guess.code)
+
+
+@pytest.mark.parametrize("text", ["lol same", "omg fr fr", "ikr lmao", "nice pic bro"])
+def test_short_slang_is_undetermined(text):
+    assert detect_language(text).code == UNDETERMINED
+
+
+def test_floors_are_configurable(monkeypatch):
+    text = "Qué bonito, me encanta"
+    assert detect_language(text).code == UNDETERMINED
+    monkeypatch.setattr("core.language.settings.language_min_confidence", 0.0)
+    monkeypatch.setattr("core.language.settings.language_min_margin", 0.0)
+    monkeypatch.setattr("core.language.settings.language_min_ngrams", 0)
+    assert detect_language(text).code != UNDETERMINED
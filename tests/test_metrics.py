@@ -0,0 +1,8 @@
+from core.metrics import MetricsRegistry
+
+
+def test_label_values_are_escaped_in_the_text_format():
+    registry = MetricsRegistry()
+    registry.counter("errors").inc(reason='bad "quote"\\path\nsecond line')
+    lines = registry.render_prometheus().splitlines()
+    assert 'socialbot_errors_total{reason="bad \\"quote\\"\\\\path\\nsecond line"} 1' in lines
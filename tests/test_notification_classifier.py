@@ -0,0 +1,38 @@
+import pytest
+
+from adapters.notification_classifier import UNKNOWN, NotificationClassifier, classify_notification
+from benchmarks.classifier_bench import load_corpus
+
+
+@pytest.mark.parametrize("row", load_corpus(), ids=lambda row: f"{row['locale']}:{row['text'][:30]}")
+def test_labelled_corpus(row):
+    assert classify_notification(row["text"]).type == row["type"]
+
+
+def test_verb_beats_quoted_text():
+    result = classify_notification("Alice replied to your comment: I liked it")
+    assert result.type == "reply"
+    assert result.actionable and not result.passive
+    assert 0 < result.confidence < 1
+
+
+def test_single_strong_hit_is_fully_confident():
+    result = classify_notification("bob started following you")
+    assert result.type == "follow" and result.confidence == 1.0
+    assert result.passive
+
+
+def test_weak_hit_alone_is_low_confidence():
+    assert classify_notification("댓글").confidence == 0.5
+
+
+def test_latin_phrases_match_whole_words_only():
+    assert classify_notification("someone disliked this") == UNKNOWN
+    assert classify_notification("") == UNKNOWN
+
+
+def test_locales_restrict_the_packs():
+    classifier = NotificationClassifier(["en"])
+    assert classifier.locales == ["en"]
+    assert classifier.classify("小明 回覆了你的貼文") == UNKNOWN
+    assert classifier.classify("Mia mentioned you").type == "mention"
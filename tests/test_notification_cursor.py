@@ -0,0 +1,71 @@
+import asyncio
+
+from core.db import Database, NotificationCursor
+
+
+def test_reached_stops_at_handled_items():
+    cursor = NotificationCursor("ig", ["a", "b"])
+    assert "a" in cursor
+    assert cursor.reached("a")
+    assert not cursor.reached("new")
+
+
+def test_bounded_and_recency_ordered():
+    cursor = NotificationCursor("ig", max_size=3)
+    for notif_id in "abcd":
+        cursor.add(notif_id)
+    cursor.add("b")
+    assert cursor.ids == ["c", "d", "b"]
+
+
+def test_unresolved_items_keep_the_scan_going_until_resolved():
+    cursor = NotificationCursor("ig", ["old"])
+    assert cursor.defer("failed")
+    assert "failed" not in cursor
+    # A newer handled item must not hide the unresolved one below it
+    cursor.add("newer")
+    assert not cursor.reached("newer")
+    cursor.add("failed")
+    assert cursor.unresolved == {}
+    assert cursor.reached("newer")
+
+
+def test_unresolved_item_given_up_after_max_attempts():
+    cursor = NotificationCursor("ig", max_attempts=3)
+    assert cursor.defer("x")
+    assert cursor.defer("x")
+    assert not cursor.defer("x")
+    assert "x" in cursor
+    assert cursor.unresolved == {}
+
+
+def test_round_trip_through_database(tmp_path):
+    db = Database(str(tmp_path / "history.db"))
+
+    async def scenario():
+        await db.init_db()
+        cursor = NotificationCursor("ig", ["a", "b"])
+        cursor.defer("c")
+        await db.save_notification_cursor(cursor)
+        return await db.load_notification_cursor("ig")
+
+    loaded = asyncio.run(scenario())
+    assert loaded.ids == ["a", "b"]
+    assert loaded.unresolved == {"c": 1}
+
+
+def test_loads_cursor_saved_as_plain_id_list(tmp_path):
+    import aiosqlite
+
+    db = Database(str(tmp_path / "history.db"))
+
+    async def scenario():
+        await db.init_db()
+        async with aiosqlite.connect(db.db_path) as conn:
+            await conn.execute("INSERT INTO notification_cursor (platform, seen_ids) VALUES ('ig', '[\"a\"]')")
+            await conn.commit()
+        return await db.load_notification_cursor("ig")
+
+    loaded = asyncio.run(scenario())
+    assert loaded.ids == ["a"]
+    assert loaded.unresolved == {}
@@ -0,0 +1,34 @@
+import pytest
+
+from adapters.base import notification_identity
+
+
+@pytest.mark.parametrize("before, after", [
+    ("alice commented: nice post 2h", "alice commented: nice post 3h"),
+    ("alice commented: nice post\n59m", "alice commented: nice post\n1d"),
+    ("alice replied: see you Just now", "alice replied: see you 2 minutes ago"),
+    ("bob 留言了：好棒 3 天", "bob 留言了：好棒 4 天"),
+    ("bob 回覆了你 5分鐘", "bob 回覆了你 1小時"),
+    ("ken さんがコメントしました 5分前", "ken さんがコメントしました 2時間前"),
+    ("민수님이 댓글을 남겼습니다 2시간 전", "민수님이 댓글을 남겼습니다 1일 전"),
+])
+def test_identity_ignores_relative_timestamps(before, after):
+    assert notification_identity("ig", "alice", "/p/1", before) == notification_identity("ig", "alice", "/p/1", after)
+
+
+def test_identity_ignores_whitespace_layout():
+    assert notification_identity("ig", "a", None, "alice  commented:\n nice") == \
+        notification_identity("ig", "a", None, "alice commented: nice")
+
+
+def test_identity_separates_content_author_post_and_platform():
+    base = notification_identity("ig", "alice", "/p/1", "alice commented: great")
+    assert base != notification_identity("ig", "alice", "/p/1", "alice commented: good")
+    assert base != notification_identity("ig", "bob", "/p/1", "alice commented: great")
+    assert base != notification_identity("ig", "alice", "/p/2", "alice commented: great")
+    assert base != notification_identity("threads", "alice", "/p/1", "alice commented: great")
+    assert base.startswith("ig_notif_")
+
+
+def test_identity_keeps_numbers_that_are_not_times():
+    assert notification_identity("ig", "a", None, "alice: I ran 5km") != notification_identity("ig", "a", None, "alice: I ran 6km")
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from core import clock
+from core.rate_limiter import ProviderRateLimiter, TokenBucket, parse_limits
+
+
+@pytest.fixture
+def virtual_clock():
+    virtual = clock.VirtualClock()
+    previous = clock.set_clock(virtual)
+    yield virtual
+    clock.set_clock(previous)
+
+
+def limiter(rpm=60, tpm=0):
+    return ProviderRateLimiter("openai", "gpt-test", rpm, tpm, decrease=0.5, increase=0.1, min_factor=0.1)
+
+
+def test_bucket_refills_at_the_per_minute_rate(virtual_clock):
+    bucket = TokenBucket(60)
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    virtual_clock.advance(30)
+    assert bucket.wait_time(30) == 0
+
+
+def test_unlimited_bucket_never_waits(virtual_clock):
+    bucket = TokenBucket(0)
+    bucket.take(10 ** 6)
+    assert bucket.wait_time(10 ** 6) == 0
+
+
+def test_acquire_waits_for_the_budget(virtual_clock):
+    rl = limiter(rpm=2)
+
+    async def three_calls():
+        for _ in range(3):
+            await rl.acquire(100)
+
+    asyncio.run(three_calls())
+    assert virtual_clock.monotonic() == pytest.approx(30)
+    assert rl.waited_seconds == pytest.approx(30)
+
+
+def test_aimd_halves_on_429_and_recovers_additively(virtual_clock):
+    rl = limiter()
+    rl.on_rate_limited(retry_after=5)
+    assert rl.factor == 0.5 and rl.requests.capacity == 30
+    assert rl.blocked_until == 5
+    rl.on_rate_limited()
+    rl.on_rate_limited()
+    rl.on_rate_limited()
+    rl.on_rate_limited()
+    assert rl.factor == 0.1  # min_factor floor
+    for _ in range(3):
+        rl.on_success(100)
+    assert rl.factor == pytest.approx(0.4)
+
+
+def test_headers_replace_limits_and_hold_back_recovery(virtual_clock):
+    rl = limiter()
+    rl.on_rate_limited()
+    headers = {"x-ratelimit-limit-requests": "100", "x-ratelimit-remaining-requests": "5"}
+    rl.on_success(100, headers=headers)
+    assert rl.requests.limit == 100
+    assert rl.requests.tokens <= 5
+    assert rl.factor == 0.5  # near the limit: no additive increase
+
+
+def test_parse_limits():
+    assert parse_limits("openai=500/200000; google:gemini-1.5-pro=2/32000,bad") == {
+        "openai": (500, 200000), "google:gemini-1.5-pro": (2, 32000)}
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from adapters.base import Post
+from benchmarks.relevance_bench import load_corpus, run
+from core.relevance import RelevanceFilter, extract_features, train_logistic
+
+
+def test_corpus_has_no_false_skips():
+    summary = run(load_corpus(), model_path="", repeat=1)
+    assert summary["relevant_skipped"] == 0
+    assert summary["llm_calls_avoided"] > summary["irrelevant_let_through"]
+
+
+def test_sponsored_marker_in_the_header_scores_zero():
+    relevance = RelevanceFilter(threshold=0.5, model_path="")
+    result = relevance.score("Sponsored · Shop the new spring collection today")
+    assert result.score == 0 and result.reason == "sponsored"
+    # Only the header counts: the word deep inside a real post is fine
+    body = "I spent the whole weekend rebuilding my bike and honestly it rides like new. " * 3 + "Not sponsored!"
+    assert relevance.score(body).score == 1.0
+
+
+@pytest.mark.parametrize("text", [
+    "Not sponsored, but this blender changed my mornings. Smoothies every day now!",
+    "Honestly this isn't a paid partnership, I just really love this little bakery",
+    "Not Sponsored · just a very happy customer sharing my new running shoes",
+    "感謝大家贊助我們的社區活動，今天真的很成功",
+])
+def test_sponsored_words_in_a_caption_are_not_an_ad(text):
+    relevance = RelevanceFilter(threshold=0.5, model_path="")
+    assert relevance.score(text).reason != "sponsored"
+
+
+def test_sponsored_header_after_the_author_name_is_an_ad():
+    relevance = RelevanceFilter(threshold=0.5, model_path="")
+    assert relevance.score("brandname Sponsored · Shop the new spring collection today").reason == "sponsored"
+
+
+def test_short_caption_is_softened_by_an_image():
+    relevance = RelevanceFilter(threshold=0.5, model_path="")
+    assert relevance.score("wow").reasons == ("too_short",)
+    assert relevance.score("wow", has_image=True).score > relevance.score("wow").score
+
+
+def test_cjk_characters_count_as_denser_letters():
+    assert extract_features("今天天氣很好")["letters"] == 18
+
+
+def test_check_counts_skip_reasons():
+    relevance = RelevanceFilter(threshold=0.5, model_path="")
+    assert relevance.check(Post(id="1", content="https://example.com/a-very-long-link-to-something")).reason == "mostly_links"
+    assert relevance.check(Post(id="2", content="Anyone else up this early? The sunrise today was unreal")) is None
+    assert relevance.summary() == "1/2 posts skipped before the LLM (mostly_links 1)"
+
+
+def test_trained_model_loads_and_is_averaged_in(tmp_path):
+    rows = [(extract_features(r["text"], r["has_image"], r["language"]), r["relevant"]) for r in load_corpus()]
+    path = tmp_path / "relevance_model.json"
+    path.write_text(json.dumps(train_logistic(rows, epochs=50)))
+    relevance = RelevanceFilter(threshold=0.5, model_path=str(path))
+    assert relevance.model is not None
+    assert 0 < relevance.score("Finished my first half marathon today, legs are gone").score < 1
+
+
+def test_unusable_model_falls_back_to_rules(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text("{}")
+    assert RelevanceFilter(model_path=str(path)).model is None
@@ -0,0 +1,29 @@
+import asyncio
+from types import SimpleNamespace
+
+from benchmarks import replay
+
+
+class FakeAdapter:
+    def __init__(self):
+        self.replies = []
+
+    async def get_feed(self):
+        return ["post-1", "post-2"]
+
+    async def get_notifications(self):
+        return []
+
+    async def reply(self, post, comment):
+        self.replies.append((post, comment))
+        return True
+
+
+def test_reply_step_replies_to_first_scanned_post(tmp_path):
+    adapter = FakeAdapter()
+    browser = SimpleNamespace(page=SimpleNamespace(url="https://example.test/"))
+
+    results = asyncio.run(replay._run_steps(adapter, browser, ["reply", "feed", "reply", "notifications"]))
+
+    assert [r["items"] for r in results] == [0, 2, 1, 0]
+    assert adapter.replies == [("post-1", replay.REPLAY_COMMENT)]
@@ -0,0 +1,88 @@
+import logging
+from datetime import datetime
+
+import pytest
+
+from core import clock
+from core.scheduler import AdaptivePollScheduler, RetryBackoff
+
+
+@pytest.fixture
+def virtual_clock():
+    virtual = clock.VirtualClock(start=datetime(2024, 5, 1, 12, 0))
+    previous = clock.set_clock(virtual)
+    yield virtual
+    clock.set_clock(previous)
+
+
+def scheduler(**overrides):
+    options = dict(floor=10, ceiling=300, backoff_factor=2.0, jitter_ratio=0.0, quiet_hours="", quiet_interval=900)
+    options.update(overrides)
+    return AdaptivePollScheduler(**options)
+
+
+def test_interval_grows_on_quiet_polls_up_to_the_ceiling(virtual_clock):
+    polls = scheduler()
+    intervals = []
+    for _ in range(7):
+        polls.record(hit=False)
+        intervals.append(polls.next_interval())
+    assert intervals == [20, 40, 80, 160, 300, 300, 300]
+
+
+def test_activity_resets_to_the_floor(virtual_clock):
+    polls = scheduler()
+    for _ in range(3):
+        polls.record(hit=False)
+    polls.record(hit=True)
+    assert polls.next_interval() == 10
+    assert (polls.hits, polls.polls) == (1, 4)
+    assert polls.hit_rate == 0.25
+
+
+def test_jitter_stays_within_the_ratio(virtual_clock):
+    polls = scheduler(jitter_ratio=0.2)
+    samples = [polls.next_interval() for _ in range(500)]
+    assert all(8 <= s <= 12 for s in samples)
+    assert max(samples) - min(samples) > 2  # actually jittered
+
+
+def test_quiet_hours_wrap_past_midnight(virtual_clock):
+    polls = scheduler(quiet_hours="23:00-06:00")
+    assert not polls.in_quiet_hours()  # noon
+    assert polls.next_interval() == 10
+    virtual_clock.advance(11.5 * 3600)  # 23:30
+    assert polls.in_quiet_hours()
+    assert polls.next_interval() == 900
+    virtual_clock.advance(6 * 3600)  # 05:30 the next day
+    assert polls.in_quiet_hours()
+    virtual_clock.advance(3600)  # 06:30
+    assert not polls.in_quiet_hours()
+
+
+def test_invalid_quiet_hours_are_ignored(virtual_clock):
+    assert scheduler(quiet_hours="late-night").quiet_hours is None
+
+
+def test_unchanged_interval_is_logged_at_debug(virtual_clock, caplog):
+    polls = scheduler(ceiling=20)
+    with caplog.at_level(logging.DEBUG, logger="core.scheduler"):
+        polls.record(hit=False)  # 10 -> 20
+        polls.record(hit=False)  # stays at the ceiling
+    assert [r.levelno for r in caplog.records] == [logging.INFO, logging.DEBUG]
+
+
+def test_retry_backoff_doubles_within_jitter_and_caps(virtual_clock):
+    backoff = RetryBackoff(base=2, cap=30)
+    delays = [backoff.next_delay() for _ in range(6)]
+    for delay, ceiling in zip(delays, [2, 4, 8, 16, 30, 30]):
+        assert ceiling / 2 <= delay <= ceiling
+    assert backoff.attempts == 6
+    assert backoff.total_seconds == pytest.approx(sum(delays))
+    backoff.reset()
+    assert 1 <= backoff.next_delay() <= 2
+
+
+def test_retry_after_is_a_lower_bound(virtual_clock):
+    backoff = RetryBackoff(base=2, cap=30)
+    assert 45 <= backoff.next_delay(retry_after=45) <= 46
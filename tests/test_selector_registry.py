@@ -0,0 +1,51 @@
+import asyncio
+
+from adapters.selector_registry import SelectorRegistry
+
+
+class FakeLocator:
+    def __init__(self, selector, matches):
+        self.selector = selector
+        self.matches = matches
+
+    def locator(self, selector):
+        return self  # visible=true filter: same matches
+
+    async def count(self):
+        return self.matches.get(self.selector, 0)
+
+
+class FakeScope:
+    def __init__(self, **matches):
+        self.matches = matches
+
+    def locator(self, selector):
+        return FakeLocator(selector, self.matches)
+
+
+def entry(registry):
+    return registry.register("test", "SEND", ["button.send", "button.post"], fallbacks=["div"])
+
+
+def test_union_string_keeps_plain_locator_calls_working():
+    assert entry(SelectorRegistry()) == "button.send, button.post, div"
+
+
+def test_winner_is_tried_first_next_time():
+    registry = SelectorRegistry()
+    send = entry(registry)
+    scope = FakeScope(**{"button.post": 1})
+    assert asyncio.run(registry.locate(scope, send)).selector == "button.post"
+    assert send.ranked()[0] == "button.post"
+    asyncio.run(registry.locate(scope, send))
+    assert registry.first_try_hits == 1 and registry.locates == 2
+
+
+def test_fallbacks_are_last_and_can_be_excluded():
+    registry = SelectorRegistry()
+    send = entry(registry)
+    scope = FakeScope(div=40)
+    assert asyncio.run(registry.locate(scope, send)).selector == "div"
+    assert send.ranked()[-1] == "div"  # never promoted
+    assert asyncio.run(registry.locate(scope, send, fallbacks=False)) is None
+    assert send.stats["div"].attempts == 1
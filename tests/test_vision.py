@@ -0,0 +1,28 @@
+import asyncio
+import base64
+import io
+
+from PIL import Image
+
+from core.vision import prepare_images
+
+
+def picture(width, height) -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "teal").save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def test_lone_photo_is_passed_through_untouched():
+    photo = picture(640, 480)
+    assert asyncio.run(prepare_images([photo], min_side=100)) == [photo]
+
+
+def test_lone_avatar_or_undecodable_image_is_dropped():
+    assert asyncio.run(prepare_images([picture(40, 40)], min_side=100)) == []
+    assert asyncio.run(prepare_images(["not an image"], min_side=100)) == []
+
+
+def test_avatar_next_to_a_photo_leaves_the_photo_alone():
+    photo = picture(640, 480)
+    assert asyncio.run(prepare_images([picture(40, 40), photo], policy="top_k", min_side=100)) == [photo]
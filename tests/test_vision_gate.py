@@ -0,0 +1,74 @@
+import asyncio
+import base64
+import io
+import json
+import random
+
+from PIL import Image
+
+from adapters.base import Post
+from core.vision_gate import VisionGate, image_reason, image_stats
+
+
+def encode(image: Image.Image) -> str:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def photo(width=400, height=300) -> str:
+    rng = random.Random(0)
+    return encode(Image.frombytes("L", (width, height), bytes(rng.randrange(256) for _ in range(width * height))))
+
+
+def flat(width, height) -> str:
+    return encode(Image.new("RGB", (width, height), "white"))
+
+
+def post(content="Look at this", images=()):
+    return Post(id="p1", content=content, platform="threads", images=list(images))
+
+
+def test_image_reasons():
+    assert image_reason(image_stats(photo())) is None
+    assert image_reason(image_stats(photo(40, 40))) == "icon"
+    assert image_reason(image_stats(photo(150, 150))) == "avatar"
+    assert image_reason(image_stats(photo(1000, 120))) == "banner"
+    assert image_reason(image_stats(flat(400, 300))) == "flat_image"
+    assert image_reason(image_stats("not an image")) == "undecodable"
+
+
+def test_long_text_goes_text_only_without_loading_images(tmp_path):
+    loaded = []
+
+    async def loader():
+        loaded.append(1)
+        return photo()
+
+    gate = VisionGate(text_chars=10, counterfactual_rate=0, log_file=str(tmp_path / "gate.jsonl"))
+    item = Post(id="p1", content="a long enough caption", image_loaders=[loader])
+    decision = asyncio.run(gate.decide(item))
+    assert not decision.vision and decision.reason == "text_sufficient"
+    assert loaded == []
+    assert gate.images_avoided == 1
+
+
+def test_keeps_photos_and_drops_decorations(tmp_path):
+    log = tmp_path / "logs" / "gate.jsonl"
+    gate = VisionGate(text_chars=240, counterfactual_rate=0, log_file=str(log))
+    keep = photo()
+    decision = asyncio.run(gate.decide(post(images=[flat(400, 300), keep, photo(40, 40)])))
+    assert decision.vision and decision.images == [keep]
+    assert decision.reasons == ("flat_image", "icon")
+
+    asyncio.run(gate.note_near_duplicate(post(), decision))
+    rows = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [row["event"] for row in rows] == ["decision", "near_duplicate"]
+    assert gate.decisions == {("vision", "flat_image"): 0, ("text_only", "near_duplicate"): 1}
+
+
+def test_only_decorations_goes_text_only():
+    gate = VisionGate(text_chars=240, counterfactual_rate=0, log_file="")
+    decision = asyncio.run(gate.decide(post(images=[photo(40, 40)])))
+    assert not decision.vision and decision.images == []
+    assert "1 vision" not in gate.summary() and "icon 1" in gate.summary()
@@ -0,0 +1,51 @@
+import asyncio
+
+from core import metrics
+from core.watchdog import RendererWatchdog
+
+
+def test_sample_exports_renderer_gauges(monkeypatch):
+    watchdog = RendererWatchdog(browser=None, interval=0, metrics_path="")
+
+    async def fake_metrics():
+        return {"JSHeapUsedSize": 64 * 2**20, "Nodes": 1200, "Documents": 3}
+
+    monkeypatch.setattr(watchdog, "_metrics", fake_metrics)
+    gauges = []
+    monkeypatch.setattr(metrics, "set_gauge", lambda name, value, **labels: gauges.append((name, value)))
+
+    sample = asyncio.run(watchdog.sample())
+
+    assert sample["js_heap_mb"] == 64
+    assert sample["nodes"] == 1200
+    assert ("renderer_js_heap_mb", 64) in gauges
+    assert ("renderer_nodes", 1200) in gauges
+
+
+def test_sample_survives_cdp_failure(monkeypatch):
+    watchdog = RendererWatchdog(browser=None, interval=0, metrics_path="")
+
+    async def broken():
+        raise RuntimeError("target closed")
+
+    monkeypatch.setattr(watchdog, "_metrics", broken)
+    sample = asyncio.run(watchdog.sample())
+    assert sample["nodes"] == 0
+
+
+def test_sample_appends_to_the_metrics_file(monkeypatch, tmp_path):
+    path = tmp_path / "renderer" / "metrics.jsonl"
+    watchdog = RendererWatchdog(browser=None, interval=0, metrics_path=str(path))
+
+    async def fake_metrics():
+        return {"Nodes": 10}
+
+    monkeypatch.setattr(watchdog, "_metrics", fake_metrics)
+
+    async def run():
+        await watchdog.sample()
+        await watchdog.sample()
+
+    asyncio.run(run())
+    rows = path.read_text(encoding="utf-8").splitlines()
+    assert len(rows) == 2 and '"nodes": 10' in rows[0]